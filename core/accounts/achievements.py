@@ -0,0 +1,159 @@
+import bisect
+import operator
+from collections import defaultdict
+from dataclasses import dataclass
+from numbers import Number
+
+from django.core.cache import cache
+
+from core.accounts.models import Achievement, UserAchievement
+from core.accounts.versions import SharedVersion
+
+
+OPERATORS = {
+    'gte': operator.ge,
+    'gt': operator.gt,
+    'lte': operator.le,
+    'lt': operator.lt,
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'in': lambda value, options: value in options,
+}
+
+
+def compile_condition(condition_data: dict) -> tuple[tuple[str, str, object], ...]:
+    """
+    Преобразует condition_data в кортеж (ключ, оператор, значение).
+
+    Простое значение означает ">=": {"tasks_completed": 10}.
+    Для остальных сравнений используется словарь: {"streak": {"gte": 7, "lt": 30}}.
+    """
+    conditions = []
+    for key, value in condition_data.items():
+        if isinstance(value, dict):
+            for op, operand in value.items():
+                if op not in OPERATORS:
+                    raise ValueError(f"Invalid operator: {op}")
+                conditions.append((key, op, operand))
+        else:
+            conditions.append((key, 'gte', value))
+    return tuple(conditions)
+
+
+@dataclass(frozen=True)
+class AchievementRule:
+    achievement_id: int
+    conditions: tuple[tuple[str, str, object], ...]
+
+    @property
+    def bit(self) -> int:
+        return 1 << self.achievement_id
+
+    def matches(self, payload: dict) -> bool:
+        for key, op, operand in self.conditions:
+            if key not in payload:
+                return False
+            try:
+                if not OPERATORS[op](payload[key], operand):
+                    return False
+            except TypeError:
+                return False
+        return True
+
+
+class TriggerIndex:
+    """
+    Правила одного триггера. Правила с порогом ">=" отсортированы по порогу,
+    поэтому подходящие находятся бинарным поиском по значению из payload.
+    """
+    def __init__(self, rules: list[AchievementRule]) -> None:
+        self.thresholds = {}
+        self.other = []
+
+        by_key = defaultdict(list)
+        for rule in rules:
+            key, op, operand = rule.conditions[0] if rule.conditions else (None, None, None)
+            if op == 'gte' and isinstance(operand, Number):
+                by_key[key].append((operand, rule))
+            else:
+                self.other.append(rule)
+
+        for key, items in by_key.items():
+            items.sort(key=lambda item: item[0])
+            self.thresholds[key] = ([threshold for threshold, _ in items], [rule for _, rule in items])
+
+    def candidates(self, payload: dict):
+        for key, (thresholds, rules) in self.thresholds.items():
+            value = payload.get(key)
+            if isinstance(value, Number):
+                yield from rules[:bisect.bisect_right(thresholds, value)]
+        yield from self.other
+
+
+class AchievementRules:
+    """
+    Скомпилированные правила достижений, сгруппированные по триггеру.
+    Хранятся в процессе и пересобираются, когда меняется общая версия в БД
+    (SharedVersion): правку достижения в админке видит и воркер очереди.
+    """
+    VERSION_KEY = 'achievements:rules'
+
+    _indexes: dict[str, TriggerIndex] | None = None
+    _version = None
+
+    @classmethod
+    def get(cls) -> dict[str, TriggerIndex]:
+        version = SharedVersion.get(cls.VERSION_KEY)
+        if cls._indexes is None or cls._version != version:
+            cls._indexes = cls._compile()
+            cls._version = version
+        return cls._indexes
+
+    @classmethod
+    def invalidate(cls) -> None:
+        SharedVersion.bump(cls.VERSION_KEY)
+
+    @staticmethod
+    def _compile() -> dict[str, TriggerIndex]:
+        rules = defaultdict(list)
+        for achievement_id, trigger, condition_data in Achievement.objects.values_list('id', 'trigger', 'condition_data'):
+            rules[trigger].append(AchievementRule(achievement_id, compile_condition(condition_data)))
+        return {trigger: TriggerIndex(trigger_rules) for trigger, trigger_rules in rules.items()}
+
+
+class UnlockedAchievements:
+    """
+    Битовая маска полученных пользователем достижений (бит = id достижения).
+
+    Маска в кэше процесса помечена общей версией пользователя (SharedVersion).
+    Версия сдвигается только при удалении достижения: недостающий в чужой
+    маске бит безопасен — повторная выдача упрётся в уникальный индекс и
+    ничего не опубликует, а лишний бит помешал бы выдать достижение заново.
+    """
+    KEY = 'achievements:unlocked:{user_id}'
+    TIMEOUT = 60 * 60
+
+    @classmethod
+    def get(cls, user_id: int) -> int:
+        key = cls.KEY.format(user_id=user_id)
+        version = SharedVersion.get(key)
+        cached = cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        bits = 0
+        for achievement_id in UserAchievement.objects.filter(user_id=user_id).values_list('achievement_id', flat=True):
+            bits |= 1 << achievement_id
+        cache.set(key, (version, bits), cls.TIMEOUT)
+        return bits
+
+    @classmethod
+    def add(cls, user_id: int, bits: int) -> None:
+        key = cls.KEY.format(user_id=user_id)
+        cached = cache.get(key)
+        if cached is not None:
+            cache.set(key, (cached[0], cached[1] | bits), cls.TIMEOUT)
+
+    @classmethod
+    def invalidate(cls, user_id: int) -> None:
+        SharedVersion.bump(cls.KEY.format(user_id=user_id))
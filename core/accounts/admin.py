@@ -1,5 +1,5 @@
 from django.contrib import admin
-from core.accounts.models import UserProfile, UserInventory, UserBoost, UserStreak, Achievement, Trade, FriendRelation, UserDailyRoulette
+from core.accounts.models import UserProfile, UserInventory, UserBoost, UserStreak, Achievement, Trade, FriendRelation, UserDailyRoulette, LeaderboardEntry, LedgerEntry, OutboxEvent, Friendship, Activity, TimelineEntry, RouletteReward
 
 admin.site.register(UserProfile)
 admin.site.register(UserInventory)
@@ -8,4 +8,11 @@ admin.site.register(UserStreak)
 admin.site.register(Achievement)
 admin.site.register(Trade)
 admin.site.register(FriendRelation)
-admin.site.register(UserDailyRoulette)
\ No newline at end of file
+admin.site.register(UserDailyRoulette)
+admin.site.register(LeaderboardEntry)
+admin.site.register(LedgerEntry)
+admin.site.register(OutboxEvent)
+admin.site.register(Friendship)
+admin.site.register(Activity)
+admin.site.register(TimelineEntry)
+admin.site.register(RouletteReward)
@@ -0,0 +1,85 @@
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from core.accounts.models import UserBoost
+from core.accounts.versions import SharedVersion
+
+
+@dataclass(frozen=True)
+class BoostState:
+    multipliers: dict[str, float] = field(default_factory=dict)
+    boost_ids: frozenset[int] = frozenset()
+    expires_at: float | None = None
+    version: int = 0
+
+    def multiplier(self, boost_type: str) -> float:
+        return self.multipliers.get(boost_type, 1.0)
+
+
+class ActiveBoosts:
+    """
+    Активные бусты пользователя: множитель для каждого типа буста.
+
+    Состояние хранится в кэше процесса до истечения ближайшего буста и помечено
+    общей версией пользователя (SharedVersion), которую сдвигает покупка или
+    удаление буста в любом процессе. Начисление награды сверяет версию одним
+    запросом и не загружает бусты, пока их набор не изменится. Из нескольких
+    активных бустов одного типа действует самый сильный.
+    """
+    KEY = 'boosts:active:{user_id}'
+    TIMEOUT = 60 * 60
+
+    @classmethod
+    def get(cls, user_id: int) -> BoostState:
+        key = cls.KEY.format(user_id=user_id)
+        version = SharedVersion.get(key)
+        state = cache.get(key)
+        if (
+            state is None
+            or state.version != version
+            or (state.expires_at is not None and state.expires_at <= time.time())
+        ):
+            state = cls._load(user_id, version)
+            timeout = cls.TIMEOUT
+            if state.expires_at is not None:
+                timeout = max(1, min(timeout, int(state.expires_at - time.time()) + 1))
+            cache.set(key, state, timeout)
+        return state
+
+    @classmethod
+    def invalidate(cls, user_id: int) -> None:
+        SharedVersion.bump(cls.KEY.format(user_id=user_id))
+
+    @staticmethod
+    def _load(user_id: int, version: int) -> BoostState:
+        rows = UserBoost.objects.filter(user_id=user_id, expires_at__gt=timezone.now()).values_list(
+            'boost_id', 'boost__boost_type', 'boost__multiplier', 'expires_at'
+        )
+        multipliers = {}
+        boost_ids = set()
+        expires_at = None
+        for boost_id, boost_type, multiplier, expires in rows:
+            multipliers[boost_type] = max(multipliers.get(boost_type, multiplier), multiplier)
+            boost_ids.add(boost_id)
+            expires_at = min(expires_at or expires, expires)
+        return BoostState(multipliers, frozenset(boost_ids), expires_at.timestamp() if expires_at else None, version)
+
+    @staticmethod
+    def prune(before: datetime | None = None, chunk_size: int = 5000) -> int:
+        """
+        Удаляет бусты, истёкшие до before, пачками по chunk_size,
+        чтобы не держать долгую блокировку таблицы. Возвращает число удалённых.
+        """
+        before = before or timezone.now()
+        deleted = 0
+        while True:
+            ids = list(UserBoost.objects.filter(expires_at__lt=before).order_by('expires_at').values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                return deleted
+            with transaction.atomic():
+                deleted += UserBoost.objects.filter(id__in=ids).delete()[0]
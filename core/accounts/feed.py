@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from core.accounts.friends import FriendGraph
+from core.accounts.models import User, Activity, TimelineEntry
+
+Verb = Activity.Verb
+
+
+class ActivityFeed:
+    """
+    Лента активности друзей.
+
+    При записи событие раскладывается в ленты всех друзей автора (fan-out on write),
+    поэтому чтение — один запрос по индексу ленты. Если у автора больше FANOUT_LIMIT
+    друзей, событие не рассылается, а подмешивается к ленте при чтении (fan-out on read).
+    Ленты обрезаются до TIMELINE_LIMIT записей командой prune_timelines.
+    """
+    PAGE_SIZE = 20
+    MAX_PAGE_SIZE = 100
+    FANOUT_LIMIT = 1000
+    TIMELINE_LIMIT = 500
+    RETENTION_DAYS = 30
+
+    def __init__(self, user: User) -> None:
+        self.user = user
+
+    def publish(self, verb: str, payload: dict | None = None) -> Activity:
+        return self.publish_many(verb, [payload or {}])[0]
+
+    def publish_many(self, verb: str, payloads: list[dict]) -> list[Activity]:
+        if not payloads:
+            return []
+
+        followers = list(
+            FriendGraph(self.user).friend_ids().values_list('friend_id', flat=True)[:self.FANOUT_LIMIT + 1]
+        )
+        fanned_out = len(followers) <= self.FANOUT_LIMIT
+
+        with transaction.atomic():
+            activities = Activity.objects.bulk_create([
+                Activity(actor_id=self.user.id, verb=verb, payload=payload, fanned_out=fanned_out)
+                for payload in payloads
+            ])
+            if fanned_out and followers:
+                TimelineEntry.objects.bulk_create([
+                    TimelineEntry(owner_id=follower_id, activity=activity)
+                    for activity in activities
+                    for follower_id in followers
+                ], batch_size=5000)
+        return activities
+
+    def timeline(self, before: int | None = None, limit: int = PAGE_SIZE) -> tuple[list[Activity], int | None]:
+        """
+        Страница ленты от новых к старым. before — курсор (id последней активности
+        предыдущей страницы). Возвращает (активности, курсор следующей страницы).
+        """
+        limit = max(1, min(limit, self.MAX_PAGE_SIZE))
+        pushed = TimelineEntry.objects.filter(owner_id=self.user.id)
+        pulled = Activity.objects.filter(fanned_out=False, actor_id__in=FriendGraph(self.user).friend_ids())
+        if before is not None:
+            pushed = pushed.filter(activity_id__lt=before)
+            pulled = pulled.filter(id__lt=before)
+
+        activities = [entry.activity for entry in pushed.select_related('activity__actor').order_by('-activity_id')[:limit + 1]]
+        activities += list(pulled.select_related('actor').order_by('-id')[:limit + 1])
+        activities.sort(key=lambda activity: activity.id, reverse=True)
+
+        if len(activities) > limit:
+            return activities[:limit], activities[limit - 1].id
+        return activities, None
+
+    @classmethod
+    def prune(cls, now: datetime | None = None) -> int:
+        """
+        Обрезает ленты до TIMELINE_LIMIT записей и удаляет активности старше
+        RETENTION_DAYS. Возвращает количество удалённых записей.
+        """
+        deleted = 0
+        overflowing = (
+            TimelineEntry.objects.values('owner_id')
+            .annotate(total=Count('id'))
+            .filter(total__gt=cls.TIMELINE_LIMIT)
+            .order_by()
+        )
+        for row in overflowing:
+            entries = TimelineEntry.objects.filter(owner_id=row['owner_id'])
+            cutoff = entries.order_by('-activity_id').values_list('activity_id', flat=True)[cls.TIMELINE_LIMIT]
+            deleted += entries.filter(activity_id__lte=cutoff).delete()[0]
+
+        expired_before = (now or timezone.now()) - timedelta(days=cls.RETENTION_DAYS)
+        deleted += Activity.objects.filter(created_at__lt=expired_before).delete()[0]
+        return deleted
@@ -0,0 +1,102 @@
+from django.db import transaction
+from django.db.models import Count, Q
+
+from core.accounts.models import User, FriendRelation, Friendship
+
+
+class FriendGraph:
+    """
+    Граф друзей поверх таблицы смежности Friendship.
+
+    Каждая принятая заявка хранится двумя записями (a -> b и b -> a), поэтому
+    друзья пользователя, общие друзья и рекомендации выбираются одним
+    запросом по индексу без разбора направления заявки.
+    """
+    PAGE_SIZE = 20
+    MAX_PAGE_SIZE = 100
+
+    def __init__(self, user: User) -> None:
+        self.user = user
+
+    @staticmethod
+    def link(user_id: int, friend_id: int) -> None:
+        Friendship.objects.bulk_create([
+            Friendship(user_id=user_id, friend_id=friend_id),
+            Friendship(user_id=friend_id, friend_id=user_id),
+        ], ignore_conflicts=True)
+
+    @staticmethod
+    def unlink(user_id: int, friend_id: int) -> None:
+        Friendship.objects.filter(
+            Q(user_id=user_id, friend_id=friend_id) | Q(user_id=friend_id, friend_id=user_id)
+        ).delete()
+
+    def friend_ids(self):
+        return Friendship.objects.filter(user_id=self.user.id).values('friend_id')
+
+    def page(self, after: int | None = None, limit: int = PAGE_SIZE) -> tuple[list[User], int | None]:
+        """
+        Страница друзей, упорядоченных по id. Возвращает (друзья, курсор следующей страницы).
+        """
+        limit = max(1, min(limit, self.MAX_PAGE_SIZE))
+        friendships = Friendship.objects.filter(user_id=self.user.id)
+        if after is not None:
+            friendships = friendships.filter(friend_id__gt=after)
+
+        friends = [
+            friendship.friend
+            for friendship in friendships.select_related('friend__profile').order_by('friend_id')[:limit + 1]
+        ]
+        if len(friends) > limit:
+            return friends[:limit], friends[limit - 1].id
+        return friends, None
+
+    def mutual_counts(self, user_ids) -> dict[int, int]:
+        """Количество общих друзей с каждым из user_ids."""
+        rows = (
+            Friendship.objects
+            .filter(user_id__in=list(user_ids), friend_id__in=self.friend_ids())
+            .values('user_id')
+            .annotate(mutual=Count('friend_id'))
+            .order_by()
+        )
+        return {row['user_id']: row['mutual'] for row in rows}
+
+    def suggestions(self, limit: int = PAGE_SIZE) -> list[tuple[int, int]]:
+        """
+        Друзья друзей, отсортированные по числу общих друзей: [(user_id, mutual), ...].
+        Пользователи, с которыми уже есть заявка в любом статусе, не предлагаются.
+        """
+        limit = max(1, min(limit, self.MAX_PAGE_SIZE))
+        requested = FriendRelation.objects.filter(requester_id=self.user.id).values('recipient_id')
+        received = FriendRelation.objects.filter(recipient_id=self.user.id).values('requester_id')
+        rows = (
+            Friendship.objects
+            .filter(user_id__in=self.friend_ids())
+            .exclude(friend_id=self.user.id)
+            .exclude(friend_id__in=self.friend_ids())
+            .exclude(friend_id__in=requested)
+            .exclude(friend_id__in=received)
+            .values('friend_id')
+            .annotate(mutual=Count('user_id'))
+            .order_by('-mutual', 'friend_id')[:limit]
+        )
+        return [(row['friend_id'], row['mutual']) for row in rows]
+
+    @staticmethod
+    def rebuild(chunk_size: int = 5000) -> int:
+        """Пересобирает таблицу смежности из принятых заявок. Возвращает число дружб."""
+        pairs = FriendRelation.objects.filter(status=FriendRelation.Status.ACCEPTED).values_list('requester_id', 'recipient_id')
+        total = 0
+        with transaction.atomic():
+            Friendship.objects.all().delete()
+            friendships = []
+            for requester_id, recipient_id in pairs.iterator(chunk_size=chunk_size):
+                friendships.append(Friendship(user_id=requester_id, friend_id=recipient_id))
+                friendships.append(Friendship(user_id=recipient_id, friend_id=requester_id))
+                total += 1
+                if len(friendships) >= chunk_size:
+                    Friendship.objects.bulk_create(friendships, ignore_conflicts=True)
+                    friendships = []
+            Friendship.objects.bulk_create(friendships, ignore_conflicts=True)
+        return total
@@ -0,0 +1,165 @@
+from collections import Counter
+from typing import Iterable
+
+from django.db import connection, transaction
+from django.db.models import Q, Sum
+
+from core.accounts.models import User, FriendRelation, LeaderboardBucket, LeaderboardEntry, UserProfile, UserStreak
+
+Board = LeaderboardEntry.Board
+
+
+class Leaderboard:
+    """
+    Рейтинг пользователей по XP, максимальной серии и монетам.
+
+    Очки лежат в LeaderboardEntry и обновляются при каждом сохранении профиля
+    или серии, поэтому топ читается по индексу (board, -score, user), а не
+    сортировкой всей таблицы профилей. Для места в общем рейтинге ведётся
+    гистограмма LeaderboardBucket: первые 2**BUCKET_BITS очков — точные
+    корзины, дальше по 2**(BUCKET_BITS - 1) корзин на каждую степень двойки.
+    Место — сумма корзин выше плюс подсчёт записей внутри своей корзины,
+    а не подсчёт всех, кто выше.
+    """
+    BUCKET_BITS = 5
+    MAX_LIMIT = 100
+
+    SOURCES = {
+        Board.XP: (UserProfile, 'xp'),
+        Board.COINS: (UserProfile, 'balance'),
+        Board.STREAK: (UserStreak, 'max_streak'),
+    }
+
+    def __init__(self, board: str, user_ids: Iterable[int] | None = None) -> None:
+        if board not in Board.values:
+            raise ValueError(f"Invalid board: {board}")
+        self.board = board
+        self.user_ids = set(user_ids) if user_ids is not None else None
+
+    @classmethod
+    def for_friends(cls, board: str, user: User) -> 'Leaderboard':
+        return cls(board, user_ids=FriendRelation.get_friend_ids(user) | {user.id})
+
+    def get_queryset(self):
+        queryset = LeaderboardEntry.objects.filter(board=self.board)
+        if self.user_ids is not None:
+            queryset = queryset.filter(user_id__in=self.user_ids)
+        return queryset
+
+    @classmethod
+    def bucket(cls, score: int) -> int:
+        shift = max(score.bit_length() - cls.BUCKET_BITS, 0)
+        return (shift << (cls.BUCKET_BITS - 1)) + (score >> shift)
+
+    @classmethod
+    def bucket_max(cls, bucket: int) -> int:
+        """Наибольшее число очков, попадающее в корзину."""
+        if bucket < 1 << cls.BUCKET_BITS:
+            return bucket
+        shift = (bucket >> (cls.BUCKET_BITS - 1)) - 1
+        top = bucket - (shift << (cls.BUCKET_BITS - 1))
+        return ((top + 1) << shift) - 1
+
+    def top(self, limit: int = MAX_LIMIT) -> list[LeaderboardEntry]:
+        limit = max(1, min(limit, self.MAX_LIMIT))
+        entries = list(self.get_queryset().select_related('user').order_by('-score', 'user_id')[:limit])
+        for rank, entry in enumerate(entries, start=1):
+            entry.rank = rank
+        return entries
+
+    def rank_of(self, user_id: int) -> tuple[int, int] | None:
+        """Возвращает (место, очки) пользователя или None, если его нет в рейтинге."""
+        score = self.get_queryset().filter(user_id=user_id).values_list('score', flat=True).first()
+        if score is None:
+            return None
+        if self.user_ids is not None:
+            # Рейтинг друзей небольшой, гистограмма ведётся только для общего
+            ahead = self.get_queryset().filter(Q(score__gt=score) | Q(score=score, user_id__lt=user_id)).count()
+            return ahead + 1, score
+
+        bucket = self.bucket(score)
+        above = LeaderboardBucket.objects.filter(board=self.board, bucket__gt=bucket).aggregate(total=Sum('count'))['total']
+        # Диапазон по индексу в пределах корзины, второе условие отсекает равных с большим user_id
+        ahead = self.get_queryset().filter(
+            Q(score__gte=score, score__lte=self.bucket_max(bucket)) & (Q(score__gt=score) | Q(user_id__lt=user_id))
+        ).count()
+        return (above or 0) + ahead + 1, score
+
+    @classmethod
+    def submit(cls, user_id: int, scores: dict[str, int]) -> None:
+        """Записывает очки пользователя и переносит его между корзинами гистограммы."""
+        with transaction.atomic(savepoint=False):
+            old_scores = dict(
+                LeaderboardEntry.objects.select_for_update().filter(user_id=user_id, board__in=scores).values_list('board', 'score')
+            )
+            LeaderboardEntry.objects.bulk_create(
+                [LeaderboardEntry(board=board, user_id=user_id, score=score) for board, score in scores.items()],
+                update_conflicts=True,
+                unique_fields=['board', 'user'],
+                update_fields=['score'],
+            )
+            deltas = Counter()
+            for board, score in scores.items():
+                if board in old_scores:
+                    deltas[board, cls.bucket(old_scores[board])] -= 1
+                deltas[board, cls.bucket(score)] += 1
+            cls._add_to_buckets(deltas)
+
+    @classmethod
+    def remove(cls, user_id: int) -> None:
+        """Вычитает записи пользователя из гистограммы перед их удалением."""
+        with transaction.atomic(savepoint=False):
+            scores = LeaderboardEntry.objects.select_for_update().filter(user_id=user_id).values_list('board', 'score')
+            cls._add_to_buckets(Counter({(board, cls.bucket(score)): -1 for board, score in scores}))
+
+    @classmethod
+    def sync_instance(cls, instance: UserProfile | UserStreak, update_fields: Iterable[str] | None = None) -> None:
+        scores = {
+            board: getattr(instance, field)
+            for board, (model, field) in cls.SOURCES.items()
+            if isinstance(instance, model) and (update_fields is None or field in update_fields)
+        }
+        if scores:
+            cls.submit(instance.user_id, scores)
+
+    @classmethod
+    def rebuild(cls, board: str, chunk_size: int = 5000) -> int:
+        model, field = cls.SOURCES[board]
+        total = 0
+        buckets = Counter()
+        with transaction.atomic():
+            LeaderboardEntry.objects.filter(board=board).delete()
+            LeaderboardBucket.objects.filter(board=board).delete()
+            batch = []
+            rows = model.objects.order_by().values_list('user_id', field).iterator(chunk_size=chunk_size)
+            for user_id, score in rows:
+                buckets[cls.bucket(score)] += 1
+                batch.append(LeaderboardEntry(board=board, user_id=user_id, score=score))
+                if len(batch) >= chunk_size:
+                    LeaderboardEntry.objects.bulk_create(batch)
+                    total += len(batch)
+                    batch = []
+            LeaderboardEntry.objects.bulk_create(batch)
+            total += len(batch)
+            LeaderboardBucket.objects.bulk_create([
+                LeaderboardBucket(board=board, bucket=bucket, count=count) for bucket, count in buckets.items()
+            ])
+        return total
+
+    @staticmethod
+    def _add_to_buckets(deltas: Counter) -> None:
+        """Прибавляет дельты к корзинам одним INSERT ... ON CONFLICT DO UPDATE, создавая недостающие."""
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        qn = connection.ops.quote_name
+        table = qn(LeaderboardBucket._meta.db_table)
+        values = ', '.join(['(%s, %s, %s)'] * len(deltas))
+        params = [value for (board, bucket), delta in deltas.items() for value in (board, bucket, delta)]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} ({qn("board")}, {qn("bucket")}, {qn("count")}) VALUES {values} '
+                f'ON CONFLICT ({qn("board")}, {qn("bucket")}) '
+                f'DO UPDATE SET {qn("count")} = {table}.{qn("count")} + excluded.{qn("count")}',
+                params,
+            )
@@ -0,0 +1,91 @@
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import F, Sum
+
+from core.accounts.leaderboard import Board, Leaderboard
+from core.accounts.models import User, LedgerEntry, UserProfile
+
+Currency = LedgerEntry.Currency
+
+
+class Ledger:
+    """
+    Журнал движения монет, кристаллов и XP.
+
+    Баланс в UserProfile меняется одним условным UPDATE через F(), поэтому
+    параллельные начисления не затирают друг друга, а списание не уводит
+    баланс в минус. Каждое изменение дописывается в LedgerEntry в той же транзакции.
+    """
+    FIELDS = {
+        Currency.COINS: 'balance',
+        Currency.CRYSTALS: 'donation_balance',
+        Currency.XP: 'xp',
+    }
+
+    def __init__(self, user: User) -> None:
+        self.user = user
+
+    def apply(self, deltas: dict[str, int], reason: str) -> bool:
+        """
+        Применяет изменения вида {'coins': -100, 'xp': 10}.
+        Возвращает False, если для списания не хватает средств.
+        """
+        deltas = {currency: amount for currency, amount in deltas.items() if amount}
+        if not deltas:
+            return True
+
+        updates = {self.FIELDS[currency]: F(self.FIELDS[currency]) + amount for currency, amount in deltas.items()}
+        conditions = {
+            f'{self.FIELDS[currency]}__gte': -amount
+            for currency, amount in deltas.items() if amount < 0
+        }
+
+        # Без точки сохранения: внутри внешней транзакции (награды, покупки)
+        # частичный откат не нужен, а SAVEPOINT стоит двух лишних запросов
+        with transaction.atomic(savepoint=False):
+            updated = UserProfile.objects.filter(user_id=self.user.id, **conditions).update(**updates)
+            if not updated:
+                return False
+            LedgerEntry.objects.bulk_create([
+                LedgerEntry(user_id=self.user.id, currency=currency, amount=amount, reason=reason)
+                for currency, amount in deltas.items()
+            ])
+            self._sync_balances()
+        return True
+
+    def credit(self, reason: str, **amounts: int) -> None:
+        self.apply(amounts, reason)
+
+    def debit(self, reason: str, **amounts: int) -> bool:
+        return self.apply({currency: -amount for currency, amount in amounts.items()}, reason)
+
+    def _sync_balances(self) -> None:
+        balances = UserProfile.objects.filter(user_id=self.user.id).values('xp', 'balance', 'donation_balance').get()
+        profile = self.user._state.fields_cache.get('profile')
+        if profile is not None:
+            for field, value in balances.items():
+                setattr(profile, field, value)
+        Leaderboard.submit(self.user.id, {Board.XP: balances['xp'], Board.COINS: balances['balance']})
+
+    @staticmethod
+    def compact(before: datetime) -> int:
+        """
+        Сворачивает записи старше before в одну запись-снимок на пользователя и валюту.
+        Возвращает количество удалённых записей.
+        """
+        with transaction.atomic():
+            old_entries = LedgerEntry.objects.filter(created_at__lt=before)
+            totals = list(old_entries.values('user_id', 'currency').annotate(total=Sum('amount')).order_by())
+            deleted, _ = old_entries.delete()
+            LedgerEntry.objects.bulk_create([
+                LedgerEntry(
+                    user_id=row['user_id'],
+                    currency=row['currency'],
+                    amount=row['total'],
+                    reason='snapshot',
+                    is_snapshot=True,
+                )
+                for row in totals if row['total']
+            ])
+        return deleted
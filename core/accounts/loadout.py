@@ -0,0 +1,68 @@
+from dataclasses import dataclass
+from typing import Iterable
+
+from django.templatetags.static import static
+
+from core.accounts.models import UserInventory
+
+
+DEFAULT_AVATAR = 'shop_items/avatars/default.png'
+DEFAULT_BACKGROUND = 'shop_items/backgrounds/default.png'
+
+
+@dataclass(frozen=True)
+class Loadout:
+    """Equipped cosmetic items of a single user, one per slot."""
+    avatar: object = None
+    background: object = None
+    icon: object = None
+
+    @property
+    def avatar_url(self) -> str:
+        if self.avatar:
+            return self.avatar.image.url
+        return static(DEFAULT_AVATAR)
+
+    @property
+    def background_url(self) -> str:
+        if self.background:
+            return self.background.image.url
+        return static(DEFAULT_BACKGROUND)
+
+    @property
+    def icon_data(self) -> dict[str, str] | None:
+        if self.icon:
+            return {
+                'name': self.icon.name,
+                'description': self.icon.description,
+            }
+        return None
+
+
+class LoadoutResolver:
+    """
+    Загружает экипированные предметы (аватар, фон, иконка) одним запросом
+    как для одного пользователя, так и для целого списка.
+    """
+    SLOTS = ('avatar', 'background', 'icon')
+
+    @classmethod
+    def for_user(cls, user_id: int) -> Loadout:
+        return cls.for_users([user_id])[user_id]
+
+    @classmethod
+    def for_users(cls, user_ids: Iterable[int]) -> dict[int, Loadout]:
+        slots = {user_id: {} for user_id in user_ids}
+        if not slots:
+            return {}
+
+        equipped = UserInventory.objects.filter(
+            user_id__in=slots.keys(),
+            is_equipped=True,
+            item__type__in=cls.SLOTS,
+        ).select_related('item').order_by('id')
+
+        for inventory in equipped:
+            slots[inventory.user_id].setdefault(inventory.item.type, inventory.item)
+
+        return {user_id: Loadout(**items) for user_id, items in slots.items()}
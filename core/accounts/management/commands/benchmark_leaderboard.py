@@ -0,0 +1,61 @@
+import random
+import time
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.accounts.leaderboard import Board, Leaderboard
+from core.accounts.models import LeaderboardEntry
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Замеряет скорость чтения топа и места пользователя на синтетических данных (всё откатывается)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', type=int, default=1_000_000)
+        parser.add_argument('--queries', type=int, default=1000)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        profiles, queries = options['profiles'], options['queries']
+        with transaction.atomic():
+            user_ids = self._populate(profiles, options['batch_size'])
+            leaderboard = Leaderboard(Board.XP)
+
+            self._measure('top 100', queries, lambda: leaderboard.top(100))
+            self._measure('rank_of', queries, lambda: leaderboard.rank_of(random.choice(user_ids)))
+            self._measure('submit', queries, lambda: Leaderboard.submit(
+                random.choice(user_ids), {Board.XP: random.randint(0, 100_000)}
+            ))
+            transaction.set_rollback(True)
+
+    def _populate(self, profiles, batch_size):
+        started = time.perf_counter()
+        user_ids = []
+        buckets = Counter()
+        for offset in range(0, profiles, batch_size):
+            size = min(batch_size, profiles - offset)
+            users = User.objects.bulk_create(
+                [User(username=f'leaderboard_bench_{offset + i}') for i in range(size)]
+            )
+            entries = [
+                LeaderboardEntry(board=Board.XP, user_id=user.id, score=random.randint(0, 100_000))
+                for user in users
+            ]
+            LeaderboardEntry.objects.bulk_create(entries)
+            buckets.update(Leaderboard.bucket(entry.score) for entry in entries)
+            user_ids.extend(user.id for user in users)
+        Leaderboard._add_to_buckets(Counter({(Board.XP, bucket): count for bucket, count in buckets.items()}))
+        self.stdout.write(f'populated {profiles} profiles in {time.perf_counter() - started:.1f}s')
+        return user_ids
+
+    def _measure(self, name, queries, func):
+        started = time.perf_counter()
+        for _ in range(queries):
+            func()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{name}: {elapsed / queries * 1000:.3f} ms/op ({queries / elapsed:.0f} ops/s)')
@@ -0,0 +1,56 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.accounts.models import RouletteReward, UserDailyRoulette, UserProfile
+from core.accounts.roulette import DailyRoulette
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Замеряет скорость прокруток рулетки в момент ежедневного сброса на синтетических данных (всё откатывается)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            users = self._populate(options['users'], options['batch_size'])
+            RouletteReward.objects.create(roulette=DailyRoulette.KEY, name='bench', type='coins', amount=1, weight=1)
+            roulette = DailyRoulette()
+
+            self._measure('spin (eligible)', users, roulette.spin)
+            self._measure('spin (already spun)', users, lambda user: self._rejected(roulette, user))
+            transaction.set_rollback(True)
+
+    def _populate(self, count, batch_size):
+        started = time.perf_counter()
+        last_spin = timezone.now() - DailyRoulette.COOLDOWN
+        users = []
+        for offset in range(0, count, batch_size):
+            size = min(batch_size, count - offset)
+            batch = User.objects.bulk_create([User(username=f'roulette_bench_{offset + i}') for i in range(size)])
+            UserProfile.objects.bulk_create([UserProfile(user=user) for user in batch])
+            UserDailyRoulette.objects.bulk_create([UserDailyRoulette(user=user, last_spin=last_spin) for user in batch])
+            users.extend(batch)
+        self.stdout.write(f'populated {count} users in {time.perf_counter() - started:.1f}s')
+        return users
+
+    @staticmethod
+    def _rejected(roulette, user):
+        try:
+            roulette.spin(user)
+        except ValueError:
+            return
+
+    def _measure(self, name, users, func):
+        started = time.perf_counter()
+        for user in users:
+            func(user)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{name}: {elapsed / len(users) * 1000:.3f} ms/op ({len(users) / elapsed:.0f} ops/s)')
@@ -0,0 +1,48 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.accounts.models import UserStreak
+from core.accounts.services import UserStreakService
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Замеряет ночной сброс серий на синтетических данных (всё откатывается)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--lapsed', type=float, default=0.3, help='Доля прерванных серий')
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        rows, batch_size = options['rows'], options['batch_size']
+        now = timezone.now()
+        with transaction.atomic():
+            started = time.perf_counter()
+            for offset in range(0, rows, batch_size):
+                size = min(batch_size, rows - offset)
+                users = User.objects.bulk_create(
+                    [User(username=f'streak_bench_{offset + i}') for i in range(size)]
+                )
+                UserStreak.objects.bulk_create([
+                    UserStreak(
+                        user_id=user.id,
+                        current_streak=random.randint(1, 100),
+                        last_active=now - timezone.timedelta(
+                            days=random.randint(2, 30) if random.random() < options['lapsed'] else 0
+                        ),
+                    )
+                    for user in users
+                ])
+            self.stdout.write(f'populated {rows} streaks in {time.perf_counter() - started:.1f}s')
+
+            started = time.perf_counter()
+            reset = UserStreakService.reset_lapsed_streaks(now)
+            self.stdout.write(f'rollover: reset {reset} streaks in {time.perf_counter() - started:.3f}s')
+            transaction.set_rollback(True)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.accounts.ledger import Ledger
+
+
+class Command(BaseCommand):
+    help = 'Сворачивает старые записи журнала начислений в снимки баланса'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90, help='Сворачивать записи старше указанного числа дней')
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timezone.timedelta(days=options['days'])
+        deleted = Ledger.compact(before)
+        self.stdout.write(self.style.SUCCESS(f'Compacted {deleted} ledger entries'))
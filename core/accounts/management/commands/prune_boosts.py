@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.accounts.boosts import ActiveBoosts
+
+
+class Command(BaseCommand):
+    help = 'Удаляет истёкшие бусты пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=0, help='Удалять бусты, истёкшие больше указанного числа дней назад')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timezone.timedelta(days=options['days'])
+        deleted = ActiveBoosts.prune(before, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Pruned {deleted} expired boosts'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.accounts.feed import ActivityFeed
+
+
+class Command(BaseCommand):
+    help = 'Обрезает ленты активности друзей и удаляет устаревшие активности'
+
+    def handle(self, *args, **options):
+        deleted = ActivityFeed.prune()
+        self.stdout.write(self.style.SUCCESS(f'Pruned {deleted} feed rows'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.accounts.friends import FriendGraph
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает таблицу смежности друзей из принятых заявок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        total = FriendGraph.rebuild(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'{total} friendships'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.accounts.leaderboard import Board, Leaderboard
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает рейтинги из профилей и серий пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--board', choices=Board.values, help='Пересобрать только один рейтинг')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        boards = [options['board']] if options['board'] else Board.values
+        for board in boards:
+            total = Leaderboard.rebuild(board, chunk_size=options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(f'{board}: {total} entries'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.accounts.services import UserStreakService
+
+
+class Command(BaseCommand):
+    help = 'Обнуляет прерванные серии. Запускать по cron раз в сутки сразу после полуночи (TIME_ZONE проекта)'
+
+    def handle(self, *args, **options):
+        reset = UserStreakService.reset_lapsed_streaks()
+        self.stdout.write(self.style.SUCCESS(f'Reset {reset} streaks'))
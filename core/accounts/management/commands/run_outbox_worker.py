@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.accounts.outbox import Outbox
+
+
+class Command(BaseCommand):
+    help = 'Обрабатывает очередь побочных эффектов (статистика, серии, достижения)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--sleep', type=float, default=1.0, help='Пауза в секундах, когда очередь пуста')
+        parser.add_argument('--once', action='store_true', help='Разобрать очередь и завершиться')
+        parser.add_argument('--status', action='store_true', help='Показать отставание воркера и завершиться')
+
+    def handle(self, *args, **options):
+        if options['status']:
+            self._write_lag()
+            return
+
+        while True:
+            processed = Outbox.process_batch(options['batch_size'])
+            if processed:
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'processed {processed} events')
+                    self._write_lag()
+                continue
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
+
+    def _write_lag(self):
+        lag = Outbox.lag()
+        self.stdout.write(
+            f"pending: {lag['pending']}, failed: {lag['failed']}, lag: {lag['lag_seconds']:.1f}s"
+        )
@@ -0,0 +1,36 @@
+import random
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.accounts.roulette import RewardTables
+
+
+class Command(BaseCommand):
+    help = 'Симулирует прокрутки рулетки: сравнивает выпадение наград с весами и замеряет скорость выбора'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--roulette', default='daily')
+        parser.add_argument('--spins', type=int, default=1_000_000)
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        try:
+            sampler = RewardTables.get(options['roulette'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        spins = options['spins']
+        rng = random.Random(options['seed'])
+
+        started = time.perf_counter()
+        counts = Counter(sampler.sample(rng).id for _ in range(spins))
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(f'{spins} spins in {elapsed:.2f}s ({spins / elapsed:,.0f} spins/s)')
+        self.stdout.write(f'{"reward":<30} {"expected":>10} {"observed":>10}')
+        for reward in sampler.rewards:
+            expected = sampler.probability(reward)
+            observed = counts[reward.id] / spins
+            self.stdout.write(f'{reward.name:<30} {expected:>10.5f} {observed:>10.5f}')
@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-18 09:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_userdailyroulette'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('xp', 'Xp'), ('streak', 'Streak'), ('coins', 'Coins')], max_length=20)),
+                ('score', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Позиция в рейтинге',
+                'verbose_name_plural': 'Позиции в рейтинге',
+                'indexes': [models.Index(fields=['board', '-score', 'user'], name='leaderboard_rank_idx')],
+                'unique_together': {('board', 'user')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 09:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_leaderboardentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(choices=[('coins', 'Coins'), ('crystals', 'Crystals'), ('xp', 'Xp')], max_length=20)),
+                ('amount', models.IntegerField()),
+                ('reason', models.CharField(max_length=50)),
+                ('is_snapshot', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Запись журнала начислений',
+                'verbose_name_plural': 'Журнал начислений',
+                'indexes': [models.Index(fields=['user', 'currency', 'created_at'], name='ledger_user_currency_idx'), models.Index(fields=['created_at'], name='ledger_created_at_idx')],
+            },
+        ),
+    ]
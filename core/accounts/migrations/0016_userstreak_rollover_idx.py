@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 09:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_outboxevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userstreak',
+            index=models.Index(condition=models.Q(('current_streak__gt', 0)), fields=['last_active'], name='streak_rollover_idx'),
+        ),
+    ]
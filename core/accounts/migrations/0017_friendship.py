@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-18 09:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_friendships(apps, schema_editor):
+    FriendRelation = apps.get_model('accounts', 'FriendRelation')
+    Friendship = apps.get_model('accounts', 'Friendship')
+
+    pairs = FriendRelation.objects.filter(status='accepted').values_list('requester_id', 'recipient_id')
+    Friendship.objects.bulk_create([
+        Friendship(user_id=user_id, friend_id=friend_id)
+        for requester_id, recipient_id in pairs.iterator()
+        for user_id, friend_id in ((requester_id, recipient_id), (recipient_id, requester_id))
+    ], batch_size=5000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0016_userstreak_rollover_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Friendship',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('friend', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='friendships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Дружба',
+                'verbose_name_plural': 'Дружба',
+                'indexes': [models.Index(fields=['friend', 'user'], name='friendship_friend_user_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'friend'), name='friendship_user_friend_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_friendships, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-18 09:59
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0018_activity_feed'),
+        ('shop', '0004_baseshopitem_is_donation_only'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RouletteReward',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('roulette', models.CharField(default='daily', help_text='Ключ рулетки, например daily', max_length=30)),
+                ('name', models.CharField(max_length=100)),
+                ('type', models.CharField(choices=[('coins', 'Coins'), ('item', 'Item')], max_length=20)),
+                ('amount', models.PositiveIntegerField(default=0)),
+                ('weight', models.FloatField(validators=[django.core.validators.MinValueValidator(0)])),
+                ('is_active', models.BooleanField(default=True)),
+                ('item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='shop.baseshopitem')),
+            ],
+            options={
+                'verbose_name': 'Награда рулетки',
+                'verbose_name_plural': 'Награды рулетки',
+                'ordering': ['roulette', 'id'],
+            },
+        ),
+    ]
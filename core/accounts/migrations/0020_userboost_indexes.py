@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-18 10:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0019_roulettereward'),
+        ('shop', '0006_shoporder'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userboost',
+            index=models.Index(fields=['user', 'expires_at'], name='userboost_user_expires_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userboost',
+            index=models.Index(fields=['expires_at'], name='userboost_expires_idx'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2 on 2026-10-18 10:59
+
+from collections import Counter
+
+from django.db import migrations, models
+
+# Значения Leaderboard на момент миграции
+BUCKET_BITS = 5
+SOURCES = {
+    'xp': ('UserProfile', 'xp'),
+    'coins': ('UserProfile', 'balance'),
+    'streak': ('UserStreak', 'max_streak'),
+}
+
+
+def bucket_of(score):
+    shift = max(score.bit_length() - BUCKET_BITS, 0)
+    return (shift << (BUCKET_BITS - 1)) + (score >> shift)
+
+
+def backfill_leaderboards(apps, schema_editor):
+    LeaderboardEntry = apps.get_model('accounts', 'LeaderboardEntry')
+    LeaderboardBucket = apps.get_model('accounts', 'LeaderboardBucket')
+
+    for board, (model_name, field) in SOURCES.items():
+        model = apps.get_model('accounts', model_name)
+        # Пользователи, созданные до появления рейтингов, получают свои записи
+        rows = model.objects.order_by().values_list('user_id', field).iterator(chunk_size=5000)
+        batch = []
+        for user_id, score in rows:
+            batch.append(LeaderboardEntry(board=board, user_id=user_id, score=score))
+            if len(batch) >= 5000:
+                LeaderboardEntry.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        LeaderboardEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+        buckets = Counter(
+            bucket_of(score)
+            for score in LeaderboardEntry.objects.filter(board=board).values_list('score', flat=True).iterator(chunk_size=5000)
+        )
+        LeaderboardBucket.objects.filter(board=board).delete()
+        LeaderboardBucket.objects.bulk_create([
+            LeaderboardBucket(board=board, bucket=bucket, count=count) for bucket, count in buckets.items()
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0020_userboost_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('xp', 'Xp'), ('streak', 'Streak'), ('coins', 'Coins')], max_length=20)),
+                ('bucket', models.PositiveIntegerField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Корзина рейтинга',
+                'verbose_name_plural': 'Корзины рейтинга',
+                'constraints': [models.UniqueConstraint(fields=('board', 'bucket'), name='leaderboard_bucket_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_leaderboards, migrations.RunPython.noop),
+    ]
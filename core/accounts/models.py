@@ -7,6 +7,8 @@ from django.shortcuts import get_object_or_404
 from django.db import transaction
 from django.db.models import Q
 from django.urls import reverse
+from django.utils.functional import cached_property
+from django.core.validators import MinValueValidator
 
 from core.accounts.validators import validate_trade_offer
 
@@ -27,13 +29,14 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"Profile of {self.user.username}"
 
+    @cached_property
+    def loadout(self):
+        from .loadout import LoadoutResolver
+        return LoadoutResolver.for_user(self.user_id)
+
     @property
     def avatar(self):
-        avatar = self.get_active_items().filter(item__type='avatar').first()
-        if avatar:
-            return avatar.item.image.url
-        from django.templatetags.static import static
-        return static('shop_items/avatars/default.png')
+        return self.loadout.avatar_url
 
     @property
     def level(self):
@@ -42,21 +45,11 @@ class UserProfile(models.Model):
 
     @property
     def background(self):
-        background = self.get_active_items().filter(item__type='background').first()
-        if background:
-            return background.item.image.url
-        from django.templatetags.static import static
-        return static('shop_items/backgrounds/default.png')
+        return self.loadout.background_url
 
     @property
     def icon(self) -> dict[str, str] | None:
-        icon = self.get_active_items().filter(item__type='icon').first()
-        if icon:
-            return {
-                'name': icon.item.name,
-                'description': icon.item.description,
-            }
-        return None
+        return self.loadout.icon_data
 
     def get_inventory(self):
         return UserInventory.objects.filter(user=self.user)
@@ -83,6 +76,12 @@ class UserBoost(models.Model):
     boost = models.ForeignKey('shop.BoostItem', on_delete=models.CASCADE)
     expires_at = models.DateTimeField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'expires_at'], name='userboost_user_expires_idx'),
+            models.Index(fields=['expires_at'], name='userboost_expires_idx'),
+        ]
+
     def is_active(self):
         return timezone.now() < self.expires_at
 
@@ -92,6 +91,11 @@ class UserStreak(models.Model):
     max_streak = models.PositiveIntegerField(default=0)
     last_active = models.DateTimeField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_active'], condition=Q(current_streak__gt=0), name='streak_rollover_idx'),
+        ]
+
     def __str__(self):
         return f'{self.user.username} | Current streak: {self.current_streak} | Max streak: {self.max_streak}'
 
@@ -190,47 +194,9 @@ class Trade(models.Model):
         if self.status != self.Status.PENDING:
             raise ValidationError("Trade is not in pending state")
 
-        with transaction.atomic():      
-            if 'coins' in self.requester_offer:
-                if self.requester.profile.balance < self.requester_offer['coins']:
-                    raise ValidationError("Requester doesn't have enough coins")
-                self.requester.profile.balance -= self.requester_offer['coins']
-                self.recipient.profile.balance += self.requester_offer['coins']
-            
-            if 'coins' in self.recipient_offer:
-                if self.recipient.profile.balance < self.recipient_offer['coins']:
-                    raise ValidationError("Recipient doesn't have enough coins")
-                self.recipient.profile.balance -= self.recipient_offer['coins']
-                self.requester.profile.balance += self.recipient_offer['coins']
-
-            if 'items_ids' in self.requester_offer:
-                items_to_recipient = []
-                for item_id in self.requester_offer['items_ids']:
-                    item = UserInventory.objects.get(id=item_id, user=self.requester)
-                    items_to_recipient.append(item)
-                    item.delete()
-                
-                for item in items_to_recipient:
-                    item.user = self.recipient
-                    item.save()
-
-            if 'items_ids' in self.recipient_offer:
-                items_to_requester = []
-                for item_id in self.recipient_offer['items_ids']:
-                    item = UserInventory.objects.get(id=item_id, user=self.recipient)
-                    items_to_requester.append(item)
-                    item.delete()
-                
-                for item in items_to_requester:
-                    item.user = self.requester
-                    item.save()
-
-            self.requester.profile.save()
-            self.recipient.profile.save()
-            
-            # Update trade status
-            self.status = self.Status.ACCEPTED
-            self.save()
+        from core.accounts.trading import TradeTransfer
+
+        TradeTransfer(self).execute()
     
     def reject_trade(self):
         if self.status != self.Status.PENDING:
@@ -267,9 +233,13 @@ class FriendRelation(models.Model):
             friends = cls.objects.filter(
                 Q(requester=user) | Q(recipient=user),
                 status=status
-            )
+            ).select_related('requester__profile', 'recipient__profile')
             return [friend.requester if friend.requester != user else friend.recipient for friend in friends]
 
+    @classmethod
+    def get_friend_ids(cls, user: User) -> set[int]:
+        return set(Friendship.objects.filter(user=user).values_list('friend_id', flat=True))
+
     def accept_friend_request(self, user: User):
         if user != self.requester and user != self.recipient:
             raise ValidationError("User is not the requester or recipient of the friend request")
@@ -277,8 +247,10 @@ class FriendRelation(models.Model):
             raise ValidationError("User is not the recipient of the friend request")
         if self.status != self.Status.PENDING:
             raise ValidationError("Friend request is not in pending state")
-        self.status = self.Status.ACCEPTED
-        self.save()
+
+        with transaction.atomic():
+            self.status = self.Status.ACCEPTED
+            self.save()
 
     def reject_friend_request(self, user: User):
         if user != self.requester and user != self.recipient:
@@ -287,8 +259,10 @@ class FriendRelation(models.Model):
             raise ValidationError("Friend request is not in pending state")
         if user != self.requester:
             raise ValidationError("User is not the requester of the friend request")
-        self.status = self.Status.REJECTED
-        self.save()
+
+        with transaction.atomic():
+            self.status = self.Status.REJECTED
+            self.save()
 
     @classmethod
     def get_pending_friend_requests(cls, user: User, as_requester: bool = False):
@@ -321,6 +295,199 @@ class FriendRelation(models.Model):
     def __str__(self):
         return f"Friend request {self.id}: {self.requester.username} <-> {self.recipient.username} ({self.status})"
 
+class Friendship(models.Model):
+    """Список смежности графа друзей: по одной записи на каждое направление дружбы."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='friendships')
+    friend = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Дружба'
+        verbose_name_plural = 'Дружба'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'friend'], name='friendship_user_friend_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['friend', 'user'], name='friendship_friend_user_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.friend_id}'
+
 class UserDailyRoulette(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='daily_roulette')
-    last_spin = models.DateTimeField(null=True, blank=True)
\ No newline at end of file
+    last_spin = models.DateTimeField(null=True, blank=True)
+
+
+class RouletteReward(models.Model):
+    class Type(models.TextChoices):
+        COINS = 'coins'
+        ITEM = 'item'
+
+    roulette = models.CharField(max_length=30, default='daily', help_text='Ключ рулетки, например daily')
+    name = models.CharField(max_length=100)
+    type = models.CharField(max_length=20, choices=Type.choices)
+    amount = models.PositiveIntegerField(default=0)
+    item = models.ForeignKey('shop.BaseShopItem', on_delete=models.CASCADE, null=True, blank=True)
+    weight = models.FloatField(validators=[MinValueValidator(0)])
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        verbose_name = 'Награда рулетки'
+        verbose_name_plural = 'Награды рулетки'
+        ordering = ['roulette', 'id']
+
+    def clean(self):
+        if self.type == self.Type.ITEM and not self.item_id:
+            raise ValidationError("Item reward must reference an item")
+        if self.type == self.Type.COINS and not self.amount:
+            raise ValidationError("Coins reward must have an amount")
+
+    def __str__(self):
+        return f'{self.roulette} | {self.name} ({self.weight})'
+
+
+class LeaderboardEntry(models.Model):
+    class Board(models.TextChoices):
+        XP = 'xp'
+        STREAK = 'streak'
+        COINS = 'coins'
+
+    board = models.CharField(max_length=20, choices=Board.choices)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    score = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Позиция в рейтинге'
+        verbose_name_plural = 'Позиции в рейтинге'
+        unique_together = ('board', 'user')
+        indexes = [
+            models.Index(fields=['board', '-score', 'user'], name='leaderboard_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.board} | {self.user_id}: {self.score}'
+
+
+class LeaderboardBucket(models.Model):
+    """Гистограмма рейтинга: сколько записей доски попадает в корзину очков (см. Leaderboard.bucket)."""
+    board = models.CharField(max_length=20, choices=LeaderboardEntry.Board.choices)
+    bucket = models.PositiveIntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Корзина рейтинга'
+        verbose_name_plural = 'Корзины рейтинга'
+        constraints = [
+            models.UniqueConstraint(fields=['board', 'bucket'], name='leaderboard_bucket_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.board} | {self.bucket}: {self.count}'
+
+
+class LedgerEntry(models.Model):
+    class Currency(models.TextChoices):
+        COINS = 'coins'
+        CRYSTALS = 'crystals'
+        XP = 'xp'
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ledger_entries')
+    currency = models.CharField(max_length=20, choices=Currency.choices)
+    amount = models.IntegerField()
+    reason = models.CharField(max_length=50)
+    is_snapshot = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Запись журнала начислений'
+        verbose_name_plural = 'Журнал начислений'
+        indexes = [
+            models.Index(fields=['user', 'currency', 'created_at'], name='ledger_user_currency_idx'),
+            models.Index(fields=['created_at'], name='ledger_created_at_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} | {self.currency} {self.amount:+} ({self.reason})'
+
+
+class OutboxEvent(models.Model):
+    class Kind(models.TextChoices):
+        TASK_COMPLETED = 'task_completed'
+        HABIT_COMPLETED = 'habit_completed'
+        ITEM_BOUGHT = 'item_bought'
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='outbox_events')
+    kind = models.CharField(max_length=50, choices=Kind.choices)
+    payload = models.JSONField(default=dict, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Событие очереди'
+        verbose_name_plural = 'События очереди'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['attempts', 'id'], name='outbox_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} | {self.user_id} ({self.created_at})'
+
+
+class Activity(models.Model):
+    class Verb(models.TextChoices):
+        TASK_COMPLETED = 'task_completed'
+        DREAM_ACHIEVED = 'dream_achieved'
+        ACHIEVEMENT_UNLOCKED = 'achievement_unlocked'
+        ITEM_EQUIPPED = 'item_equipped'
+
+    actor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activities')
+    verb = models.CharField(max_length=30, choices=Verb.choices)
+    payload = models.JSONField(default=dict, blank=True)
+    fanned_out = models.BooleanField(default=True, help_text='False — событие читается из ленты автора (fan-out on read)')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Активность'
+        verbose_name_plural = 'Активности'
+        indexes = [
+            models.Index(fields=['actor', '-id'], condition=Q(fanned_out=False), name='activity_fanout_read_idx'),
+            models.Index(fields=['created_at'], name='activity_created_at_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.actor_id} {self.verb} ({self.created_at})'
+
+
+class TimelineEntry(models.Model):
+    """Запись ленты друзей: активность, разосланная владельцу ленты при записи."""
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline')
+    activity = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'activity'], name='timeline_owner_activity_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['owner', '-activity'], name='timeline_owner_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.owner_id}: {self.activity_id}'
+
+
+class CacheVersion(models.Model):
+    """Версия данных, которые процессы кэшируют у себя (см. SharedVersion)."""
+    key = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Версия кэша'
+        verbose_name_plural = 'Версии кэша'
+
+    def __str__(self):
+        return f'{self.key}: {self.version}'
@@ -0,0 +1,110 @@
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.accounts.feed import ActivityFeed
+from core.accounts.models import User, Activity, OutboxEvent, UserInventory
+from core.accounts.progress import UserActionProgressService
+from core.accounts.services import AchievementService, UserStreakService
+
+logger = logging.getLogger(__name__)
+
+Kind = OutboxEvent.Kind
+
+
+def handle_task_completed(user: User, events: list[OutboxEvent]) -> None:
+    from core.dream.models import Dream
+    from core.dream.trending import DreamTrending
+
+    UserStreakService(user).increase_streak()
+    UserActionProgressService(user).update_stat('tasks_completed', len(events), trigger='task_completed')
+
+    dream_ids = {event.payload['dream_id'] for event in events if event.payload.get('dream_id')}
+    # Шаги приватных мечт не попадают в ленту друзей, как и достижение самой мечты
+    private_ids = set(Dream.objects.filter(id__in=dream_ids, is_private=True).values_list('id', flat=True)) if dream_ids else set()
+    ActivityFeed(user).publish_many(Activity.Verb.TASK_COMPLETED, [
+        event.payload for event in events if event.payload.get('dream_id') not in private_ids
+    ])
+    if dream_ids:
+        DreamTrending.refresh(dream_ids)
+
+
+def handle_habit_completed(user: User, events: list[OutboxEvent]) -> None:
+    UserActionProgressService(user).update_stat('habits_completed', len(events))
+
+
+def handle_item_bought(user: User, events: list[OutboxEvent]) -> None:
+    # Одно событие на заказ; события до корзины несут один item_id
+    items_bought = sum(len(event.payload.get('items_ids', [event.payload.get('item_id')])) for event in events)
+    UserActionProgressService(user).update_stat('items_bought', items_bought, trigger='item_bought')
+    total_purchases = UserInventory.objects.filter(user=user).count()
+    AchievementService(user).check_achievements('total_purchases', {'total_purchases': total_purchases})
+
+
+class Outbox:
+    """
+    Очередь побочных эффектов (статистика, серии, достижения) после действий пользователя.
+
+    События пишутся в OutboxEvent в той же транзакции, что и основное действие,
+    а воркер (manage.py run_outbox_worker) забирает их пачками, схлопывает
+    одинаковые события одного пользователя и применяет обработчик один раз.
+    """
+    HANDLERS = {
+        Kind.TASK_COMPLETED: handle_task_completed,
+        Kind.HABIT_COMPLETED: handle_habit_completed,
+        Kind.ITEM_BOUGHT: handle_item_bought,
+    }
+    MAX_ATTEMPTS = 5
+
+    @staticmethod
+    def publish(user: User, kind: str, payload: dict | None = None) -> OutboxEvent:
+        return OutboxEvent.objects.create(user=user, kind=kind, payload=payload or {})
+
+    @staticmethod
+    def publish_many(user: User, kind: str, payloads: list[dict]) -> list[OutboxEvent]:
+        return OutboxEvent.objects.bulk_create([OutboxEvent(user=user, kind=kind, payload=payload) for payload in payloads])
+
+    @classmethod
+    def pending(cls):
+        return OutboxEvent.objects.filter(attempts__lt=cls.MAX_ATTEMPTS)
+
+    @classmethod
+    def process_batch(cls, batch_size: int = 500) -> int:
+        """Обрабатывает одну пачку событий и возвращает их количество."""
+        with transaction.atomic():
+            events = list(cls.pending().select_for_update(skip_locked=True).order_by('id')[:batch_size])
+            if not events:
+                return 0
+
+            groups = defaultdict(list)
+            for event in events:
+                groups[(event.user_id, event.kind)].append(event)
+
+            users = User.objects.select_related('profile', 'statistic', 'streak').in_bulk({event.user_id for event in events})
+            for (user_id, kind), group in groups.items():
+                cls._apply(users[user_id], kind, group)
+        return len(events)
+
+    @classmethod
+    def _apply(cls, user: User, kind: str, events: list[OutboxEvent]) -> None:
+        ids = [event.id for event in events]
+        try:
+            with transaction.atomic():
+                cls.HANDLERS[kind](user, events)
+                OutboxEvent.objects.filter(id__in=ids).delete()
+        except Exception as e:
+            logger.exception('Outbox handler %s failed for user %s', kind, user.id)
+            OutboxEvent.objects.filter(id__in=ids).update(attempts=F('attempts') + 1, last_error=str(e))
+
+    @classmethod
+    def lag(cls) -> dict:
+        pending = cls.pending()
+        oldest = pending.order_by('id').values_list('created_at', flat=True).first()
+        return {
+            'pending': pending.count(),
+            'failed': OutboxEvent.objects.filter(attempts__gte=cls.MAX_ATTEMPTS).count(),
+            'lag_seconds': (timezone.now() - oldest).total_seconds() if oldest else 0,
+        }
@@ -1,5 +1,8 @@
 
+from django.db.models import F
+
 from core.accounts.models import User
+from core.statistic.models import Statistic
 
 class UserActionProgressService:
     def __init__(self, user: User) -> None:
@@ -12,15 +15,13 @@ class UserActionProgressService:
         from core.accounts.services import AchievementService
         AchievementService(self.user).check_achievements(trigger, payload)
     
-    def update_stat(self, key, value=1, payload=None):
-        from core.accounts.services import AchievementService
+    def update_stat(self, key, value=1, payload=None, trigger=None):
         stat = self.user.statistic
-        new_value = getattr(stat, key) + value
-        setattr(stat, key, new_value)
-        stat.save(update_fields=[key])
+        Statistic.objects.filter(id=stat.id).update(**{key: F(key) + value})
+        stat.refresh_from_db(fields=[key])
 
-        payload = payload or {key: new_value}
-        AchievementService(self.user).check_achievements(key, payload)
+        payload = payload or {key: getattr(stat, key)}
+        self._check_achievements(trigger or key, payload)
 
     def update_streak(self):
         self._check_achievements('streak_updated', {'streak': self.user.streak.current_streak})
@@ -1,86 +1,173 @@
 import random
+from dataclasses import dataclass, replace
+from datetime import timedelta
 
-from typing import List
-
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
+from core.accounts.models import UserInventory, UserDailyRoulette, RouletteReward
+from core.accounts.ledger import Ledger
+from core.accounts.versions import SharedVersion
+
 User = get_user_model()
 
-import random
-from typing import List
-from django.db import transaction
-from core.accounts.models import UserInventory
-from core.shop.models import BaseShopItem
-from core.accounts.models import UserDailyRoulette
+
+@dataclass(frozen=True)
+class Reward:
+    id: int
+    name: str
+    type: str
+    amount: int
+    item_id: int | None
+    weight: float
+
+    def to_dict(self) -> dict:
+        reward = {'name': self.name, 'type': self.type}
+        if self.type == RouletteReward.Type.ITEM:
+            reward['item_id'] = self.item_id
+        else:
+            reward['amount'] = self.amount
+        return reward
+
+
+class AliasSampler:
+    """
+    Выбор награды с учётом весов за O(1) (alias method, алгоритм Vose).
+    Таблицы строятся один раз за O(n), после чего объект не меняется.
+    """
+    def __init__(self, rewards: list[Reward]) -> None:
+        rewards = [reward for reward in rewards if reward.weight > 0]
+        if not rewards:
+            raise ValueError("Roulette has no rewards")
+
+        count = len(rewards)
+        total = sum(reward.weight for reward in rewards)
+        scaled = [reward.weight * count / total for reward in rewards]
+        prob = [1.0] * count
+        alias = list(range(count))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            prob[less] = scaled[less]
+            alias[less] = more
+            scaled[more] += scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+
+        self.rewards = tuple(rewards)
+        self.prob = tuple(prob)
+        self.alias = tuple(alias)
+        self.total = total
+
+    def sample(self, rng: random.Random = random) -> Reward:
+        column = int(rng.random() * len(self.rewards))
+        if rng.random() < self.prob[column]:
+            return self.rewards[column]
+        return self.rewards[self.alias[column]]
+
+    def probability(self, reward: Reward) -> float:
+        return reward.weight / self.total
+
+
+class RewardTables:
+    """
+    Скомпилированные таблицы наград всех рулеток.
+    Хранятся в процессе и пересобираются, когда меняется общая версия в БД (SharedVersion).
+    """
+    VERSION_KEY = 'roulette:rewards'
+
+    _samplers: dict[str, AliasSampler] | None = None
+    _version = None
+
+    @classmethod
+    def get(cls, roulette: str) -> AliasSampler:
+        version = SharedVersion.get(cls.VERSION_KEY)
+        if cls._samplers is None or cls._version != version:
+            cls._samplers = cls._compile()
+            cls._version = version
+
+        sampler = cls._samplers.get(roulette)
+        if sampler is None:
+            raise ValueError(f"Roulette {roulette} has no rewards")
+        return sampler
+
+    @classmethod
+    def invalidate(cls) -> None:
+        SharedVersion.bump(cls.VERSION_KEY)
+
+    @staticmethod
+    def _compile() -> dict[str, AliasSampler]:
+        tables = {}
+        for row in RouletteReward.objects.filter(is_active=True, weight__gt=0).values(
+            'roulette', 'id', 'name', 'type', 'amount', 'item_id', 'weight'
+        ):
+            tables.setdefault(row.pop('roulette'), []).append(Reward(**row))
+        return {roulette: AliasSampler(rewards) for roulette, rewards in tables.items()}
+
+
 class Roulette:
-    REWARDS: List[dict] = []
+    KEY: str = ''
+    COOLDOWN = timedelta(days=1)
+    # Монеты вместо предмета, который у пользователя уже есть
+    DUPLICATE_ITEM_COINS = 50
 
     @classmethod
-    def spin_wheel(cls) -> dict:
+    def spin_wheel(cls) -> Reward:
         """
-        Возвращает одну награду из списка REWARDS с учётом весов.
+        Возвращает одну награду рулетки с учётом весов.
         """
-        choices = cls.REWARDS
-        weights = [reward["weight"] for reward in cls.REWARDS]
-
-        return random.choices(choices, weights=weights, k=1)[0]
+        return RewardTables.get(cls.KEY).sample()
 
     @classmethod
-    def get_rewards_list(cls) -> List[dict]:
-        return cls.REWARDS
-    
+    def get_rewards_list(cls) -> list[dict]:
+        return [reward.to_dict() for reward in RewardTables.get(cls.KEY).rewards]
+
     @classmethod
-    def _get_reward_to_user(cls, user: User, reward: dict) -> None:
+    def _get_reward_to_user(cls, user: User, reward: Reward) -> Reward:
+        """Выдаёт награду и возвращает то, что пользователь получил на самом деле."""
         with transaction.atomic():
-            if reward['type'] == 'coins':
-                user.profile.balance += reward['amount']
-                user.profile.save(update_fields=['balance'])
+            if reward.type == RouletteReward.Type.COINS:
+                Ledger(user).credit('roulette', coins=reward.amount)
 
-            elif reward['type'] == 'item':
+            elif reward.type == RouletteReward.Type.ITEM:
                 try:
-                    item = BaseShopItem.objects.get(id=reward['item_id'])
-                    UserInventory.objects.create(user=user, item=item)
-                except BaseShopItem.DoesNotExist:
-                    raise ValueError(f"Item with id {reward['item_id']} not found")
+                    with transaction.atomic():
+                        UserInventory.objects.create(user=user, item_id=reward.item_id)
+                except IntegrityError:
+                    # Предмет уже есть. Без замены прокрутка откатилась бы вместе с ошибкой и осталась доступной
+                    reward = replace(
+                        reward, name=f'{cls.DUPLICATE_ITEM_COINS} coins', type=RouletteReward.Type.COINS,
+                        amount=cls.DUPLICATE_ITEM_COINS, item_id=None,
+                    )
+                    Ledger(user).credit('roulette', coins=reward.amount)
 
             else:
-                raise ValueError(f"Invalid reward type: {reward['type']}")
-    
-    def _get_or_create_daily_roulette(self, user: User) -> UserDailyRoulette:
-        daily_roulette, _ = UserDailyRoulette.objects.get_or_create(user=user)
-        return daily_roulette
-
-    def _check_available_to_spin(self, user: User) -> bool:
-        daily_roulette = self._get_or_create_daily_roulette(user)
-        if daily_roulette.last_spin and daily_roulette.last_spin + timezone.timedelta(days=1) > timezone.now():
-            return False
-        return True
+                raise ValueError(f"Invalid reward type: {reward.type}")
+        return reward
 
-    def _update_last_spin(self, user: User) -> None:
-        daily_roulette = self._get_or_create_daily_roulette(user)
-        daily_roulette.last_spin = timezone.now()
-        daily_roulette.save(update_fields=['last_spin'])
+    @classmethod
+    def _claim_spin(cls, user: User) -> bool:
+        """
+        Занимает прокрутку одним условным UPDATE: last_spin обновится, только если
+        с прошлой прокрутки прошли сутки. Из параллельных запросов выиграет один.
+        """
+        now = timezone.now()
+        available = Q(last_spin__isnull=True) | Q(last_spin__lte=now - cls.COOLDOWN)
+        if UserDailyRoulette.objects.filter(available, user=user).update(last_spin=now):
+            return True
 
+        _, created = UserDailyRoulette.objects.get_or_create(user=user)
+        return created and bool(UserDailyRoulette.objects.filter(available, user=user).update(last_spin=now))
 
     def spin(self, user: User) -> dict:
-        if not self._check_available_to_spin(user):
-            raise ValueError("User is not allowed to spin the wheel")
         with transaction.atomic():
-            reward = self.spin_wheel()
-            self._get_reward_to_user(user, reward)
-            self._update_last_spin(user)
-        return reward
+            if not self._claim_spin(user):
+                raise ValueError("User is not allowed to spin the wheel")
+            reward = self._get_reward_to_user(user, self.spin_wheel())
+        return reward.to_dict()
 
 class DailyRoulette(Roulette):
-    REWARDS = [
-        {"name": "15 coins", "type": "coins", "amount": 15, "weight": 100},
-        {"name": "50 coins", "type": "coins", "amount": 50, "weight": 50},
-        {"name": "100 coins", "type": "coins", "amount": 100, "weight": 10},
-        {"name": "200 coins", "type": "coins", "amount": 200, "weight": 5},
-        {"name": "500 coins", "type": "coins", "amount": 500, "weight": 3},
-        {"name": "1000 coins", "type": "coins", "amount": 1000, "weight": 1},
-        {"name": "⭐ Wishful Star: Icon", "type": "item", "item_id": 46, "weight": 0.5},
-    ]
-
-
+    KEY = 'daily'
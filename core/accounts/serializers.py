@@ -1,10 +1,13 @@
 from rest_framework import serializers
 
 from django.contrib.auth import get_user_model
+from django.db import models
 
 from core.accounts.services import UserStreakService
+from core.accounts.trading import TradeHydrator
 from core.shop.models import BaseShopItem, BoostItem, AvatarItem, BackgroundItem, IconItem
-from core.accounts.models import Achievement, Trade, UserProfile, UserInventory
+from core.authentication.serializers import UserSerializer
+from core.accounts.models import Achievement, Activity, LeaderboardEntry, Trade, UserProfile, UserInventory
 from core.shop.serializers import ShopItemSerializer
 
 User = get_user_model()
@@ -56,17 +59,26 @@ class IconItemSerializer(BaseShopItemSerializer):
         model = IconItem
 
 class PolymorphicItemField(serializers.Field):
+    SERIALIZERS = {
+        BoostItem: BoostItemSerializer,
+        AvatarItem: AvatarItemSerializer,
+        BackgroundItem: BackgroundItemSerializer,
+        IconItem: IconItemSerializer,
+    }
+
     def to_representation(self, obj):
-        item_type = getattr(obj, 'type', None)
-        if item_type == 'boost':
-            return BoostItemSerializer(BoostItem.objects.get(id=obj.id)).data
-        elif item_type == 'avatar':
-            return AvatarItemSerializer(AvatarItem.objects.get(id=obj.id)).data
-        elif item_type == 'background':
-            return BackgroundItemSerializer(BackgroundItem.objects.get(id=obj.id)).data
-        elif item_type == 'icon':
-            return IconItemSerializer(IconItem.objects.get(id=obj.id)).data
-        return BaseShopItemSerializer(obj).data
+        if type(obj) is BaseShopItem and obj.type in BaseShopItem.get_item_classes():
+            obj = obj.get_instance_by_type()
+        return self.SERIALIZERS.get(type(obj), BaseShopItemSerializer)(obj).data
+
+
+class UserInventoryListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        inventories = list(data.all() if isinstance(data, models.Manager) else data)
+        items = BaseShopItem.get_instances_by_type(inventory.item for inventory in inventories)
+        for inventory, item in zip(inventories, items):
+            inventory.item = item
+        return super().to_representation(inventories)
 
 
 class UserInventorySerializer(serializers.ModelSerializer):
@@ -75,6 +87,7 @@ class UserInventorySerializer(serializers.ModelSerializer):
         model = UserInventory
         fields = ['id', 'user', 'item', 'is_equipped']
         read_only_fields = ['id']
+        list_serializer_class = UserInventoryListSerializer
 
 
 # Achievements
@@ -109,9 +122,8 @@ class CUDTradeSerializer(serializers.ModelSerializer):
 
         def attach_items_data(user, offer):
             items_ids = offer.get("items_ids", [])
-            inventories = UserInventory.objects.filter(user=user, id__in=items_ids)
-            items = [inv.item.get_instance_by_type() for inv in inventories]
-            offer["items_data"] = ShopItemSerializer(items, many=True).data
+            inventories = UserInventory.objects.filter(user=user, id__in=items_ids).select_related('item')
+            offer["items_data"] = ShopItemSerializer([inv.item for inv in inventories], many=True).data
             return offer
 
         validated_data["requester_offer"] = attach_items_data(validated_data["requester"], requester_offer)
@@ -132,29 +144,74 @@ class TradeSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at', 'status']
 
     def get_requester(self, obj):
-        return dict(username=obj.requester.username, id=obj.requester.id, avatar=obj.requester.profile.avatar)
+        return dict(username=obj.requester.username, id=obj.requester.id, avatar=self._get_avatar(obj.requester))
 
     def get_recipient(self, obj):
-        return dict(username=obj.recipient.username, id=obj.recipient.id, avatar=obj.recipient.profile.avatar)
+        return dict(username=obj.recipient.username, id=obj.recipient.id, avatar=self._get_avatar(obj.recipient))
+
+    def _get_avatar(self, user):
+        loadouts = self.context.get('loadouts')
+        if loadouts is not None and user.id in loadouts:
+            return loadouts[user.id].avatar_url
+        return user.profile.avatar
 
     def get_requester_offer(self, obj):
-        offer = obj.requester_offer
+        return self._get_offer(obj.requester_offer)
+
+    def get_recipient_offer(self, obj):
+        return self._get_offer(obj.recipient_offer)
+
+    def _get_offer(self, offer):
         if 'items_data' in offer:
             return offer
 
         items_ids = offer.get('items_ids', [])
-        inventories = UserInventory.objects.filter(id__in=items_ids)
-        items = [inv.item.get_instance_by_type() for inv in inventories]
-        offer["items"] = ShopItemSerializer(items, many=True).data
+        items = self.context.get('items')
+        if items is None:
+            items = TradeHydrator.items(items_ids)
+        offer = dict(offer)
+        offer["items"] = ShopItemSerializer([items[item_id] for item_id in items_ids if item_id in items], many=True).data
         return offer
 
-    def get_recipient_offer(self, obj):
-        offer = obj.recipient_offer
-        if 'items_data' in offer:
-            return offer
 
-        items_ids = offer.get('items_ids', [])
-        inventories = UserInventory.objects.filter(id__in=items_ids)
-        items = [inv.item.get_instance_by_type() for inv in inventories]
-        offer["items"] = ShopItemSerializer(items, many=True).data
-        return offer
\ No newline at end of file
+# Friends
+
+class FriendSerializer(UserSerializer):
+    mutual_friends = serializers.SerializerMethodField()
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + ('mutual_friends',)
+
+    def get_mutual_friends(self, obj):
+        return self.context.get('mutual', {}).get(obj.id, 0)
+
+
+# Leaderboard
+
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    rank = serializers.IntegerField(read_only=True)
+    user = serializers.SerializerMethodField()
+
+    class Meta:
+        model = LeaderboardEntry
+        fields = ['rank', 'user', 'score']
+
+    def get_user(self, obj):
+        loadouts = self.context.get('loadouts', {})
+        avatar = loadouts[obj.user_id].avatar_url if obj.user_id in loadouts else obj.user.profile.avatar
+        return dict(username=obj.user.username, id=obj.user_id, avatar=avatar)
+
+
+# Feed
+
+class ActivitySerializer(serializers.ModelSerializer):
+    actor = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Activity
+        fields = ['id', 'actor', 'verb', 'payload', 'created_at']
+
+    def get_actor(self, obj):
+        loadouts = self.context.get('loadouts', {})
+        avatar = loadouts[obj.actor_id].avatar_url if obj.actor_id in loadouts else obj.actor.profile.avatar
+        return dict(username=obj.actor.username, id=obj.actor_id, avatar=avatar)
@@ -3,10 +3,17 @@ from core.accounts.models import UserStreak
 from core.accounts.settings import STREAK_REWARDS
 from core.accounts.models import Achievement, UserAchievement, UserInventory
 from core.accounts.progress import UserActionProgressService
+from core.accounts.ledger import Ledger
+from core.accounts.achievements import AchievementRules, UnlockedAchievements
+from core.accounts.feed import ActivityFeed, Verb
+
+from datetime import datetime, time
 
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
 
 User = get_user_model()
 
@@ -29,40 +36,61 @@ class UserStreakService:
         )
 
     def increase_streak(self) -> None:
-        yesterday = timezone.now().date() - timezone.timedelta(days=1)
-        if self.streak.last_active is not None and self.streak.last_active.date() < yesterday:
-            self.reset_streak()
-            self.streak.last_active = timezone.now()
-            self.streak.save(update_fields=['current_streak', 'last_active'])
-        if self.streak.last_active is not None and self.streak.last_active.date() == yesterday:
-            self.update_streak()
-        
+        today = timezone.localdate()
+        last_active = timezone.localdate(self.streak.last_active) if self.streak.last_active else None
+        if last_active == today:
+            return
+
+        # Прерванные серии обнуляет ночная задача (rollover_streaks),
+        # поэтому здесь только одна условная запись: продолжить серию или начать новую.
+        # Если параллельный обработчик уже засчитал сегодняшний день, обе не обновят ни строки
+        today_start = timezone.make_aware(datetime.combine(today, time.min))
+        if not (self.update_streak(today_start) or self.start_streak(today_start)):
+            return
+        self.streak.refresh_from_db(fields=['current_streak', 'max_streak', 'last_active'])
+
         #TODO: сделать более гибко
         if self.streak.current_streak in STREAK_REWARDS.keys():
             self._reward_streak_bonus()
         uaps = UserActionProgressService(user=self.user)
         uaps.update_streak()
 
-    def reset_streak(self) -> None:
-        self.streak.current_streak = 0
-        self.streak.save(update_fields=['current_streak'])
-
-    def update_streak(self) -> None:
-        self.streak.current_streak += 1
-        if self.streak.current_streak > self.streak.max_streak:
-            self.streak.max_streak = self.streak.current_streak
-
-        self.streak.last_active = timezone.now()
-        self.streak.save(update_fields=['current_streak', 'max_streak', 'last_active'])
+    @staticmethod
+    def reset_lapsed_streaks(now=None) -> int:
+        """
+        Обнуляет серии всех пользователей, не проявлявших активность со вчерашнего дня,
+        одним UPDATE. Возвращает количество сброшенных серий.
+        """
+        yesterday = timezone.localdate(now or timezone.now()) - timezone.timedelta(days=1)
+        cutoff = timezone.make_aware(datetime.combine(yesterday, time.min))
+        return UserStreak.objects.filter(current_streak__gt=0, last_active__lt=cutoff).update(current_streak=0)
+
+    def start_streak(self, today_start) -> bool:
+        """Начинает серию заново, если последняя активность была раньше вчерашнего дня."""
+        yesterday_start = today_start - timezone.timedelta(days=1)
+        return bool(UserStreak.objects.filter(
+            Q(last_active__lt=yesterday_start) | Q(last_active__isnull=True), pk=self.streak.pk,
+        ).update(
+            current_streak=1,
+            max_streak=Greatest(F('max_streak'), 1),
+            last_active=timezone.now(),
+        ))
+
+    def update_streak(self, today_start) -> bool:
+        """Продолжает серию, если последняя активность была вчера."""
+        yesterday_start = today_start - timezone.timedelta(days=1)
+        return bool(UserStreak.objects.filter(
+            pk=self.streak.pk, last_active__gte=yesterday_start, last_active__lt=today_start,
+        ).update(
+            current_streak=F('current_streak') + 1,
+            max_streak=Greatest(F('max_streak'), F('current_streak') + 1),
+            last_active=timezone.now(),
+        ))
     
     def _reward_streak_bonus(self) -> None:
-        profile = self.user.profile
         cur_streak = self.streak.current_streak
         reward = STREAK_REWARDS.get(cur_streak, {'xp': 0, 'balance': 0})
-        
-        profile.xp += reward['xp']
-        profile.balance += reward['balance']
-        profile.save(update_fields=['xp', 'balance'])
+        Ledger(self.user).credit('streak_bonus', xp=reward['xp'], coins=reward['balance'])
 
 
 class AchievementService:
@@ -80,26 +108,44 @@ class AchievementService:
     def __init__(self, user):
         self.user = user
 
-    def check_achievements(self, trigger: str, payload: dict):
+    def check_achievements(self, trigger: str, payload: dict) -> list[int]:
         if trigger not in self.AVAILIBLE_TRIGGERS:
             raise ValueError(f"Invalid trigger: {trigger}")
-        achievements = Achievement.objects.filter(trigger=trigger)
-        for achievement in achievements:
-            if UserAchievement.objects.filter(user=self.user, achievement=achievement).exists():
-                continue
-
-            if self._check_condition(achievement.condition_data, payload):
-                self._give_achievement(achievement)
-    
-    def _check_condition(self, condition, payload):
-        for key, value in condition.items():
-            if key not in payload or payload[key] < value:
-                return False
-        return True
-
-    def _give_achievement(self, achievement):
+        index = AchievementRules.get().get(trigger)
+        if index is None:
+            return []
+
+        candidates = [rule for rule in index.candidates(payload) if rule.matches(payload)]
+        if not candidates:
+            return []
+
+        unlocked = UnlockedAchievements.get(self.user.id)
+        new_rules = [rule for rule in candidates if not unlocked & rule.bit]
+        if not new_rules:
+            return []
+        return self._give_achievements(new_rules)
+
+    def _give_achievements(self, rules) -> list[int]:
+        achievement_ids = [rule.achievement_id for rule in rules]
         with transaction.atomic():
-            UserAchievement.objects.create(user=self.user, achievement=achievement)
+            # Уже выданные: маска устарела или достижение выдала параллельная проверка.
+            # Без даты выдачи новые строки после вставки не отличить, поэтому выборка до неё
+            given = set(UserAchievement.objects.filter(
+                user=self.user, achievement_id__in=achievement_ids
+            ).values_list('achievement_id', flat=True))
+            UserAchievement.objects.bulk_create(
+                [UserAchievement(user=self.user, achievement_id=achievement_id) for achievement_id in achievement_ids],
+                ignore_conflicts=True,
+            )
+            inserted = [achievement_id for achievement_id in achievement_ids if achievement_id not in given]
+
+            if inserted:
+                titles = dict(Achievement.objects.filter(id__in=inserted).values_list('id', 'title'))
+                ActivityFeed(self.user).publish_many(Verb.ACHIEVEMENT_UNLOCKED, [
+                    {'achievement_id': achievement_id, 'title': title} for achievement_id, title in titles.items()
+                ])
+        UnlockedAchievements.add(self.user.id, sum(rule.bit for rule in rules))
+        return inserted
 
 class UserAchievementService:
     def __init__(self, user):
@@ -122,13 +168,12 @@ class UserAchievementService:
             self._update_user_achievement(user_achievement)
             
     def _reward_benefits(self, achievement):
-        profile = self.user.profile
-        profile.xp += achievement.reward_xp
-        profile.balance += achievement.reward_coins
-        profile.save(update_fields=['xp', 'balance'])
+        Ledger(self.user).credit('achievement', xp=achievement.reward_xp, coins=achievement.reward_coins)
 
-        for item in achievement.reward_items.all():
-            UserInventory.objects.create(user=self.user, item=item)
+        UserInventory.objects.bulk_create(
+            [UserInventory(user=self.user, item=item) for item in achievement.reward_items.all()],
+            ignore_conflicts=True,
+        )
 
     def _update_user_achievement(self, user_achievement):
         user_achievement.is_claimed = True
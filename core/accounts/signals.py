@@ -1,6 +1,12 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
-from core.accounts.models import UserProfile, UserStreak, DailyRoulette
+from django.utils import timezone
+from core.accounts.models import User, UserProfile, UserStreak, UserDailyRoulette, Achievement, UserAchievement, FriendRelation, RouletteReward, UserBoost
+from core.accounts.friends import FriendGraph
+from core.accounts.roulette import RewardTables
+from core.accounts.leaderboard import Leaderboard
+from core.accounts.achievements import AchievementRules, UnlockedAchievements
+from core.accounts.boosts import ActiveBoosts
 
 @receiver(post_save, sender=UserProfile)
 def create_streak_for_profile(sender, instance, created, **kwargs):
@@ -11,4 +17,55 @@ def create_streak_for_profile(sender, instance, created, **kwargs):
 @receiver(post_save, sender=UserProfile)
 def create_daily_roulette(sender, instance, created, **kwargs):
     if created and not hasattr(instance.user, 'daily_roulette'):
-        DailyRoulette.objects.create(user=instance.user)
\ No newline at end of file
+        UserDailyRoulette.objects.create(user=instance.user)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_save, sender=UserStreak)
+def sync_leaderboards(sender, instance, update_fields=None, **kwargs):
+    Leaderboard.sync_instance(instance, update_fields)
+
+
+@receiver(pre_delete, sender=User)
+def remove_from_leaderboards(sender, instance, **kwargs):
+    # Записи рейтинга удалятся каскадом, корзины гистограммы нужно уменьшить вручную
+    Leaderboard.remove(instance.id)
+
+
+@receiver(post_save, sender=Achievement)
+@receiver(post_delete, sender=Achievement)
+def invalidate_achievement_rules(sender, **kwargs):
+    AchievementRules.invalidate()
+
+
+@receiver(post_save, sender=RouletteReward)
+@receiver(post_delete, sender=RouletteReward)
+def invalidate_roulette_rewards(sender, **kwargs):
+    RewardTables.invalidate()
+
+
+@receiver(post_delete, sender=UserAchievement)
+def invalidate_unlocked_achievements(sender, instance, **kwargs):
+    UnlockedAchievements.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=UserBoost)
+@receiver(post_delete, sender=UserBoost)
+def invalidate_active_boosts(sender, instance, signal, **kwargs):
+    # Удаление истёкшего буста (ActiveBoosts.prune) не меняет набор активных
+    if signal is post_delete and instance.expires_at <= timezone.now():
+        return
+    ActiveBoosts.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=FriendRelation)
+def sync_friend_graph(sender, instance, **kwargs):
+    if instance.status == FriendRelation.Status.ACCEPTED:
+        FriendGraph.link(instance.requester_id, instance.recipient_id)
+    else:
+        FriendGraph.unlink(instance.requester_id, instance.recipient_id)
+
+
+@receiver(post_delete, sender=FriendRelation)
+def unlink_friends(sender, instance, **kwargs):
+    FriendGraph.unlink(instance.requester_id, instance.recipient_id)
@@ -0,0 +1,94 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from core.accounts.achievements import AchievementRule, AchievementRules, UnlockedAchievements, compile_condition
+from core.accounts.feed import Verb
+from core.accounts.models import Achievement, Activity, UserAchievement
+from core.accounts.services import AchievementService
+from core.accounts.versions import SharedVersion
+
+User = get_user_model()
+
+
+class AchievementEvaluatorTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.first = self._create('first_task', 'task_completed', {'tasks_completed': 1})
+        self.tenth = self._create('ten_tasks', 'task_completed', {'tasks_completed': 10})
+        self.week = self._create('week_streak', 'streak_updated', {'streak': {'gte': 7, 'lt': 30}})
+
+    def _create(self, code, trigger, condition_data):
+        return Achievement.objects.create(
+            code=code, title=code, description=code, trigger=trigger, condition_data=condition_data
+        )
+
+    def _unlocked(self):
+        return set(UserAchievement.objects.filter(user=self.user).values_list('achievement_id', flat=True))
+
+    def test_threshold_crossing(self):
+        service = AchievementService(self.user)
+        self.assertEqual(service.check_achievements('task_completed', {'tasks_completed': 1}), [self.first.id])
+        self.assertEqual(service.check_achievements('task_completed', {'tasks_completed': 5}), [])
+        self.assertEqual(service.check_achievements('task_completed', {'tasks_completed': 12}), [self.tenth.id])
+        self.assertEqual(self._unlocked(), {self.first.id, self.tenth.id})
+
+    def test_operator_conditions(self):
+        service = AchievementService(self.user)
+        service.check_achievements('streak_updated', {'streak': 31})
+        self.assertEqual(self._unlocked(), set())
+
+        service.check_achievements('streak_updated', {'streak': 7})
+        self.assertEqual(self._unlocked(), {self.week.id})
+
+    def test_no_queries_without_crossing(self):
+        service = AchievementService(self.user)
+        service.check_achievements('task_completed', {'tasks_completed': 1})
+
+        # Только сверка общих версий правил и маски полученных достижений
+        with self.assertNumQueries(4):
+            service.check_achievements('task_completed', {'tasks_completed': 2})
+            service.check_achievements('task_completed', {'tasks_completed': 1})
+
+    def test_rules_reload_after_change(self):
+        service = AchievementService(self.user)
+        service.check_achievements('task_completed', {'tasks_completed': 3})
+
+        three = self._create('three_tasks', 'task_completed', {'tasks_completed': 3})
+        self.assertEqual(service.check_achievements('task_completed', {'tasks_completed': 3}), [three.id])
+
+    def test_version_bumped_by_other_process(self):
+        service = AchievementService(self.user)
+        service.check_achievements('task_completed', {'tasks_completed': 1})
+
+        # Другой процесс меняет данные в обход сигналов этого процесса и сдвигает версию в БД
+        three = Achievement.objects.bulk_create([Achievement(
+            code='three_tasks', title='three', description='three', trigger='task_completed',
+            condition_data={'tasks_completed': 3},
+        )])[0]
+        SharedVersion.bump(AchievementRules.VERSION_KEY)
+        self.assertEqual(service.check_achievements('task_completed', {'tasks_completed': 3}), [three.id])
+
+        UserAchievement.objects.filter(user=self.user)._raw_delete(UserAchievement.objects.db)
+        SharedVersion.bump(UnlockedAchievements.KEY.format(user_id=self.user.id))
+        self.assertEqual(service.check_achievements('task_completed', {'tasks_completed': 1}), [self.first.id])
+
+    def test_stale_bitset_does_not_republish(self):
+        service = AchievementService(self.user)
+        service.check_achievements('task_completed', {'tasks_completed': 1})
+
+        # Маска другого процесса ещё не знает о выданном достижении
+        key = UnlockedAchievements.KEY.format(user_id=self.user.id)
+        cache.set(key, (cache.get(key)[0], 0))
+
+        self.assertEqual(service.check_achievements('task_completed', {'tasks_completed': 1}), [])
+        self.assertEqual(Activity.objects.filter(verb=Verb.ACHIEVEMENT_UNLOCKED).count(), 1)
+
+    def test_compile_condition(self):
+        rule = AchievementRule(1, compile_condition({'a': 2, 'b': {'in': ['x', 'y']}}))
+        self.assertTrue(rule.matches({'a': 3, 'b': 'x'}))
+        self.assertFalse(rule.matches({'a': 3, 'b': 'z'}))
+        self.assertFalse(rule.matches({'b': 'x'}))
+        with self.assertRaises(ValueError):
+            compile_condition({'a': {'between': [1, 2]}})
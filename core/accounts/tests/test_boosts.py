@@ -0,0 +1,104 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+
+from core.accounts.boosts import ActiveBoosts
+from core.accounts.models import UserBoost
+from core.accounts.versions import SharedVersion
+from core.shop.models import BoostItem
+from core.todo.models import Todo, RewardService
+
+User = get_user_model()
+
+
+def create_boost(boost_type=BoostItem.BoostType.XP, multiplier=1.5, duration_minutes=60):
+    return BoostItem.objects.create(
+        name=f'{boost_type} x{multiplier}',
+        price=10,
+        image='boost.png',
+        boost_type=boost_type,
+        multiplier=multiplier,
+        duration_minutes=duration_minutes,
+    )
+
+
+class ActiveBoostsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='booster', password='pass')
+
+    def tearDown(self):
+        # Откат транзакции теста не сбрасывает кэш бустов
+        cache.clear()
+
+    def test_multipliers(self):
+        create_boost(BoostItem.BoostType.XP, 1.5).apply_to_user(self.user)
+        create_boost(BoostItem.BoostType.XP, 2.0).apply_to_user(self.user)
+        create_boost(BoostItem.BoostType.MONEY, 3.0).apply_to_user(self.user)
+        expired = create_boost(BoostItem.BoostType.MONEY, 10.0)
+        UserBoost.objects.create(user=self.user, boost=expired, expires_at=timezone.now() - timedelta(minutes=1))
+
+        state = ActiveBoosts.get(self.user.id)
+        self.assertEqual(state.multiplier(BoostItem.BoostType.XP), 2.0)
+        self.assertEqual(state.multiplier(BoostItem.BoostType.MONEY), 3.0)
+        self.assertNotIn(expired.id, state.boost_ids)
+
+    def test_cached_until_apply(self):
+        ActiveBoosts.get(self.user.id)
+        # Только сверка версии, бусты не загружаются
+        with self.assertNumQueries(1):
+            self.assertEqual(ActiveBoosts.get(self.user.id).multiplier(BoostItem.BoostType.XP), 1.0)
+
+        create_boost(BoostItem.BoostType.XP, 1.5).apply_to_user(self.user)
+        self.assertEqual(ActiveBoosts.get(self.user.id).multiplier(BoostItem.BoostType.XP), 1.5)
+
+    def test_boost_bought_in_other_process(self):
+        ActiveBoosts.get(self.user.id)
+
+        # Буст куплен в другом процессе: его кэш очищен, а здесь остался только сдвиг версии в БД
+        boost = create_boost(BoostItem.BoostType.XP, 1.5)
+        UserBoost.objects.bulk_create([UserBoost(user=self.user, boost=boost, expires_at=timezone.now() + timedelta(hours=1))])
+        SharedVersion.bump(ActiveBoosts.KEY.format(user_id=self.user.id))
+
+        self.assertEqual(ActiveBoosts.get(self.user.id).multiplier(BoostItem.BoostType.XP), 1.5)
+
+    def test_entry_expires_with_boost(self):
+        create_boost(BoostItem.BoostType.XP, 1.5, duration_minutes=5).apply_to_user(self.user)
+        self.assertEqual(ActiveBoosts.get(self.user.id).multiplier(BoostItem.BoostType.XP), 1.5)
+
+        later = timezone.now() + timedelta(minutes=10)
+        with patch('core.accounts.boosts.time.time', return_value=later.timestamp()), \
+             patch('core.accounts.boosts.timezone.now', return_value=later):
+            self.assertEqual(ActiveBoosts.get(self.user.id).multiplier(BoostItem.BoostType.XP), 1.0)
+
+    def test_apply_twice(self):
+        boost = create_boost()
+        boost.apply_to_user(self.user)
+        with self.assertRaises(ValueError):
+            boost.apply_to_user(self.user)
+
+    def test_reward_uses_boosts(self):
+        create_boost(BoostItem.BoostType.XP, 2.0).apply_to_user(self.user)
+        create_boost(BoostItem.BoostType.MONEY, 3.0).apply_to_user(self.user)
+        todo = Todo.objects.create(user=self.user, title='t', difficulty=1)
+
+        with patch('core.todo.models.get_xp_by_lvl', return_value=10), \
+             patch('core.todo.models.get_coins_by_lvl', return_value=5):
+            ActiveBoosts.get(self.user.id)
+            with self.assertNumQueries(1):
+                xp, coins = RewardService(todo).calculate_rewards()
+        self.assertEqual((xp, coins), (20, 15))
+
+    def test_prune(self):
+        boosts = [create_boost(multiplier=1 + i / 10) for i in range(5)]
+        now = timezone.now()
+        for i, boost in enumerate(boosts):
+            UserBoost.objects.create(user=self.user, boost=boost, expires_at=now + timedelta(days=i - 3))
+
+        self.assertEqual(ActiveBoosts.prune(now, chunk_size=2), 3)
+        self.assertEqual(UserBoost.objects.count(), 2)
+        self.assertFalse(UserBoost.objects.filter(expires_at__lt=now).exists())
@@ -0,0 +1,120 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.accounts.feed import ActivityFeed, Verb
+from core.accounts.friends import FriendGraph
+from core.accounts.models import Activity, TimelineEntry
+from core.accounts.outbox import Outbox
+from core.dream.models import Dream
+from core.dream.services import DreamStepService
+from core.shop.models import AvatarItem
+from core.todo.models import Todo
+
+User = get_user_model()
+
+
+class ActivityFeedTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.actor = User.objects.create_user(username='actor', password='p')
+        self.friends = [User.objects.create_user(username=f'friend{i}', password='p') for i in range(2)]
+        for friend in self.friends:
+            FriendGraph.link(self.actor.id, friend.id)
+
+    def _timeline_ids(self, user, **kwargs):
+        activities, _ = ActivityFeed(user).timeline(**kwargs)
+        return [activity.id for activity in activities]
+
+    def test_publish_fans_out_to_friends(self):
+        activity = ActivityFeed(self.actor).publish(Verb.TASK_COMPLETED, {'title': 'Run'})
+
+        self.assertEqual(TimelineEntry.objects.filter(activity=activity).count(), 2)
+        self.assertEqual(self._timeline_ids(self.friends[0]), [activity.id])
+        self.assertEqual(self._timeline_ids(self.actor), [])
+
+    def test_cursor_pagination(self):
+        activities = ActivityFeed(self.actor).publish_many(Verb.TASK_COMPLETED, [{'n': i} for i in range(5)])
+        feed = ActivityFeed(self.friends[0])
+
+        first, cursor = feed.timeline(limit=3)
+        second, last_cursor = feed.timeline(before=cursor, limit=3)
+
+        self.assertEqual([a.id for a in first + second], [a.id for a in reversed(activities)])
+        self.assertIsNone(last_cursor)
+
+    def test_large_friend_count_falls_back_to_read(self):
+        with patch.object(ActivityFeed, 'FANOUT_LIMIT', 1):
+            pulled = ActivityFeed(self.actor).publish(Verb.TASK_COMPLETED)
+        pushed = ActivityFeed(self.actor).publish(Verb.TASK_COMPLETED)
+
+        self.assertFalse(pulled.fanned_out)
+        self.assertFalse(TimelineEntry.objects.filter(activity=pulled).exists())
+        self.assertEqual(self._timeline_ids(self.friends[1]), [pushed.id, pulled.id])
+        self.assertEqual(self._timeline_ids(self.friends[1], before=pushed.id), [pulled.id])
+
+    def test_prune_caps_timelines(self):
+        activities = ActivityFeed(self.actor).publish_many(Verb.TASK_COMPLETED, [{} for _ in range(4)])
+
+        with patch.object(ActivityFeed, 'TIMELINE_LIMIT', 3):
+            self.assertEqual(ActivityFeed.prune(), 2)
+        self.assertEqual(self._timeline_ids(self.friends[0]), [a.id for a in reversed(activities[1:])])
+
+    def test_hooks_publish_activities(self):
+        Todo.objects.create(user=self.actor, title='Run').execute_task()
+        Outbox.process_batch()
+
+        avatar = AvatarItem.objects.create(name='Cat', price=0, image='cat.png')
+        avatar.apply_to_user(self.actor)
+
+        Dream.objects.create(user=self.actor, title='Hidden', is_private=True)._achieve()
+        Dream.objects.create(user=self.actor, title='Car')._achieve()
+
+        self.assertEqual(
+            list(Activity.objects.order_by('id').values_list('verb', flat=True)),
+            [Verb.TASK_COMPLETED, Verb.ITEM_EQUIPPED, Verb.DREAM_ACHIEVED],
+        )
+        self.assertEqual(Activity.objects.get(verb=Verb.TASK_COMPLETED).payload['title'], 'Run')
+
+    def test_private_dream_steps_stay_out_of_feed(self):
+        hidden = Dream.objects.create(user=self.actor, title='Hidden', is_private=True)
+        public = Dream.objects.create(user=self.actor, title='Car')
+        for dream in (hidden, public):
+            Todo.objects.create(user=self.actor, title=f'{dream.title} step', is_dream_step=True, dream=dream).execute_task()
+        Outbox.process_batch()
+
+        titles = [activity.payload['title'] for activity in ActivityFeed(self.friends[0]).timeline()[0]]
+        self.assertEqual(titles, ['Car step'])
+
+    def test_last_step_achieves_dream(self):
+        dream = Dream.objects.create(user=self.actor, title='Car')
+        first, last = [
+            Todo.objects.create(user=self.actor, title=title, is_dream_step=True, dream=dream) for title in ('Save', 'Buy')
+        ]
+
+        self.assertEqual(DreamStepService.execute_dream_step(first), 50)
+        self.assertFalse(Activity.objects.filter(verb=Verb.DREAM_ACHIEVED).exists())
+
+        self.assertEqual(DreamStepService.execute_dream_step(last), 100)
+        dream.refresh_from_db()
+        self.assertFalse(dream.is_active)
+        self.assertEqual(Activity.objects.get(verb=Verb.DREAM_ACHIEVED).payload, {'dream_id': dream.id, 'title': 'Car'})
+
+        dream._achieve()
+        self.assertEqual(Activity.objects.filter(verb=Verb.DREAM_ACHIEVED).count(), 1)
+
+    def test_feed_view(self):
+        ActivityFeed(self.actor).publish(Verb.TASK_COMPLETED, {'title': 'Run'})
+        client = APIClient()
+        client.force_authenticate(self.friends[0])
+
+        response = client.get(reverse('accounts:feed'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['actor']['id'], self.actor.id)
+        self.assertEqual(response.data['results'][0]['payload'], {'title': 'Run'})
+        self.assertIsNone(response.data['next'])
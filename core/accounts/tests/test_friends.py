@@ -0,0 +1,109 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.accounts.friends import FriendGraph
+from core.accounts.models import FriendRelation, Friendship
+
+User = get_user_model()
+
+
+class FriendGraphTest(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f'user{i}', password='p') for i in range(6)]
+        self.me = self.users[0]
+
+    def _befriend(self, requester, recipient):
+        relation = FriendRelation.objects.create(requester=requester, recipient=recipient)
+        relation.accept_friend_request(recipient)
+        return relation
+
+    def test_accept_links_both_directions(self):
+        self._befriend(self.me, self.users[1])
+
+        self.assertEqual(FriendRelation.get_friend_ids(self.me), {self.users[1].id})
+        self.assertEqual(FriendRelation.get_friend_ids(self.users[1]), {self.me.id})
+
+    def test_reject_does_not_link(self):
+        relation = FriendRelation.objects.create(requester=self.me, recipient=self.users[1])
+        relation.reject_friend_request(self.me)
+
+        self.assertFalse(Friendship.objects.exists())
+
+    def test_keyset_pages(self):
+        for user in self.users[1:]:
+            self._befriend(self.me, user)
+        graph = FriendGraph(self.me)
+
+        first, cursor = graph.page(limit=3)
+        second, last_cursor = graph.page(after=cursor, limit=3)
+
+        self.assertEqual([u.id for u in first + second], [u.id for u in self.users[1:]])
+        self.assertIsNone(last_cursor)
+
+    def test_mutual_counts_and_suggestions(self):
+        a, b, c, d, e = self.users[1:]
+        self._befriend(self.me, a)
+        self._befriend(self.me, b)
+        self._befriend(a, b)
+        self._befriend(a, c)
+        self._befriend(b, c)
+        self._befriend(a, d)
+        FriendRelation.objects.create(requester=self.me, recipient=e)
+        self._befriend(a, e)
+
+        graph = FriendGraph(self.me)
+        self.assertEqual(graph.mutual_counts([a.id, b.id, c.id]), {a.id: 1, b.id: 1, c.id: 2})
+        self.assertEqual(graph.suggestions(), [(c.id, 2), (d.id, 1)])
+
+    def test_rebuild(self):
+        self._befriend(self.me, self.users[1])
+        self._befriend(self.users[2], self.me)
+        Friendship.objects.all().delete()
+
+        self.assertEqual(FriendGraph.rebuild(chunk_size=2), 2)
+        self.assertEqual(FriendRelation.get_friend_ids(self.me), {self.users[1].id, self.users[2].id})
+
+
+class FriendsListViewTest(TestCase):
+    def setUp(self):
+        self.me = User.objects.create_user(username='me', password='p')
+        self.friends = [User.objects.create_user(username=f'friend{i}', password='p') for i in range(5)]
+        for friend in self.friends:
+            FriendGraph.link(self.me.id, friend.id)
+        self.client = APIClient()
+        self.client.force_authenticate(self.me)
+
+    def test_cursor_pagination(self):
+        url = reverse('accounts:friends_list')
+        response = self.client.get(url, {'limit': 3})
+        self.assertEqual([f['id'] for f in response.data['friends']], [f.id for f in self.friends[:3]])
+        self.assertEqual(response.data['friends'][0]['mutual_friends'], 0)
+
+        response = self.client.get(url, {'limit': 3, 'after': response.data['next']})
+        self.assertEqual([f['id'] for f in response.data['friends']], [f.id for f in self.friends[3:]])
+        self.assertIsNone(response.data['next'])
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        url = reverse('accounts:friends_list')
+        with self.assertNumQueries(3):
+            self.client.get(url, {'limit': 1})
+        with self.assertNumQueries(3):
+            self.client.get(url, {'limit': 5})
+
+    def test_suggestions(self):
+        stranger = User.objects.create_user(username='stranger', password='p')
+        FriendGraph.link(self.friends[0].id, stranger.id)
+
+        response = self.client.get(reverse('accounts:friend_suggestions'))
+        self.assertEqual(response.data['suggestions'][0]['id'], stranger.id)
+        self.assertEqual(response.data['suggestions'][0]['mutual_friends'], 1)
+
+        response = self.client.get(reverse('accounts:friend_suggestions'), {'limit': 1000})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['suggestions']), 1)
+
+        response = self.client.get(reverse('accounts:friend_suggestions'), {'limit': 'ten'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,82 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.accounts.models import Achievement, UserInventory
+from core.shop.models import AvatarItem, BackgroundItem, BaseShopItem, BoostItem, IconItem
+
+User = get_user_model()
+
+
+class PolymorphicLoaderTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.counter = 0
+
+    def _create_items(self, count):
+        classes = [AvatarItem, BackgroundItem, IconItem]
+        items = []
+        for _ in range(count):
+            self.counter += 1
+            item_class = classes[self.counter % len(classes)]
+            items.append(item_class.objects.create(name=f'Item {self.counter}', price=10, image='item.png'))
+        items.append(BoostItem.objects.create(
+            name=f'Boost {self.counter}', price=10, image='boost.png', boost_type='xp', duration_minutes=30
+        ))
+        return items
+
+    def _get_queries(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_instances_are_typed_in_order(self):
+        items = self._create_items(3)
+        base_items = list(BaseShopItem.objects.filter(id__in=[item.id for item in items]).order_by('-id'))
+
+        with self.assertNumQueries(4):
+            typed = BaseShopItem.get_instances_by_type(base_items)
+
+        self.assertEqual([item.id for item in typed], [item.id for item in base_items])
+        self.assertEqual([type(item) for item in typed], [type(item) for item in sorted(items, key=lambda i: -i.id)])
+
+    def test_inventory_query_count_is_flat(self):
+        # one query per item type, so both pages contain every type
+        url = reverse('accounts:inventory')
+        for item in self._create_items(3):
+            UserInventory.objects.create(user=self.user, item=item)
+        _, few = self._get_queries(url)
+
+        for item in self._create_items(12):
+            UserInventory.objects.create(user=self.user, item=item)
+        response, many = self._get_queries(url)
+
+        self.assertEqual(few, many)
+        boosts = [row['item'] for row in response.data['results'] if row['item']['type'] == 'boost']
+        self.assertEqual(boosts[0]['duration_minutes'], 30)
+
+    def test_achievement_list_query_count_is_flat(self):
+        url = reverse('accounts:achievements')
+        items = self._create_items(3)
+        for i in range(2):
+            achievement = Achievement.objects.create(code=f'a{i}', title='a', description='a', trigger='task_completed', condition_data={})
+            achievement.reward_items.set(items)
+        _, few = self._get_queries(url, all='true')
+
+        cache.clear()
+        for i in range(2, 12):
+            achievement = Achievement.objects.create(code=f'a{i}', title='a', description='a', trigger='task_completed', condition_data={})
+            achievement.reward_items.set(items)
+        response, many = self._get_queries(url, all='true')
+
+        self.assertEqual(few, many)
+        self.assertEqual(len(response.data['results'][0]['reward_items']), 4)
@@ -0,0 +1,107 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.accounts.leaderboard import Board, Leaderboard
+from core.accounts.models import FriendRelation, LeaderboardBucket, LeaderboardEntry
+
+User = get_user_model()
+
+
+class LeaderboardTest(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f'user{i}', password='p') for i in range(4)]
+        for user, xp in zip(self.users, [50, 300, 300, 10]):
+            user.profile.xp = xp
+            user.profile.save(update_fields=['xp'])
+
+    def test_profile_save_updates_entry(self):
+        entry = LeaderboardEntry.objects.get(board=Board.XP, user=self.users[0])
+        self.assertEqual(entry.score, 50)
+
+        profile = self.users[0].profile
+        profile.balance = 70
+        profile.save(update_fields=['balance'])
+        self.assertEqual(LeaderboardEntry.objects.get(board=Board.COINS, user=self.users[0]).score, 70)
+
+    def test_streak_save_updates_entry(self):
+        streak = self.users[0].streak
+        streak.max_streak = 12
+        streak.save(update_fields=['max_streak'])
+        self.assertEqual(Leaderboard(Board.STREAK).rank_of(self.users[0].id), (1, 12))
+
+    def test_top_and_rank(self):
+        top = Leaderboard(Board.XP).top(3)
+        self.assertEqual([entry.user_id for entry in top], [self.users[1].id, self.users[2].id, self.users[0].id])
+        self.assertEqual([entry.rank for entry in top], [1, 2, 3])
+
+        self.assertEqual(Leaderboard(Board.XP).rank_of(self.users[2].id), (2, 300))
+        self.assertEqual(Leaderboard(Board.XP).rank_of(self.users[3].id), (4, 10))
+
+    def test_friends_board(self):
+        FriendRelation.objects.create(
+            requester=self.users[0], recipient=self.users[3], status=FriendRelation.Status.ACCEPTED
+        )
+        leaderboard = Leaderboard.for_friends(Board.XP, self.users[0])
+        self.assertEqual([entry.user_id for entry in leaderboard.top()], [self.users[0].id, self.users[3].id])
+        self.assertEqual(leaderboard.rank_of(self.users[3].id), (2, 10))
+
+    def test_rank_matches_full_count(self):
+        scores = [0, 0, 7, 31, 32, 33, 100, 1000, 1023, 1024, 5000, 5000, 123456]
+        for user, score in zip(self.users + [User.objects.create_user(username=f'extra{i}', password='p') for i in range(len(scores) - 4)], scores):
+            Leaderboard.submit(user.id, {Board.COINS: score})
+        # Повторная отправка переносит запись между корзинами
+        Leaderboard.submit(self.users[0].id, {Board.COINS: 40})
+
+        entries = list(LeaderboardEntry.objects.filter(board=Board.COINS).order_by('-score', 'user_id'))
+        for rank, entry in enumerate(entries, start=1):
+            self.assertEqual(Leaderboard(Board.COINS).rank_of(entry.user_id), (rank, entry.score))
+
+        counts = dict(LeaderboardBucket.objects.filter(board=Board.COINS).values_list('bucket', 'count'))
+        self.assertEqual(sum(counts.values()), len(entries))
+        self.assertEqual(counts[Leaderboard.bucket(40)], 1)
+
+    def test_deleted_user_leaves_buckets(self):
+        self.users[1].delete()
+
+        self.assertEqual(Leaderboard(Board.XP).rank_of(self.users[2].id), (1, 300))
+        self.assertEqual(Leaderboard(Board.XP).rank_of(self.users[0].id), (2, 50))
+        self.assertEqual(Leaderboard(Board.XP).rank_of(self.users[3].id), (3, 10))
+        counts = dict(LeaderboardBucket.objects.filter(board=Board.XP).values_list('bucket', 'count'))
+        self.assertEqual(counts[Leaderboard.bucket(300)], 1)
+        self.assertEqual(sum(counts.values()), 3)
+
+    def test_rebuild(self):
+        LeaderboardEntry.objects.all().delete()
+        LeaderboardBucket.objects.all().delete()
+        self.assertEqual(Leaderboard.rebuild(Board.XP), 4)
+        self.assertEqual(Leaderboard(Board.XP).rank_of(self.users[1].id), (1, 300))
+        self.assertEqual(Leaderboard(Board.XP).rank_of(self.users[3].id), (4, 10))
+
+    def test_leaderboard_view(self):
+        client = APIClient()
+        client.force_authenticate(user=self.users[0])
+
+        response = client.get(reverse('accounts:leaderboard', kwargs={'board': 'xp'}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertEqual(response.data['results'][0]['user']['id'], self.users[1].id)
+        self.assertEqual(response.data['me'], {'rank': 3, 'score': 50})
+
+        response = client.get(reverse('accounts:leaderboard', kwargs={'board': 'unknown'}))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_leaderboard_view_limit(self):
+        client = APIClient()
+        client.force_authenticate(user=self.users[0])
+        url = reverse('accounts:leaderboard', kwargs={'board': 'xp'})
+
+        response = client.get(url, {'limit': -5})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+        response = client.get(url, {'limit': 'ten'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
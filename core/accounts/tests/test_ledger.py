@@ -0,0 +1,56 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from core.accounts.ledger import Currency, Ledger
+from core.accounts.models import LedgerEntry, UserProfile
+
+User = get_user_model()
+
+
+class LedgerTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+
+    def test_credit_updates_profile_and_writes_entries(self):
+        Ledger(self.user).credit('task_completed', xp=10, coins=5)
+
+        self.assertEqual(self.user.profile.xp, 10)
+        self.assertEqual(self.user.profile.balance, 5)
+        self.assertEqual(
+            set(LedgerEntry.objects.values_list('currency', 'amount', 'reason')),
+            {(Currency.XP, 10, 'task_completed'), (Currency.COINS, 5, 'task_completed')},
+        )
+
+    def test_debit_with_insufficient_funds(self):
+        Ledger(self.user).credit('roulette', coins=50)
+
+        self.assertFalse(Ledger(self.user).debit('item_bought', coins=100))
+        self.assertEqual(UserProfile.objects.get(user=self.user).balance, 50)
+        self.assertEqual(LedgerEntry.objects.count(), 1)
+
+        self.assertTrue(Ledger(self.user).debit('item_bought', coins=50))
+        self.assertEqual(UserProfile.objects.get(user=self.user).balance, 0)
+
+    def test_stale_instances_do_not_lose_updates(self):
+        first = User.objects.get(id=self.user.id)
+        second = User.objects.get(id=self.user.id)
+        # both instances hold the same, soon stale, profile snapshot
+        self.assertEqual(first.profile.balance, second.profile.balance)
+
+        Ledger(first).credit('task_completed', coins=5)
+        Ledger(second).credit('task_completed', coins=7)
+
+        self.assertEqual(UserProfile.objects.get(user=self.user).balance, 12)
+
+    def test_compact(self):
+        for _ in range(3):
+            Ledger(self.user).credit('task_completed', coins=5)
+        Ledger(self.user).debit('item_bought', coins=4)
+
+        deleted = Ledger.compact(timezone.now() + timezone.timedelta(seconds=1))
+
+        self.assertEqual(deleted, 4)
+        snapshot = LedgerEntry.objects.get(user=self.user)
+        self.assertTrue(snapshot.is_snapshot)
+        self.assertEqual(snapshot.amount, 11)
@@ -0,0 +1,73 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.accounts.loadout import LoadoutResolver
+from core.accounts.models import FriendRelation, UserInventory
+from core.shop.models import AvatarItem, BackgroundItem, IconItem
+
+User = get_user_model()
+
+
+class LoadoutResolverTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.avatar = AvatarItem.objects.create(name='AV', price=0, image='av.png')
+        self.background = BackgroundItem.objects.create(name='BG', price=0, image='bg.png')
+        self.icon = IconItem.objects.create(name='Icon', description='Icon desc', price=0, image='icon.png')
+
+    def _equip(self, user, *items):
+        for item in items:
+            UserInventory.objects.create(user=user, item=item, is_equipped=True)
+
+    def test_profile_loadout(self):
+        self._equip(self.user, self.avatar, self.background, self.icon)
+        profile = User.objects.get(id=self.user.id).profile
+
+        with self.assertNumQueries(1):
+            self.assertEqual(profile.avatar, self.avatar.image.url)
+            self.assertEqual(profile.background, self.background.image.url)
+            self.assertEqual(profile.icon, {'name': 'Icon', 'description': 'Icon desc'})
+
+    def test_defaults_without_equipped_items(self):
+        UserInventory.objects.create(user=self.user, item=self.avatar, is_equipped=False)
+        loadout = LoadoutResolver.for_user(self.user.id)
+        self.assertTrue(loadout.avatar_url.endswith('shop_items/avatars/default.png'))
+        self.assertIsNone(loadout.icon_data)
+
+    def test_for_users_single_query(self):
+        users = [User.objects.create_user(username=f'user{i}', password='p') for i in range(10)]
+        for user in users:
+            self._equip(user, self.avatar, self.icon)
+
+        with self.assertNumQueries(1):
+            loadouts = LoadoutResolver.for_users(user.id for user in users)
+        self.assertEqual(len(loadouts), 10)
+        self.assertTrue(all(loadout.avatar.id == self.avatar.id for loadout in loadouts.values()))
+
+    def test_friends_list_query_count_is_flat(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = reverse('accounts:friends_list')
+
+        def add_friends(count, offset):
+            for i in range(count):
+                friend = User.objects.create_user(username=f'friend{offset + i}', password='p')
+                self._equip(friend, self.avatar)
+                FriendRelation.objects.create(
+                    requester=self.user, recipient=friend, status=FriendRelation.Status.ACCEPTED
+                )
+
+        # friends, loadouts and mutual friend counts
+        add_friends(2, 0)
+        with self.assertNumQueries(3):
+            response = client.get(url, {'limit': 100})
+        self.assertEqual(len(response.data['friends']), 2)
+
+        add_friends(20, 2)
+        with self.assertNumQueries(3):
+            response = client.get(url, {'limit': 100})
+        self.assertEqual(len(response.data['friends']), 22)
+        self.assertEqual(response.data['friends'][0]['avatar'], self.avatar.image.url)
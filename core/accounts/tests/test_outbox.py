@@ -0,0 +1,74 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.accounts.models import Achievement, OutboxEvent, UserAchievement
+from core.accounts.outbox import Outbox
+from core.todo.models import Todo
+
+User = get_user_model()
+
+
+class OutboxTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.achievement = Achievement.objects.create(
+            code='two_tasks', title='Two tasks', description='Two tasks',
+            trigger='task_completed', condition_data={'tasks_completed': 2},
+        )
+
+    def _execute_todos(self, count):
+        for i in range(count):
+            Todo.objects.create(user=self.user, title=f'Todo {i}').execute_task()
+
+    def test_execute_task_only_enqueues_side_effects(self):
+        self._execute_todos(2)
+
+        self.assertEqual(OutboxEvent.objects.filter(kind=OutboxEvent.Kind.TASK_COMPLETED).count(), 2)
+        self.user.statistic.refresh_from_db()
+        self.assertEqual(self.user.statistic.tasks_completed, 0)
+
+    def test_process_batch_coalesces_events_per_user(self):
+        self._execute_todos(2)
+
+        with patch('core.accounts.outbox.UserStreakService.increase_streak') as increase_streak:
+            self.assertEqual(Outbox.process_batch(), 2)
+        increase_streak.assert_called_once()
+
+        self.user.statistic.refresh_from_db()
+        self.assertEqual(self.user.statistic.tasks_completed, 2)
+        self.assertTrue(UserAchievement.objects.filter(user=self.user, achievement=self.achievement).exists())
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.assertEqual(Outbox.process_batch(), 0)
+
+    def test_batch_query_count_does_not_depend_on_events(self):
+        def queries(count):
+            self._execute_todos(count)
+            with CaptureQueriesContext(connection) as captured:
+                Outbox.process_batch()
+            return len(captured)
+
+        # Первая пачка начинает серию и выдаёт достижение
+        queries(2)
+        self.assertEqual(queries(1), queries(10))
+
+    def test_failed_handler_keeps_events(self):
+        self._execute_todos(1)
+
+        with patch.dict(Outbox.HANDLERS, {OutboxEvent.Kind.TASK_COMPLETED: self._fail}), \
+             self.assertLogs('core.accounts.outbox', level='ERROR'):
+            Outbox.process_batch()
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.attempts, 1)
+        self.assertEqual(event.last_error, 'boom')
+        self.assertEqual(Outbox.lag()['pending'], 1)
+
+    @staticmethod
+    def _fail(user, events):
+        raise RuntimeError('boom')
@@ -0,0 +1,176 @@
+import random
+import threading
+from collections import Counter
+from unittest import skipIf
+from unittest.mock import patch
+
+from django.test import TestCase, TransactionTestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from core.accounts.models import LedgerEntry, RouletteReward, UserDailyRoulette, UserInventory, UserProfile
+from core.accounts.roulette import AliasSampler, DailyRoulette, Reward, RewardTables
+from core.shop.models import BaseShopItem
+
+User = get_user_model()
+
+
+def reward(id, weight):
+    return Reward(id=id, name=f'{id} coins', type='coins', amount=id, item_id=None, weight=weight)
+
+
+class AliasSamplerTest(TestCase):
+    def test_distribution_matches_weights(self):
+        sampler = AliasSampler([reward(1, 100), reward(2, 50), reward(3, 10), reward(4, 0.5)])
+        rng = random.Random(42)
+        spins = 200_000
+
+        counts = Counter(sampler.sample(rng).id for _ in range(spins))
+
+        for item in sampler.rewards:
+            self.assertAlmostEqual(counts[item.id] / spins, sampler.probability(item), delta=0.005)
+
+    def test_zero_weight_is_never_drawn(self):
+        sampler = AliasSampler([reward(1, 1), reward(2, 0)])
+        self.assertEqual({sampler.sample().id for _ in range(1000)}, {1})
+
+    def test_empty_table(self):
+        with self.assertRaises(ValueError):
+            AliasSampler([reward(1, 0)])
+
+
+class DailyRouletteTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.coins = RouletteReward.objects.create(name='15 coins', type='coins', amount=15, weight=1)
+
+    def test_spin_credits_reward(self):
+        self.assertEqual(DailyRoulette().spin(self.user), {'name': '15 coins', 'type': 'coins', 'amount': 15})
+        self.assertEqual(UserProfile.objects.get(user=self.user).balance, 15)
+
+    def test_second_spin_is_rejected(self):
+        DailyRoulette().spin(self.user)
+
+        with self.assertRaises(ValueError):
+            DailyRoulette().spin(self.user)
+        self.assertEqual(UserProfile.objects.get(user=self.user).balance, 15)
+
+    def test_spin_after_cooldown(self):
+        DailyRoulette().spin(self.user)
+        UserDailyRoulette.objects.filter(user=self.user).update(
+            last_spin=timezone.now() - DailyRoulette.COOLDOWN
+        )
+
+        DailyRoulette().spin(self.user)
+        self.assertEqual(UserProfile.objects.get(user=self.user).balance, 30)
+
+    def test_claim_is_a_single_update(self):
+        RewardTables.get('daily')
+        with self.assertNumQueries(1):
+            self.assertTrue(DailyRoulette._claim_spin(self.user))
+        with self.assertNumQueries(2):
+            self.assertFalse(DailyRoulette._claim_spin(self.user))
+
+    def test_claim_without_roulette_row(self):
+        UserDailyRoulette.objects.filter(user=self.user).delete()
+        self.assertTrue(DailyRoulette._claim_spin(self.user))
+        self.assertFalse(DailyRoulette._claim_spin(self.user))
+
+    def test_tables_rebuild_after_change(self):
+        sampler = RewardTables.get('daily')
+        self.assertIs(RewardTables.get('daily'), sampler)
+
+        self.coins.weight = 0
+        self.coins.save()
+        RouletteReward.objects.create(name='50 coins', type='coins', amount=50, weight=1)
+
+        self.assertEqual([r['name'] for r in DailyRoulette.get_rewards_list()], ['50 coins'])
+
+    def test_owned_item_is_replaced_with_coins(self):
+        item = BaseShopItem.objects.create(name='Cat', price=0, image='cat.png', type=BaseShopItem.ItemType.BACKGROUND)
+        UserInventory.objects.create(user=self.user, item=item)
+        self.coins.delete()
+        RouletteReward.objects.create(name='Cat', type='item', item=item, weight=1)
+
+        self.assertEqual(DailyRoulette().spin(self.user), {
+            'name': f'{DailyRoulette.DUPLICATE_ITEM_COINS} coins', 'type': 'coins', 'amount': DailyRoulette.DUPLICATE_ITEM_COINS,
+        })
+        self.assertEqual(UserProfile.objects.get(user=self.user).balance, DailyRoulette.DUPLICATE_ITEM_COINS)
+        self.assertEqual(UserInventory.objects.filter(user=self.user).count(), 1)
+        with self.assertRaises(ValueError):
+            DailyRoulette().spin(self.user)
+
+    def test_interleaved_spins_give_one_reward(self):
+        # SQLite не держит параллельных писателей, поэтому вторая прокрутка
+        # запускается явно между занятием прокрутки и выдачей награды первой
+        for has_row in (True, False):
+            with self.subTest(has_row=has_row):
+                UserDailyRoulette.objects.filter(user=self.user).delete()
+                if has_row:
+                    UserDailyRoulette.objects.create(user=self.user)
+                LedgerEntry.objects.all().delete()
+                spin_wheel = DailyRoulette.spin_wheel
+                rejected = []
+
+                def interleave():
+                    with self.assertRaises(ValueError):
+                        DailyRoulette().spin(self.user)
+                    rejected.append(True)
+                    return spin_wheel()
+
+                with patch.object(DailyRoulette, 'spin_wheel', side_effect=interleave):
+                    DailyRoulette().spin(self.user)
+
+                self.assertEqual(rejected, [True])
+                self.assertEqual(LedgerEntry.objects.filter(user=self.user, reason='roulette').count(), 1)
+
+    def test_rewards_view_hides_weights(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        for _ in range(2):
+            response = client.get(reverse('accounts:daily_roulette'))
+            self.assertEqual(response.data['rewards'], [{'name': '15 coins', 'type': 'coins', 'amount': 15}])
+
+
+@skipIf(connection.vendor == 'sqlite', 'SQLite test database fails concurrent writers with "table is locked"')
+class ConcurrentSpinTest(TransactionTestCase):
+    THREADS = 8
+
+    def test_parallel_spins_give_one_reward(self):
+        cache.clear()
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        RouletteReward.objects.create(name='15 coins', type='coins', amount=15, weight=1)
+        RewardTables.get('daily')
+
+        barrier = threading.Barrier(self.THREADS)
+        results = []
+        errors = []
+
+        def spin():
+            try:
+                barrier.wait()
+                results.append(DailyRoulette().spin(user))
+            except ValueError:
+                results.append(None)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=spin) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(results), self.THREADS)
+        self.assertEqual(len([result for result in results if result]), 1)
+        self.assertEqual(LedgerEntry.objects.filter(user=user, reason='roulette').count(), 1)
@@ -9,6 +9,7 @@ from datetime import timedelta
 
 from core.accounts.models import UserStreak, Achievement, UserAchievement, UserInventory
 from core.accounts.services import UserStreakService, AchievementService, UserAchievementService
+from core.accounts.settings import STREAK_REWARDS
 from core.shop.models import BackgroundItem, AvatarItem
 from core.accounts.models import Trade
 from core.accounts.models import UserInventory
@@ -54,41 +55,6 @@ class UserStreakServiceTests(TestCase):
             )
             self.assertEqual(service.streak, mock_streak)
 
-    def test_increase_streak_with_recent_activity(self):
-        today = timezone.now()
-        yesterday = today - timedelta(days=1)
-        self.streak.last_active = yesterday
-        self.streak.current_streak = 5
-        self.streak.max_streak = 10
-        
-        service = UserStreakService(self.user)
-        service.increase_streak()
-        
-        self.assertEqual(self.streak.current_streak, 6)
-        self.streak.save.assert_called_with(update_fields=['current_streak', 'max_streak', 'last_active'])
-
-    def test_increase_streak_with_old_activity(self):
-        today = timezone.now()
-        two_days_ago = today - timedelta(days=2)
-        self.streak.last_active = two_days_ago
-        self.streak.current_streak = 5
-        
-        service = UserStreakService(self.user)
-        service.increase_streak()
-        
-        self.assertEqual(self.streak.current_streak, 1)
-        self.streak.save.assert_called_with(update_fields=['current_streak', 'max_streak', 'last_active'])
-
-    def test_update_max_streak(self):
-        self.streak.current_streak = 10
-        self.streak.max_streak = 10
-        
-        service = UserStreakService(self.user)
-        service.update_streak()
-        
-        self.assertEqual(self.streak.current_streak, 11)
-        self.assertEqual(self.streak.max_streak, 11)
-
     @patch('django.utils.timezone.now')
     def test_reward_milestone(self, mock_now):
         service = UserStreakService(self.user)
@@ -110,6 +76,63 @@ class UserStreakServiceTests(TestCase):
 
 User = get_user_model()
 
+class StreakRolloverTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.active = self._create_streak('active', current_streak=4, last_active=self.now - timedelta(days=1))
+        self.lapsed = self._create_streak('lapsed', current_streak=9, last_active=self.now - timedelta(days=3))
+
+    def _create_streak(self, username, **fields):
+        user = User.objects.create_user(username=username, password='pass')
+        UserStreak.objects.filter(user=user).update(max_streak=fields['current_streak'], **fields)
+        return UserStreak.objects.get(user=user)
+
+    def test_reset_lapsed_streaks(self):
+        with self.assertNumQueries(1):
+            reset = UserStreakService.reset_lapsed_streaks(self.now)
+
+        self.assertEqual(reset, 1)
+        self.lapsed.refresh_from_db()
+        self.active.refresh_from_db()
+        self.assertEqual(self.lapsed.current_streak, 0)
+        self.assertEqual(self.lapsed.max_streak, 9)
+        self.assertEqual(self.active.current_streak, 4)
+
+    def test_increase_streak_once_per_day(self):
+        service = UserStreakService(self.active.user)
+        service.increase_streak()
+        service.increase_streak()
+
+        self.active.refresh_from_db()
+        self.assertEqual(self.active.current_streak, 5)
+
+    def test_increase_streak_with_old_activity(self):
+        UserStreakService(self.lapsed.user).increase_streak()
+
+        self.lapsed.refresh_from_db()
+        self.assertEqual((self.lapsed.current_streak, self.lapsed.max_streak), (1, 9))
+
+    def test_update_max_streak(self):
+        UserStreak.objects.filter(id=self.active.id).update(max_streak=4)
+        UserStreakService(self.active.user).increase_streak()
+
+        self.active.refresh_from_db()
+        self.assertEqual((self.active.current_streak, self.active.max_streak), (5, 5))
+
+    def test_parallel_increase_rewards_once(self):
+        UserStreak.objects.filter(id=self.active.id).update(current_streak=6)
+        # Два обработчика событий прочитали серию до того, как любой из них её обновил
+        first = UserStreakService(User.objects.get(id=self.active.user_id))
+        second = UserStreakService(User.objects.get(id=self.active.user_id))
+
+        first.increase_streak()
+        second.increase_streak()
+
+        self.active.refresh_from_db()
+        self.assertEqual(self.active.current_streak, 7)
+        self.active.user.profile.refresh_from_db()
+        self.assertEqual(self.active.user.profile.xp, STREAK_REWARDS[7]['xp'])
+
 class AchievementIntegrationTests(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(username='testuser', password='pass')
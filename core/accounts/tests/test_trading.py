@@ -0,0 +1,258 @@
+import random
+import threading
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.test import TestCase, TransactionTestCase
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.accounts.ledger import Ledger
+from core.accounts.models import Trade, UserInventory, UserProfile
+from core.accounts.trading import TradeTransfer
+from core.shop.models import BaseShopItem
+
+User = get_user_model()
+
+
+def create_items(user, count):
+    items = BaseShopItem.objects.bulk_create([
+        BaseShopItem(name=f'Item {i}', price=0, image='item.png', type=BaseShopItem.ItemType.BACKGROUND)
+        for i in range(count)
+    ])
+    return UserInventory.objects.bulk_create([UserInventory(user=user, item=item) for item in items])
+
+
+def set_balance(user, balance):
+    UserProfile.objects.filter(user=user).update(balance=balance)
+
+
+class TradeTransferTest(TestCase):
+    def setUp(self):
+        self.requester = User.objects.create_user(username='requester', password='pass')
+        self.recipient = User.objects.create_user(username='recipient', password='pass')
+        set_balance(self.requester, 500)
+        set_balance(self.recipient, 300)
+
+    def _trade(self, requester_offer, recipient_offer):
+        return Trade.objects.create(
+            requester=self.requester,
+            recipient=self.recipient,
+            requester_offer=requester_offer,
+            recipient_offer=recipient_offer,
+        )
+
+    def _accept_queries(self, items_count):
+        items = create_items(self.requester, items_count)
+        trade = self._trade({'items_ids': [item.id for item in items]}, {'coins': 10})
+        with CaptureQueriesContext(connection) as queries:
+            trade.accept_trade(self.recipient)
+        return len(queries)
+
+    def test_accept_moves_items_and_coins(self):
+        items = create_items(self.requester, 2)
+        trade = self._trade({'coins': 100, 'items_ids': [items[0].id]}, {'coins': 40})
+        trade.accept_trade(self.recipient)
+
+        self.assertEqual(Trade.objects.get(id=trade.id).status, Trade.Status.ACCEPTED)
+        self.assertEqual(UserInventory.objects.get(id=items[0].id).user, self.recipient)
+        self.assertEqual(UserInventory.objects.get(id=items[1].id).user, self.requester)
+        self.assertEqual(UserProfile.objects.get(user=self.requester).balance, 440)
+        self.assertEqual(UserProfile.objects.get(user=self.recipient).balance, 360)
+
+    def test_query_count_does_not_depend_on_items(self):
+        self.assertEqual(self._accept_queries(1), self._accept_queries(50))
+
+    def test_insufficient_coins_rolls_back(self):
+        items = create_items(self.requester, 1)
+        trade = self._trade({'items_ids': [items[0].id]}, {'coins': 1000})
+
+        with self.assertRaises(ValidationError):
+            trade.accept_trade(self.recipient)
+
+        self.assertEqual(Trade.objects.get(id=trade.id).status, Trade.Status.PENDING)
+        self.assertEqual(UserInventory.objects.get(id=items[0].id).user, self.requester)
+
+    def test_missing_item_rolls_back(self):
+        items = create_items(self.requester, 1)
+        trade = self._trade({'coins': 100, 'items_ids': [items[0].id]}, {'coins': 10})
+        UserInventory.objects.filter(id=items[0].id).delete()
+
+        with self.assertRaises(ValidationError):
+            trade.accept_trade(self.recipient)
+
+        self.assertEqual(UserProfile.objects.get(user=self.requester).balance, 500)
+        self.assertEqual(Trade.objects.get(id=trade.id).status, Trade.Status.PENDING)
+
+    def test_accept_twice(self):
+        trade = self._trade({'coins': 100}, {'coins': 10})
+        Trade.objects.get(id=trade.id).accept_trade(self.recipient)
+
+        with self.assertRaises(ValidationError):
+            trade.accept_trade(self.recipient)
+        self.assertEqual(UserProfile.objects.get(user=self.requester).balance, 410)
+
+
+class TradeListViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('accounts:trade_list_create')
+
+    def _create_trades(self, count):
+        for i in range(count):
+            partner = User.objects.create_user(username=f'partner{Trade.objects.count()}', password='pass')
+            items = create_items(partner, 3)
+            Trade.objects.create(
+                requester=self.user,
+                recipient=partner,
+                requester_offer={'coins': 10},
+                recipient_offer={'items_ids': [item.id for item in items]},
+            )
+
+    def _get_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_offers_are_hydrated(self):
+        self._create_trades(1)
+        response, _ = self._get_queries()
+
+        trade = response.data['results'][0]
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(len(trade['recipient_offer']['items']), 3)
+        self.assertEqual(trade['requester']['id'], self.user.id)
+        self.assertNotIn('items', Trade.objects.get().recipient_offer)
+
+    def test_query_count_does_not_depend_on_trades(self):
+        self._create_trades(2)
+        _, few = self._get_queries()
+
+        self._create_trades(20)
+        _, many = self._get_queries()
+
+        self.assertEqual(few, many)
+
+    def test_pagination(self):
+        self._create_trades(3)
+        response = self.client.get(self.url, {'page_size': 2})
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+
+class InterleavedTradeTest(TestCase):
+    """
+    Гонки обменов без потоков: SQLite не поддерживает блокировки строк,
+    поэтому чередование обработчиков задаётся явно, и корректность держится
+    только на условных UPDATE статуса обмена и списания монет.
+    """
+    USERS = 4
+    TRADES = 40
+
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f'user{i}', password='pass') for i in range(self.USERS)]
+        for user in self.users:
+            set_balance(user, 100)
+
+    def test_stale_workers(self):
+        rng = random.Random(7)
+        trade_ids = []
+        for _ in range(self.TRADES):
+            requester, recipient = rng.sample(self.users, 2)
+            trade_ids.append(Trade.objects.create(
+                requester=requester,
+                recipient=recipient,
+                requester_offer={'coins': rng.randint(1, 60)},
+                recipient_offer={'coins': rng.randint(1, 60)},
+            ).id)
+
+        # Каждый обмен принимают два обработчика, и оба прочитали его до того, как любой начал запись
+        workers = [Trade.objects.select_related('requester', 'recipient').get(id=trade_id) for trade_id in trade_ids * 2]
+        rng.shuffle(workers)
+
+        accepted = 0
+        for trade in workers:
+            try:
+                trade.accept_trade(trade.recipient)
+            except ValidationError:
+                continue
+            accepted += 1
+
+        self.assertEqual(accepted, Trade.objects.filter(status=Trade.Status.ACCEPTED).count())
+        self.assertGreater(accepted, 0)
+        self.assertEqual(UserProfile.objects.aggregate(total=Sum('balance'))['total'], 100 * self.USERS)
+        self.assertFalse(UserProfile.objects.filter(balance__lt=0).exists())
+
+    def test_coins_spent_after_balance_check(self):
+        requester, recipient = self.users[:2]
+        set_balance(requester, 30)
+        trade = Trade.objects.create(
+            requester=requester, recipient=recipient, requester_offer={'coins': 20}, recipient_offer={},
+        )
+        move_items = TradeTransfer._move_items
+
+        def spend_then_move(offer, from_user_id, *args):
+            # Другой обработчик списывает монеты между проверкой баланса и переводом
+            if from_user_id == requester.id:
+                self.assertTrue(Ledger(requester).debit('shop', coins=20))
+            move_items(offer, from_user_id, *args)
+
+        with patch.object(TradeTransfer, '_move_items', side_effect=spend_then_move):
+            with self.assertRaises(ValidationError):
+                trade.accept_trade(recipient)
+
+        self.assertEqual(Trade.objects.get(id=trade.id).status, Trade.Status.PENDING)
+        self.assertEqual(UserProfile.objects.get(user=requester).balance, 30)
+
+
+@skipUnless(connection.features.has_select_for_update, 'Row locks are not supported by the database backend')
+class ConcurrentTradeTest(TransactionTestCase):
+    USERS = 4
+    TRADES = 40
+
+    def test_concurrent_accepts(self):
+        users = [User.objects.create_user(username=f'user{i}', password='pass') for i in range(self.USERS)]
+        for user in users:
+            set_balance(user, 100)
+
+        trades = []
+        for _ in range(self.TRADES):
+            requester, recipient = random.sample(users, 2)
+            trades.append(Trade.objects.create(
+                requester=requester,
+                recipient=recipient,
+                requester_offer={'coins': random.randint(1, 30)},
+                recipient_offer={'coins': random.randint(1, 30)},
+            ))
+
+        errors = []
+
+        def accept(trade):
+            try:
+                trade.accept_trade(trade.recipient)
+            except ValidationError:
+                pass
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=accept, args=(trade,)) for trade in trades]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(UserProfile.objects.aggregate(total=Sum('balance'))['total'], 100 * self.USERS)
+        self.assertFalse(UserProfile.objects.filter(balance__lt=0).exists())
@@ -0,0 +1,102 @@
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from core.accounts.ledger import Ledger
+from core.accounts.loadout import LoadoutResolver
+from core.accounts.models import Trade, UserInventory, UserProfile
+
+
+class TradeTransfer:
+    """
+    Проведение обмена между двумя пользователями.
+
+    Профили обоих участников блокируются в порядке user_id, поэтому встречные
+    обмены не взаимоблокируются. Предметы переходят к новому владельцу одним
+    UPDATE на каждую сторону (id записей инвентаря сохраняются), монеты —
+    через Ledger. Число запросов не зависит от количества предметов.
+    """
+    def __init__(self, trade: Trade) -> None:
+        self.trade = trade
+
+    def execute(self) -> None:
+        trade = self.trade
+        requester_coins = trade.requester_offer.get('coins', 0)
+        recipient_coins = trade.recipient_offer.get('coins', 0)
+
+        try:
+            with transaction.atomic():
+                balances = dict(
+                    UserProfile.objects.select_for_update()
+                    .filter(user_id__in=[trade.requester_id, trade.recipient_id])
+                    .order_by('user_id')
+                    .values_list('user_id', 'balance')
+                )
+
+                accepted = Trade.objects.filter(id=trade.id, status=Trade.Status.PENDING).update(
+                    status=Trade.Status.ACCEPTED, updated_at=timezone.now()
+                )
+                if not accepted:
+                    raise ValidationError("Trade is not in pending state")
+
+                if balances.get(trade.requester_id, 0) < requester_coins:
+                    raise ValidationError("Requester doesn't have enough coins")
+                if balances.get(trade.recipient_id, 0) < recipient_coins:
+                    raise ValidationError("Recipient doesn't have enough coins")
+
+                self._move_items(trade.requester_offer, trade.requester_id, trade.recipient_id, 'Requester')
+                self._move_items(trade.recipient_offer, trade.recipient_id, trade.requester_id, 'Recipient')
+
+                self._move_coins(trade.requester, recipient_coins - requester_coins)
+                self._move_coins(trade.recipient, requester_coins - recipient_coins)
+        except IntegrityError:
+            raise ValidationError("User already owns one of the traded items")
+
+        trade.status = Trade.Status.ACCEPTED
+
+    @staticmethod
+    def _move_items(offer: dict, from_user_id: int, to_user_id: int, side: str) -> None:
+        items_ids = set(offer.get('items_ids', []))
+        if not items_ids:
+            return
+
+        moved = UserInventory.objects.filter(id__in=items_ids, user_id=from_user_id).update(
+            user_id=to_user_id, is_equipped=False
+        )
+        if moved != len(items_ids):
+            raise ValidationError(f"{side} doesn't own all the items in the trade offer")
+
+    @staticmethod
+    def _move_coins(user, amount: int) -> None:
+        if amount and not Ledger(user).apply({'coins': amount}, 'trade'):
+            raise ValidationError("Not enough coins")
+
+
+class TradeHydrator:
+    """
+    Данные для сериализации страницы обменов: предметы обоих предложений
+    и аватары участников загружаются пачкой, а не отдельно для каждого обмена.
+    """
+    OFFERS = ('requester_offer', 'recipient_offer')
+
+    @classmethod
+    def context(cls, trades: list[Trade]) -> dict:
+        items_ids = set()
+        users_ids = set()
+        for trade in trades:
+            users_ids.update((trade.requester_id, trade.recipient_id))
+            for offer in cls.OFFERS:
+                items_ids.update(getattr(trade, offer).get('items_ids', []))
+
+        return {
+            'items': cls.items(items_ids),
+            'loadouts': LoadoutResolver.for_users(users_ids),
+        }
+
+    @staticmethod
+    def items(items_ids) -> dict:
+        """Сопоставляет id записей инвентаря с предметами магазина."""
+        if not items_ids:
+            return {}
+        inventories = UserInventory.objects.filter(id__in=items_ids).select_related('item')
+        return {inventory.id: inventory.item for inventory in inventories}
@@ -2,7 +2,8 @@
 from django.urls import path
 from .views import (UserProfileView, ApplyInventoryItemView, UserInventoryView, AchievementListView,
     AchievementClaimView, TradeListCreateView, TradeAcceptView, TradeRejectView, FriendsList,
-    AcceptFriendRequest, RejectFriendRequest, MakeFriendRequest, DailyRouletteView)
+    AcceptFriendRequest, RejectFriendRequest, MakeFriendRequest, FriendSuggestionsView, DailyRouletteView, LeaderboardView,
+    FeedView)
 
 app_name = 'accounts'
 
@@ -28,11 +29,18 @@ urlpatterns = [
 
     # friends
     path('friends/', FriendsList.as_view(), name='friends_list'),
+    path('friends/suggestions/', FriendSuggestionsView.as_view(), name='friend_suggestions'),
     path('friends/<int:user_id>/add/', MakeFriendRequest.as_view(), name='make_friend_request'),
     path('friends/<int:friend_request_id>/accept/', AcceptFriendRequest.as_view(), name='accept_friend_request'),
     path('friends/<int:friend_request_id>/reject/', RejectFriendRequest.as_view(), name='reject_friend_request'),
 
+    # feed
+    path('feed/', FeedView.as_view(), name='feed'),
+
     # roulettes
     path('daily_roulette/', DailyRouletteView.as_view(), name='daily_roulette'),
+
+    # leaderboards
+    path('leaderboard/<str:board>/', LeaderboardView.as_view(), name='leaderboard'),
     
 ]
\ No newline at end of file
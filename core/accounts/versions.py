@@ -0,0 +1,29 @@
+import time
+
+from core.accounts.models import CacheVersion
+
+
+class SharedVersion:
+    """
+    Версия данных, которые каждый процесс держит у себя: в памяти или в кэше Django.
+
+    CACHES в настройках не задан, и у web и run_outbox_worker свой LocMemCache,
+    поэтому версия, сдвинутая через кэш, видна только сдвинувшему её процессу.
+    Здесь версия хранится в таблице CacheVersion: процесс сверяет её одним
+    запросом по уникальному ключу и пересобирает свои данные, если она изменилась.
+    Версию нужно читать до загрузки данных, тогда данные не старше версии.
+
+    Сравнивается только равенство, поэтому при сдвиге пишется новое значение
+    time_ns(), а не инкремент: откат транзакции со сдвигом (например, в тестах)
+    не вернёт версию к значению, под которым процесс уже собрал свои данные.
+    """
+
+    @staticmethod
+    def get(key: str) -> int:
+        return CacheVersion.objects.filter(key=key).values_list('version', flat=True).first() or 0
+
+    @staticmethod
+    def bump(key: str) -> None:
+        version = time.time_ns()
+        if not CacheVersion.objects.filter(key=key).update(version=version):
+            CacheVersion.objects.update_or_create(key=key, defaults={'version': version})
@@ -11,9 +11,15 @@ from drf_yasg import openapi
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 
-from core.accounts.models import Achievement, UserProfile, UserInventory, Trade, FriendRelation
-from core.accounts.serializers import UserProfileSerializer, UserInventorySerializer, AchievementSerializer, TradeSerializer, CUDTradeSerializer
+from core.accounts.models import Achievement, UserProfile, UserInventory, Trade, FriendRelation, LeaderboardEntry
+from core.accounts.serializers import (UserProfileSerializer, UserInventorySerializer, AchievementSerializer, TradeSerializer,
+    CUDTradeSerializer, LeaderboardEntrySerializer, FriendSerializer, ActivitySerializer)
 from core.accounts.services import UserAchievementService
+from core.accounts.loadout import LoadoutResolver
+from core.accounts.leaderboard import Leaderboard
+from core.accounts.trading import TradeHydrator
+from core.accounts.friends import FriendGraph
+from core.accounts.feed import ActivityFeed
 from core.authentication.serializers import UserSerializer
 from core.docs.templates import AUTH_HEADER
 from core.utils.paginator import CustomPageNumberPagination
@@ -56,7 +62,7 @@ class UserInventoryView(generics.ListAPIView):
         return super().list(request, *args, **kwargs)
 
     def get_queryset(self):
-        return self.request.user.inventory.all()
+        return self.request.user.inventory.select_related('item').order_by('id')
 
 class ApplyInventoryItemView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -108,12 +114,12 @@ class AchievementListView(generics.ListAPIView):
         claimed = self.request.query_params.get('claimed', 'false').lower() == 'true'
     
         if all_achievements:
-            return Achievement.objects.all()
+            return Achievement.objects.prefetch_related('reward_items').order_by('id')
         
         return Achievement.objects.filter(
             userachievement__user=self.request.user,
             userachievement__is_claimed=claimed
-        )
+        ).prefetch_related('reward_items').order_by('id')
 
 
 class AchievementClaimView(APIView):
@@ -141,12 +147,15 @@ class TradeListCreateView(generics.ListCreateAPIView):
             openapi.Parameter('all', openapi.IN_QUERY, description='Show all trades', type=openapi.TYPE_BOOLEAN),
             openapi.Parameter('rejected', openapi.IN_QUERY, description='Filter by rejected status', type=openapi.TYPE_BOOLEAN),
             openapi.Parameter('accepted', openapi.IN_QUERY, description='Filter by accepted status', type=openapi.TYPE_BOOLEAN),
+            openapi.Parameter('page', openapi.IN_QUERY, description='Page number', type=openapi.TYPE_INTEGER),
+            openapi.Parameter('page_size', openapi.IN_QUERY, description='Number of results per page', type=openapi.TYPE_INTEGER),
         ],
         responses={200: TradeSerializer(many=True)}
     )
     def get(self, request, *args, **kwargs):
-        serializer = TradeSerializer(self.get_queryset(), many=True)
-        return Response(serializer.data)
+        trades = self.paginate_queryset(self.get_queryset().select_related('requester', 'recipient'))
+        serializer = TradeSerializer(trades, many=True, context=TradeHydrator.context(trades))
+        return self.get_paginated_response(serializer.data)
 
     @swagger_auto_schema(manual_parameters=[AUTH_HEADER])
     def post(self, request, *args, **kwargs):
@@ -224,21 +233,62 @@ class RejectFriendRequest(APIView):
         return Response({'message': 'Friend request rejected successfully'}, status=status.HTTP_200_OK)
 
 class FriendsList(generics.ListAPIView):
-    """Visible friends list with filtering by status (all, accepted, pending, rejected)"""
-    serializer_class = UserSerializer
+    """Visible friends list with filtering by status (accepted, pending)"""
+    serializer_class = FriendSerializer
     permission_classes = [permissions.IsAuthenticated]
-    pagination_class = CustomPageNumberPagination
     http_method_names = ['get']
 
-    @swagger_auto_schema(manual_parameters=[AUTH_HEADER])
+    @swagger_auto_schema(manual_parameters=[
+        AUTH_HEADER,
+        openapi.Parameter('status', openapi.IN_QUERY, description='accepted или pending', type=openapi.TYPE_STRING),
+        openapi.Parameter('after', openapi.IN_QUERY, description='Cursor: id of the last friend on the previous page', type=openapi.TYPE_INTEGER),
+        openapi.Parameter('limit', openapi.IN_QUERY, description='Number of friends per page (max 100)', type=openapi.TYPE_INTEGER),
+    ])
     def get(self, request, *args, **kwargs):
         status_ = self.request.query_params.get('status', 'accepted')
-        if status_ not in ['accepted', 'pending']:
-            status_ = 'accepted'
-        
-        friends = FriendRelation.get_user_friends(request.user, status_)
-        serializer = UserSerializer(friends, many=True)
-        return Response({'friends': serializer.data}, status=status.HTTP_200_OK)
+        if status_ == 'pending':
+            friends = FriendRelation.get_user_friends(request.user, status_)
+            loadouts = LoadoutResolver.for_users(friend.id for friend in friends)
+            serializer = UserSerializer(friends, many=True, context={'loadouts': loadouts})
+            return Response({'friends': serializer.data}, status=status.HTTP_200_OK)
+
+        try:
+            after = int(request.query_params['after']) if 'after' in request.query_params else None
+            limit = int(request.query_params.get('limit', FriendGraph.PAGE_SIZE))
+        except ValueError:
+            return Response({'error': 'after and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        graph = FriendGraph(request.user)
+        friends, next_cursor = graph.page(after=after, limit=limit)
+        ids = [friend.id for friend in friends]
+        serializer = FriendSerializer(friends, many=True, context={
+            'loadouts': LoadoutResolver.for_users(ids),
+            'mutual': graph.mutual_counts(ids),
+        })
+        return Response({'friends': serializer.data, 'next': next_cursor}, status=status.HTTP_200_OK)
+
+class FriendSuggestionsView(APIView):
+    """Friends of friends ranked by the number of mutual friends"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(manual_parameters=[
+        AUTH_HEADER,
+        openapi.Parameter('limit', openapi.IN_QUERY, description='Number of suggestions (max 100)', type=openapi.TYPE_INTEGER),
+    ])
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = int(request.query_params.get('limit', FriendGraph.PAGE_SIZE))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, FriendGraph.MAX_PAGE_SIZE))
+
+        suggestions = FriendGraph(request.user).suggestions(limit)
+        users = User.objects.select_related('profile').in_bulk([user_id for user_id, _ in suggestions])
+        serializer = FriendSerializer([users[user_id] for user_id, _ in suggestions], many=True, context={
+            'loadouts': LoadoutResolver.for_users(users),
+            'mutual': dict(suggestions),
+        })
+        return Response({'suggestions': serializer.data}, status=status.HTTP_200_OK)
 
 class DailyRouletteView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -256,11 +306,69 @@ class DailyRouletteView(APIView):
 
     @swagger_auto_schema(manual_parameters=[AUTH_HEADER])
     def get(self, request, *args, **kwargs):
-        roulette = DailyRoulette()
-        rewards = roulette.get_rewards_list()
-        _ = [reward.pop('weight') for reward in rewards]
+        try:
+            rewards = DailyRoulette.get_rewards_list()
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         return Response({'rewards': rewards}, status=status.HTTP_200_OK)
 
-# class Leaderboard():
-#     """Leaderboard top 100 users by XP, streaks, coins, etc."""
-#     pass
+class LeaderboardView(APIView):
+    """Leaderboard top 100 users by XP, streaks, coins"""
+    permission_classes = [permissions.IsAuthenticated]
+    MAX_LIMIT = Leaderboard.MAX_LIMIT
+
+    @swagger_auto_schema(manual_parameters=[
+        AUTH_HEADER,
+        openapi.Parameter('scope', openapi.IN_QUERY, description='global или friends', type=openapi.TYPE_STRING),
+        openapi.Parameter('limit', openapi.IN_QUERY, description='Number of users in the top (max 100)', type=openapi.TYPE_INTEGER),
+    ])
+    def get(self, request, *args, **kwargs):
+        board = kwargs.get('board')
+        if board not in LeaderboardEntry.Board.values:
+            return Response({'error': f'Invalid board: {board}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        scope = request.query_params.get('scope', 'global')
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', self.MAX_LIMIT)), self.MAX_LIMIT))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if scope == 'friends':
+            leaderboard = Leaderboard.for_friends(board, request.user)
+        else:
+            scope = 'global'
+            leaderboard = Leaderboard(board)
+
+        entries = leaderboard.top(limit)
+        loadouts = LoadoutResolver.for_users(entry.user_id for entry in entries)
+        serializer = LeaderboardEntrySerializer(entries, many=True, context={'loadouts': loadouts})
+
+        me = leaderboard.rank_of(request.user.id)
+        return Response({
+            'board': board,
+            'scope': scope,
+            'results': serializer.data,
+            'me': dict(rank=me[0], score=me[1]) if me else None,
+        }, status=status.HTTP_200_OK)
+
+
+class FeedView(APIView):
+    """Friends activity feed, newest first"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(manual_parameters=[
+        AUTH_HEADER,
+        openapi.Parameter('before', openapi.IN_QUERY, description='Cursor: id of the last activity on the previous page', type=openapi.TYPE_INTEGER),
+        openapi.Parameter('limit', openapi.IN_QUERY, description='Number of activities per page (max 100)', type=openapi.TYPE_INTEGER),
+    ])
+    def get(self, request, *args, **kwargs):
+        try:
+            before = int(request.query_params['before']) if 'before' in request.query_params else None
+            limit = int(request.query_params.get('limit', ActivityFeed.PAGE_SIZE))
+        except ValueError:
+            return Response({'error': 'before and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        activities, next_cursor = ActivityFeed(request.user).timeline(before=before, limit=limit)
+        loadouts = LoadoutResolver.for_users({activity.actor_id for activity in activities})
+        serializer = ActivitySerializer(activities, many=True, context={'loadouts': loadouts})
+        return Response({'results': serializer.data, 'next': next_cursor}, status=status.HTTP_200_OK)
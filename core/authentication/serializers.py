@@ -25,6 +25,9 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
     def get_avatar(self, obj):
+        loadouts = self.context.get('loadouts')
+        if loadouts is not None and obj.id in loadouts:
+            return loadouts[obj.id].avatar_url
         return obj.profile.avatar
     
 class RegisterSerializer(serializers.ModelSerializer):
@@ -18,13 +18,9 @@ class DreamAdmin(admin.ModelAdmin):
     list_display = ['title', 'user', 'category', 'price', 'is_active', 'created_at', 'likes_count']
     list_filter = ['category', 'is_active', 'is_private', 'created_at']
     search_fields = ['title', 'description', 'user__username']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['created_at', 'updated_at', 'likes_count']
     inlines = [DreamImageInline, DreamLikeInline]
 
-    def likes_count(self, obj):
-        return obj.likes.count()
-    likes_count.short_description = 'Likes'
-
 @admin.register(DreamImage)
 class DreamImageAdmin(admin.ModelAdmin):
     list_display = ['image', 'is_preview', 'created_at']
@@ -0,0 +1,106 @@
+import random
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+from core.dream.models import Dream, DreamLike, DreamLikeCounter
+from core.dream.trending import DreamTrending
+
+
+class DreamLikes:
+    """
+    Лайки мечты и их денормализованный счётчик Dream.likes_count.
+
+    Лайк ставится и снимается одной вставкой или удалением по уникальному
+    ключу (user, dream), а счётчик меняется атомарным инкрементом вместо
+    COUNT(*) при каждом чтении. У популярных мечт все инкременты упирались
+    бы в одну строку Dream, поэтому начиная с HOT_THRESHOLD лайков они
+    распределяются по SHARDS строкам DreamLikeCounter и периодически
+    переносятся в likes_count командой fold_like_counters. Рейтинг ленты
+    обновляется вместе со счётчиком, у популярных мечт — при переносе шардов.
+    """
+    HOT_THRESHOLD = 1000
+    SHARDS = 16
+
+    def __init__(self, dream: Dream) -> None:
+        self.dream = dream
+
+    def toggle(self, user) -> bool:
+        """Ставит лайк или снимает уже поставленный. Возвращает True, если лайк поставлен."""
+        with transaction.atomic():
+            if DreamLike.objects.filter(dream=self.dream, user=user).delete()[0]:
+                self._add(-1)
+                return False
+            try:
+                with transaction.atomic():
+                    DreamLike.objects.create(dream=self.dream, user=user)
+            except IntegrityError:
+                # Лайк только что поставил параллельный запрос
+                return True
+            self._add(1)
+            return True
+
+    @staticmethod
+    def count(dream: Dream) -> int:
+        pending = DreamLikeCounter.objects.filter(dream=dream).aggregate(total=Sum('delta'))['total']
+        return dream.likes_count + (pending or 0)
+
+    @staticmethod
+    def pending():
+        """Выражение для annotate: сумма ещё не перенесённых шардов мечты."""
+        shards = DreamLikeCounter.objects.filter(dream=OuterRef('pk')).values('dream').annotate(total=Sum('delta'))
+        return Coalesce(Subquery(shards.values('total')), 0)
+
+    @staticmethod
+    def fold() -> int:
+        """Переносит шарды в Dream.likes_count. Возвращает число обработанных мечт."""
+        folded = 0
+        for dream_id in DreamLikeCounter.objects.values_list('dream_id', flat=True).distinct().order_by():
+            with transaction.atomic():
+                rows = list(DreamLikeCounter.objects.select_for_update().filter(dream_id=dream_id).values_list('id', 'delta'))
+                if not rows:
+                    continue
+                total = sum(delta for _, delta in rows)
+                Dream.objects.filter(id=dream_id).update(likes_count=Greatest(F('likes_count') + total, 0))
+                # Удаляем только заблокированные строки: шард, созданный после выборки, дождётся следующего прохода
+                DreamLikeCounter.objects.filter(id__in=[row_id for row_id, _ in rows]).delete()
+                DreamTrending.refresh([dream_id])
+            folded += 1
+        return folded
+
+    @classmethod
+    def rebuild(cls, chunk_size: int = 1000) -> int:
+        """
+        Пересчитывает likes_count по таблице DreamLike и сбрасывает шарды.
+        Возвращает число мечт, у которых счётчик разошёлся с фактическим числом лайков.
+        """
+        actual = Coalesce(Subquery(
+            DreamLike.objects.filter(dream=OuterRef('pk')).values('dream').annotate(total=Count('id')).values('total')
+        ), 0)
+        fixed, last_id = 0, 0
+        while True:
+            ids = list(Dream.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                return fixed
+            last_id = ids[-1]
+            dreams = Dream.objects.filter(id__in=ids)
+            with transaction.atomic():
+                fixed += dreams.annotate(actual=actual, pending=cls.pending()).exclude(actual=F('likes_count') + F('pending')).count()
+                DreamLikeCounter.objects.filter(dream_id__in=ids).delete()
+                dreams.update(likes_count=actual)
+                DreamTrending.refresh(ids)
+
+    def _add(self, delta: int) -> None:
+        if self.dream.likes_count < self.HOT_THRESHOLD:
+            Dream.objects.filter(id=self.dream.id).update(
+                likes_count=Greatest(F('likes_count') + delta, 0),
+                trending_score=DreamTrending.score_expression(self.dream, likes_delta=delta),
+            )
+            return
+
+        shard = random.randrange(self.SHARDS)
+        counter = DreamLikeCounter.objects.filter(dream=self.dream, shard=shard)
+        if not counter.update(delta=F('delta') + delta):
+            DreamLikeCounter.objects.bulk_create([DreamLikeCounter(dream=self.dream, shard=shard)], ignore_conflicts=True)
+            counter.update(delta=F('delta') + delta)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.dream.likes import DreamLikes
+
+
+class Command(BaseCommand):
+    help = 'Переносит шарды счётчиков лайков популярных мечт в Dream.likes_count'
+
+    def handle(self, *args, **options):
+        folded = DreamLikes.fold()
+        self.stdout.write(self.style.SUCCESS(f'Folded like counters of {folded} dreams'))
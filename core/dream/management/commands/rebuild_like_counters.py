@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.dream.likes import DreamLikes
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики лайков мечт по таблице DreamLike'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = DreamLikes.rebuild(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt like counters, {fixed} dreams were out of sync'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.dream.trending import DreamTrending
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает прогресс и рейтинг ленты «в тренде» для всех мечт'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        refreshed = DreamTrending.refresh_all(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Refreshed trending scores of {refreshed} dreams'))
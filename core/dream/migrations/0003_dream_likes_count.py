@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-18 10:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_likes_count(apps, schema_editor):
+    Dream = apps.get_model('dream', 'Dream')
+    DreamLike = apps.get_model('dream', 'DreamLike')
+
+    likes = DreamLike.objects.filter(dream=OuterRef('pk')).values('dream').annotate(total=Count('id')).values('total')
+    Dream.objects.update(likes_count=Coalesce(Subquery(likes), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dream', '0002_dreamimage_is_preview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dream',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='DreamLikeCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('delta', models.IntegerField(default=0)),
+                ('dream', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='like_counters', to='dream.dream')),
+            ],
+            options={
+                'verbose_name': 'Шард счётчика лайков',
+                'verbose_name_plural': 'Шарды счётчиков лайков',
+                'constraints': [models.UniqueConstraint(fields=('dream', 'shard'), name='dream_like_counter_shard_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_likes_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2 on 2026-10-18 10:34
+
+import math
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+# Значения DreamTrending на момент миграции
+DECAY_SECONDS = 45000
+PROGRESS_WEIGHT = 1.0
+
+
+def backfill_trending(apps, schema_editor):
+    Dream = apps.get_model('dream', 'Dream')
+
+    dreams = list(Dream.objects.annotate(
+        steps_total=Count('steps', filter=Q(steps__is_dream_step=True)),
+        steps_done=Count('steps', filter=Q(steps__is_dream_step=True, steps__is_completed=True)),
+    ).only('id', 'likes_count', 'created_at'))
+    for dream in dreams:
+        dream.progress = dream.steps_done / dream.steps_total if dream.steps_total else 0
+        dream.trending_score = (
+            math.log10(dream.likes_count + 1) + PROGRESS_WEIGHT * dream.progress
+            + dream.created_at.timestamp() / DECAY_SECONDS
+        )
+    Dream.objects.bulk_update(dreams, ['progress', 'trending_score'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dream', '0003_dream_likes_count'),
+        ('todo', '0004_todo_dream'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dream',
+            name='progress',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dream',
+            name='trending_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='dream',
+            index=models.Index(fields=['is_private', 'trending_score', 'id'], name='dream_trending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dream',
+            index=models.Index(fields=['is_private', 'category', 'trending_score', 'id'], name='dream_trending_category_idx'),
+        ),
+        migrations.RunPython(backfill_trending, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
 
@@ -20,6 +21,10 @@ class Dream(models.Model):
 
     is_private = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
+    likes_count = models.PositiveIntegerField(default=0)
+    # Доля выполненных шагов и рейтинг ленты, пересчитываются DreamTrending
+    progress = models.FloatField(default=0)
+    trending_score = models.FloatField(default=0)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -27,6 +32,14 @@ class Dream(models.Model):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.trending_score:
+            from core.dream.trending import DreamTrending
+
+            # Новая мечта сразу попадает в ленту со своим весом по времени
+            self.trending_score = DreamTrending.score(self.likes_count, self.progress, self.created_at or timezone.now())
+        super().save(*args, **kwargs)
+
     def get_dream_with_images(self):
         return {
             'id': self.id,
@@ -48,11 +61,16 @@ class Dream(models.Model):
                 }
                 for image in self.images.all()
             ],
-            'likes_count': self.likes.count(),
+            'likes_count': self._get_likes_count(),
             'percentage_achieved': self._get_percentage_achieved()
         }
 
 
+    def _get_likes_count(self):
+        from core.dream.likes import DreamLikes
+
+        return DreamLikes.count(self)
+
     def _get_percentage_achieved(self):
         total_steps = self.user.todos.filter(is_dream_step=True, dream=self).count()
         completed_steps = self.user.todos.filter(is_dream_step=True, is_completed=True, dream=self).count()
@@ -60,17 +78,27 @@ class Dream(models.Model):
 
 
     def _achieve(self):
-        self.is_active = False
-        self.save()
-        self.__update_progress()
-
-    def __update_progress(self):
-        UserProgressService(self.user).update_stat('dreams_completed')
+        from core.accounts.feed import ActivityFeed, Verb
+        from core.accounts.progress import UserActionProgressService
+
+        with transaction.atomic():
+            # Условный UPDATE: мечту, уже достигнутую параллельным запросом, не публикуем повторно
+            if not Dream.objects.filter(id=self.id, is_active=True).update(is_active=False):
+                return
+            self.is_active = False
+            if not self.is_private:
+                ActivityFeed(self.user).publish(Verb.DREAM_ACHIEVED, {'dream_id': self.id, 'title': self.title})
+        UserActionProgressService(self.user).update_stat('dream_completed', trigger='dream_completed')
 
     class Meta:
         verbose_name = _('Мечта')
         verbose_name_plural = _('Мечты')
         unique_together = ('user', 'title')
+        indexes = [
+            # Лента публичных мечт: фильтр по is_private (и category), keyset по (trending_score, id)
+            models.Index(fields=['is_private', 'trending_score', 'id'], name='dream_trending_idx'),
+            models.Index(fields=['is_private', 'category', 'trending_score', 'id'], name='dream_trending_category_idx'),
+        ]
 
 
 class DreamImage(models.Model):
@@ -98,3 +126,23 @@ class DreamLike(models.Model):
         verbose_name = _('Лайк')
         verbose_name_plural = _('Лайки')
         unique_together = ('user', 'dream')
+
+
+class DreamLikeCounter(models.Model):
+    """
+    Шард счётчика лайков популярной мечты: накопленная разница,
+    которая ещё не перенесена в Dream.likes_count.
+    """
+    dream = models.ForeignKey(Dream, related_name='like_counters', on_delete=models.CASCADE)
+    shard = models.PositiveSmallIntegerField()
+    delta = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.dream_id} | {self.shard}: {self.delta}"
+
+    class Meta:
+        verbose_name = _('Шард счётчика лайков')
+        verbose_name_plural = _('Шарды счётчиков лайков')
+        constraints = [
+            models.UniqueConstraint(fields=['dream', 'shard'], name='dream_like_counter_shard_uniq'),
+        ]
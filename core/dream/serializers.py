@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from core.dream.likes import DreamLikes
 from core.dream.models import Dream, DreamImage
 from core.dream.services import DreamService
 
@@ -40,9 +41,10 @@ class DreamCUDSerializer(serializers.ModelSerializer):
 
 
 class DreamSerializer(serializers.ModelSerializer):
-    user_id = serializers.ReadOnlyField(source='user.id')
+    user_id = serializers.ReadOnlyField()
     images = serializers.SerializerMethodField()
     likes = serializers.SerializerMethodField()
+    liked_by_me = serializers.SerializerMethodField()
 
     class Meta:
         model = Dream
@@ -52,7 +54,17 @@ class DreamSerializer(serializers.ModelSerializer):
         return DreamImageSerializer(obj.images.all(), many=True).data
 
     def get_likes(self, obj):
-        return obj.likes.count()
+        if hasattr(obj, 'likes_pending'):
+            return obj.likes_count + obj.likes_pending
+        return DreamLikes.count(obj)
+
+    def get_liked_by_me(self, obj):
+        if hasattr(obj, 'liked_by_me'):
+            return obj.liked_by_me
+        user = getattr(self.context.get('request'), 'user', None)
+        if user is None or not user.is_authenticated:
+            return False
+        return obj.likes.filter(user=user).exists()
 
 class DreamImageSerializer(serializers.ModelSerializer):
     class Meta:
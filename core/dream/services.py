@@ -1,22 +1,33 @@
 from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch
 
 from rest_framework import serializers, status
 
 from core.dream import integrations
-from core.dream.models import Dream, DreamImage
+from core.dream.likes import DreamLikes
+from core.dream.trending import DreamTrending
+from core.dream.models import Dream, DreamImage, DreamLike
 from core.dream.validators import BaseImageValidator
 from core.todo.models import Todo
 
 class DreamService:
 
+    @staticmethod
+    def annotate_for_listing(queryset, user):
+        """
+        Всё, что нужно DreamSerializer, за один запрос и одну подгрузку картинок:
+        ещё не перенесённые шарды лайков, лайкнул ли пользователь и изображения мечты.
+        """
+        return queryset.annotate(
+            likes_pending=DreamLikes.pending(),
+            liked_by_me=Exists(DreamLike.objects.filter(dream=OuterRef('pk'), user=user)),
+        ).prefetch_related(Prefetch('images', queryset=DreamImage.objects.order_by('id')))
+
     @staticmethod
     def create_or_delete_like(dream, user):
-        if dream.likes.filter(user=user).exists():
-            dream.likes.remove(user)
-            return 'Like removed', status.HTTP_200_OK
-        else:
-            dream.likes.add(user)
+        if DreamLikes(dream).toggle(user):
             return 'Like added', status.HTTP_200_OK
+        return 'Like removed', status.HTTP_200_OK
 
     @classmethod
     def create_dream_with_images(cls, user, validated_data):
@@ -125,13 +136,13 @@ class DreamStepService:
                     is_dream_step=True,
                     dream=self.dream
                 )
+            DreamTrending.refresh([self.dream.id])
             return True
 
     @staticmethod
     def execute_dream_step(todo: Todo):
         todo.execute_task()
-        percentage_achieved = todo._get_percentage_achieved()
+        percentage_achieved = todo.dream._get_percentage_achieved()
         if percentage_achieved == 100:
-            todo.dream.is_completed = True
-            todo.dream.save()
+            todo.dream._achieve()
         return percentage_achieved
@@ -3,7 +3,9 @@ from rest_framework.test import APIClient
 
 
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 
@@ -13,7 +15,8 @@ from decimal import Decimal
 from PIL import Image
 from unittest.mock import patch
 
-from core.dream.models import Dream, DreamImage
+from core.dream.likes import DreamLikes
+from core.dream.models import Dream, DreamImage, DreamLike
 from core.dream.services import DreamService
 from core.todo.models import Todo
 
@@ -500,3 +503,56 @@ class TestDreamStepExecuteView(TestCase):
         
         with self.assertRaises(Todo.DoesNotExist):
             self.client.post(url)
+
+
+class DreamListQueryBudgetTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='lister', password='testpassword')
+        self.other = User.objects.create_user(username='liker', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _create_dreams(self, count, user):
+        start = Dream.objects.count()
+        dreams = Dream.objects.bulk_create([
+            Dream(user=user, title=f'Dream {start + i}', is_private=False, likes_count=1) for i in range(count)
+        ])
+        DreamImage.objects.bulk_create([
+            DreamImage(dream=dream, image=f'dream_images/{dream.id}_{n}.jpg', is_preview=n == 0)
+            for dream in dreams for n in range(2)
+        ])
+        DreamLike.objects.bulk_create([DreamLike(user=self.other, dream=dream) for dream in dreams])
+        return dreams
+
+    def _queries(self, url):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url, {'page_size': 100})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(captured)
+
+    def test_dream_list_query_count_is_flat(self):
+        url = reverse('dream:dreams')
+        self._create_dreams(1, self.user)
+        small = self._queries(url)
+        self._create_dreams(20, self.user)
+        self.assertEqual(self._queries(url), small)
+
+    def test_public_list_query_count_is_flat(self):
+        url = reverse('dream:public_dreams')
+        self._create_dreams(1, self.other)
+        small = self._queries(url)
+        self._create_dreams(20, self.other)
+        self.assertEqual(self._queries(url), small)
+
+    def test_likes_and_liked_by_me(self):
+        liked, not_liked = self._create_dreams(2, self.other)
+        DreamLikes(liked).toggle(self.user)
+
+        response = self.client.get(reverse('dream:public_dreams'))
+        data = {dream['id']: dream for dream in response.data['results']}
+        self.assertEqual((data[liked.id]['likes'], data[liked.id]['liked_by_me']), (2, True))
+        self.assertEqual((data[not_liked.id]['likes'], data[not_liked.id]['liked_by_me']), (1, False))
+        self.assertEqual(len(data[liked.id]['images']), 2)
+
+        response = self.client.get(reverse('dream:dream', kwargs={'id': liked.id}))
+        self.assertEqual((response.data['likes'], response.data['liked_by_me']), (2, True))
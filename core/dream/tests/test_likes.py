@@ -0,0 +1,88 @@
+from io import StringIO
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.dream.likes import DreamLikes
+from core.dream.models import Dream, DreamLike, DreamLikeCounter
+
+User = get_user_model()
+
+
+class DreamLikesTest(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='pass')
+        self.dream = Dream.objects.create(user=self.owner, title='Viral dream')
+        self.users = User.objects.bulk_create([User(username=f'fan{i}') for i in range(5)])
+
+    def _reload(self):
+        self.dream.refresh_from_db()
+        return self.dream
+
+    def test_toggle(self):
+        likes = DreamLikes(self.dream)
+        self.assertTrue(likes.toggle(self.users[0]))
+        self.assertTrue(likes.toggle(self.users[1]))
+        self.assertEqual(self._reload().likes_count, 2)
+
+        self.assertFalse(DreamLikes(self.dream).toggle(self.users[0]))
+        self.assertEqual(self._reload().likes_count, 1)
+        self.assertEqual(list(DreamLike.objects.values_list('user_id', flat=True)), [self.users[1].id])
+
+    def test_unlike_is_single_delete_and_update(self):
+        DreamLikes(self.dream).toggle(self.users[0])
+        likes = DreamLikes(self._reload())
+        with self.assertNumQueries(4):  # SAVEPOINT, DELETE, UPDATE, RELEASE
+            likes.toggle(self.users[0])
+
+    def test_hot_dream_uses_shards(self):
+        Dream.objects.filter(id=self.dream.id).update(likes_count=DreamLikes.HOT_THRESHOLD)
+        dream = self._reload()
+        for user in self.users:
+            DreamLikes(dream).toggle(user)
+        DreamLikes(dream).toggle(self.users[0])
+
+        self.assertEqual(self._reload().likes_count, DreamLikes.HOT_THRESHOLD)
+        self.assertTrue(DreamLikeCounter.objects.filter(dream=dream).exists())
+        self.assertEqual(DreamLikes.count(dream), DreamLikes.HOT_THRESHOLD + 4)
+
+        self.assertEqual(DreamLikes.fold(), 1)
+        self.assertEqual(self._reload().likes_count, DreamLikes.HOT_THRESHOLD + 4)
+        self.assertFalse(DreamLikeCounter.objects.exists())
+
+    def test_rebuild(self):
+        other = Dream.objects.create(user=self.owner, title='Other dream')
+        DreamLike.objects.bulk_create([DreamLike(user=user, dream=self.dream) for user in self.users])
+        DreamLike.objects.create(user=self.users[0], dream=other)
+        Dream.objects.filter(id=other.id).update(likes_count=1)
+        DreamLikeCounter.objects.create(dream=self.dream, shard=0, delta=7)
+
+        call_command('rebuild_like_counters', chunk_size=1, stdout=StringIO())
+
+        self.assertEqual(self._reload().likes_count, 5)
+        self.assertEqual(Dream.objects.get(id=other.id).likes_count, 1)
+        self.assertFalse(DreamLikeCounter.objects.exists())
+        self.assertEqual(DreamLikes.rebuild(), 0)
+
+
+class LikeDreamViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='fan', password='pass')
+        self.dream = Dream.objects.create(user=self.user, title='Liked dream')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_like_and_list(self):
+        url = reverse('dream:like_dream', kwargs={'id': self.dream.id})
+        self.assertEqual(self.client.post(url).data['message'], 'Like added')
+
+        DreamLikeCounter.objects.create(dream=self.dream, shard=3, delta=2)
+        data = self.client.get(reverse('dream:dreams')).data['results'][0]
+        self.assertEqual((data['likes'], data['liked_by_me']), (3, True))
+
+        self.assertEqual(self.client.post(url).data['message'], 'Like removed')
+        self.assertEqual(Dream.objects.get(id=self.dream.id).likes_count, 0)
@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from core.accounts.outbox import Outbox
+from core.dream.likes import DreamLikes
+from core.dream.models import Dream
+from core.dream.services import DreamStepService
+from core.dream.trending import DreamTrending
+from core.todo.models import Todo
+
+User = get_user_model()
+
+
+class DreamTrendingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='dreamer', password='pass')
+        self.dream = Dream.objects.create(user=self.user, title='Trip')
+
+    def tearDown(self):
+        cache.clear()
+
+    def _score(self):
+        self.dream.refresh_from_db()
+        return self.dream.trending_score
+
+    def test_score(self):
+        now = timezone.now()
+        self.assertGreater(DreamTrending.score(10, 0, now), DreamTrending.score(1, 0, now))
+        self.assertGreater(DreamTrending.score(0, 1, now), DreamTrending.score(0, 0.5, now))
+        # DECAY_SECONDS возраста весят как десятикратная разница в лайках
+        older = now - timedelta(seconds=DreamTrending.DECAY_SECONDS)
+        self.assertAlmostEqual(DreamTrending.score(99, 0, older), DreamTrending.score(9, 0, now))
+
+    def test_new_dream_is_scored(self):
+        self.assertAlmostEqual(self._score(), DreamTrending.score(0, 0, self.dream.created_at), places=3)
+
+    def test_like_updates_score(self):
+        fans = User.objects.bulk_create([User(username=f'fan{i}') for i in range(3)])
+        for fan in fans:
+            DreamLikes(self.dream).toggle(fan)
+            self.dream.refresh_from_db()
+        DreamLikes(self.dream).toggle(fans[0])
+
+        self.assertAlmostEqual(self._score(), DreamTrending.score(2, 0, self.dream.created_at))
+
+    def test_hot_dream_score_follows_fold(self):
+        Dream.objects.filter(id=self.dream.id).update(likes_count=DreamLikes.HOT_THRESHOLD)
+        self.dream.refresh_from_db()
+        DreamLikes(self.dream).toggle(User.objects.create_user(username='fan', password='pass'))
+
+        DreamLikes.fold()
+        self.assertAlmostEqual(self._score(), DreamTrending.score(DreamLikes.HOT_THRESHOLD + 1, 0, self.dream.created_at))
+
+    def test_steps_update_progress(self):
+        DreamStepService(self.dream).dumb_create_steps([{'title': 'Save', 'difficulty': 1}, {'title': 'Fly', 'difficulty': 1}])
+        self.dream.refresh_from_db()
+        self.assertEqual(self.dream.progress, 0)
+
+        step = Todo.objects.filter(dream=self.dream).first()
+        step.execute_task()
+        self.assertEqual(Outbox.process_batch(), 1)
+
+        self.dream.refresh_from_db()
+        self.assertEqual(self.dream.progress, 0.5)
+        self.assertAlmostEqual(self.dream.trending_score, DreamTrending.score(0, 0.5, self.dream.created_at))
+
+    def test_refresh_all(self):
+        Dream.objects.update(trending_score=0, progress=1)
+        self.assertEqual(DreamTrending.refresh_all(chunk_size=1), 1)
+        self.assertAlmostEqual(self._score(), DreamTrending.score(0, 0, self.dream.created_at))
+
+
+class TrendingFeedViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('dream:public_dreams')
+
+        categories = [Dream.DreamCategory.CAR, Dream.DreamCategory.TRAVEL]
+        self.dreams = Dream.objects.bulk_create([
+            Dream(user=self.user, title=f'Dream {i}', category=categories[i % 2], trending_score=i % 7)
+            for i in range(25)
+        ])
+        Dream.objects.create(user=self.user, title='Private', is_private=True, trending_score=100)
+
+    def _pages(self, params):
+        ids, url = [], self.url
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            ids += [dream['id'] for dream in response.data['results']]
+            url, params = response.data['next'], None
+        return ids
+
+    def test_feed_is_ranked_and_paginated(self):
+        expected = [d.id for d in sorted(self.dreams, key=lambda d: (d.trending_score, d.id), reverse=True)]
+        self.assertEqual(self._pages({'page_size': 4}), expected)
+
+    def test_category_filter(self):
+        ids = self._pages({'page_size': 5, 'category': Dream.DreamCategory.TRAVEL})
+        self.assertEqual(set(ids), {d.id for d in self.dreams if d.category == Dream.DreamCategory.TRAVEL})
+
+        response = self.client.get(self.url, {'category': 'SPACE'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_deep_page_costs_the_same(self):
+        def queries(url, params=None):
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.get(url, params)
+            return len(captured), response.data['next']
+
+        first, next_url = queries(self.url, {'page_size': 5})
+        for _ in range(3):
+            deep, next_url = queries(next_url)
+        self.assertEqual(first, deep)
@@ -0,0 +1,65 @@
+import math
+from datetime import datetime
+
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Greatest, Log
+
+from core.dream.models import Dream
+
+
+class DreamTrending:
+    """
+    Рейтинг мечт для ленты «в тренде».
+
+    score = log10(лайки + 1) + PROGRESS_WEIGHT * доля выполненных шагов + created_at / DECAY_SECONDS
+
+    Слагаемое времени растёт вместе с датой создания, поэтому старые мечты
+    опускаются относительно новых без периодического пересчёта всей таблицы:
+    каждые DECAY_SECONDS возраста весят как десятикратная разница в лайках.
+    Рейтинг хранится в Dream.trending_score (индексы dream_trending_*) и
+    пересчитывается точечно, когда меняются лайки или шаги мечты.
+    """
+    DECAY_SECONDS = 45000
+    PROGRESS_WEIGHT = 1.0
+
+    @classmethod
+    def score(cls, likes: int, progress: float, created_at: datetime) -> float:
+        return math.log10(max(likes, 0) + 1) + cls.PROGRESS_WEIGHT * progress + created_at.timestamp() / cls.DECAY_SECONDS
+
+    @classmethod
+    def score_expression(cls, dream: Dream, likes_delta: int = 0):
+        """
+        Рейтинг как SQL-выражение от текущих likes_count и progress, чтобы
+        обновлять его в том же UPDATE, что и счётчик, без гонок между запросами.
+        """
+        return (
+            Log(10, Greatest(F('likes_count') + likes_delta, 0) + 1)
+            + F('progress') * cls.PROGRESS_WEIGHT
+            + Value(dream.created_at.timestamp() / cls.DECAY_SECONDS)
+        )
+
+    @classmethod
+    def refresh(cls, dream_ids) -> int:
+        """Пересчитывает прогресс и рейтинг мечт: один SELECT и один bulk_update."""
+        from core.dream.likes import DreamLikes
+
+        dreams = list(Dream.objects.filter(id__in=set(dream_ids)).annotate(
+            likes_pending=DreamLikes.pending(),
+            steps_total=Count('steps', filter=Q(steps__is_dream_step=True)),
+            steps_done=Count('steps', filter=Q(steps__is_dream_step=True, steps__is_completed=True)),
+        ).only('id', 'likes_count', 'created_at'))
+        for dream in dreams:
+            dream.progress = dream.steps_done / dream.steps_total if dream.steps_total else 0
+            dream.trending_score = cls.score(dream.likes_count + dream.likes_pending, dream.progress, dream.created_at)
+        Dream.objects.bulk_update(dreams, ['progress', 'trending_score'])
+        return len(dreams)
+
+    @classmethod
+    def refresh_all(cls, chunk_size: int = 1000) -> int:
+        refreshed, last_id = 0, 0
+        while True:
+            ids = list(Dream.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                return refreshed
+            last_id = ids[-1]
+            refreshed += cls.refresh(ids)
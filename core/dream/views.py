@@ -1,14 +1,19 @@
 from rest_framework import generics, mixins, permissions, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
+from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 
+from django.core.exceptions import ValidationError as DjangoValidationError
+
 from core.docs.templates import AUTH_HEADER
 from core.dream.models import Dream
 from core.dream.serializers import DreamCUDSerializer, DreamSerializer
 from core.dream.services import DreamService, DreamStepService
-from core.utils.paginator import CustomPageNumberPagination
+from core.dream.trending import DreamTrending
+from core.utils.paginator import CustomPageNumberPagination, KeysetPagination
 from core.todo.models import Todo
 from core.todo.serializers import TodoSerializer
 
@@ -38,6 +43,12 @@ class DreamView(mixins.CreateModelMixin,
     def delete(self, request, *args, **kwargs):
         return self.destroy(request, *args, **kwargs)
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method == 'GET':
+            queryset = DreamService.annotate_for_listing(queryset, self.request.user)
+        return queryset
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
@@ -59,21 +70,55 @@ class DreamListView(generics.ListAPIView):
         if getattr(self, 'swagger_fake_view', False):
             return Dream.objects.none()
         
-        return Dream.objects.filter(user=self.request.user)
+        queryset = Dream.objects.filter(user=self.request.user).order_by('id')
+        return DreamService.annotate_for_listing(queryset, self.request.user)
 
 class PublicDreamListView(generics.ListAPIView):
+    """
+    Лента публичных мечт «в тренде»: по убыванию DreamTrending-рейтинга
+    с курсорной пагинацией по индексам dream_trending_*
+    """
     serializer_class = DreamSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_orderings = ['-trending_score']
 
-    @swagger_auto_schema(manual_parameters=[AUTH_HEADER])
+    @swagger_auto_schema(manual_parameters=[AUTH_HEADER,
+            openapi.Parameter(
+                'category',
+                openapi.IN_QUERY,
+                description='Фильтрация по категории: CAR, TRAVEL, HOME, OTHER',
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description='Курсор следующей страницы (из поля next)',
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'page_size',
+                openapi.IN_QUERY,
+                description='Размер страницы (до 100)',
+                type=openapi.TYPE_INTEGER
+            )
+        ]
+    )
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
             return Dream.objects.none()
-        
-        return Dream.objects.filter(is_private=False)
+
+        # __in вместо точного сравнения, чтобы SQLite использовал индексы dream_trending_*
+        queryset = Dream.objects.filter(is_private__in=[False])
+        category = self.request.query_params.get('category')
+        if category:
+            if category not in Dream.DreamCategory.values:
+                raise ValidationError({'category': f'Unknown category: {category}'})
+            queryset = queryset.filter(category__in=[category])
+        return DreamService.annotate_for_listing(queryset, self.request.user)
 
 class LikeDreamView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -113,7 +158,9 @@ class DreamStepListCreateView(generics.ListCreateAPIView):
         return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer):
-        serializer.save(is_dream_step=True)
+        step = serializer.save(is_dream_step=True)
+        if step.dream_id:
+            DreamTrending.refresh([step.dream_id])
 
 
 class DreamStepRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
@@ -145,6 +192,17 @@ class DreamStepRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     def delete(self, request, *args, **kwargs):
         return super().destroy(request, *args, **kwargs)
 
+    def perform_update(self, serializer):
+        step = serializer.save()
+        if step.dream_id:
+            DreamTrending.refresh([step.dream_id])
+
+    def perform_destroy(self, instance):
+        dream_id = instance.dream_id
+        instance.delete()
+        if dream_id:
+            DreamTrending.refresh([dream_id])
+
 class DreamStepExecuteView(APIView):
     """
     Выполняет шаг к мечте
@@ -155,7 +213,10 @@ class DreamStepExecuteView(APIView):
     def post(self, request, *args, **kwargs):
         todo_id = kwargs.get('id')
         todo_obj = Todo.objects.get(id=todo_id)
-        DreamStepService.execute_dream_step(todo_obj)
+        try:
+            DreamStepService.execute_dream_step(todo_obj)
+        except DjangoValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
         return Response({'message': 'Step executed successfully'}, status=status.HTTP_200_OK)
 
 class DreamStepGenerateView(APIView):
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import BackgroundItem, AvatarItem, IconItem, BoostItem, BaseShopItem
+from .models import BackgroundItem, AvatarItem, IconItem, BoostItem, BaseShopItem, ShopOrder
 
 @admin.register(BaseShopItem)
 class BaseShopItemAdmin(admin.ModelAdmin):
@@ -41,4 +41,11 @@ class IconItemAdmin(admin.ModelAdmin):
 class BoostItemAdmin(admin.ModelAdmin):
     list_display = ('name', 'rarity', 'boost_type', 'multiplier', 'duration_minutes', 'price', 'is_active')
     list_filter = ('boost_type', 'rarity', 'is_active')
-    search_fields = ('name',)
\ No newline at end of file
+    search_fields = ('name',)
+
+
+@admin.register(ShopOrder)
+class ShopOrderAdmin(admin.ModelAdmin):
+    list_display = ('user', 'items_ids', 'coins', 'crystals', 'created_at')
+    search_fields = ('user__username', 'idempotency_key')
+    raw_id_fields = ('user',)
@@ -0,0 +1,61 @@
+import hashlib
+
+from core.accounts.models import User, UserInventory
+from core.accounts.versions import SharedVersion
+from core.shop.models import BaseShopItem
+
+
+class Catalog:
+    """
+    Снимок каталога магазина, общий для всех пользователей.
+
+    Каталог меняется редко, поэтому сериализованные предметы хранятся в процессе
+    и пересобираются, когда меняется общая версия в БД (SharedVersion; её сдвигает
+    сохранение или удаление любого предмета в любом процессе). На каждый запрос
+    сверяется версия и считается набор купленных пользователем предметов.
+    После bulk_create/update предметов нужно вызвать Catalog.invalidate()
+    вручную — сигналы для них не отправляются.
+    """
+    VERSION_KEY = 'shop:catalog'
+    FIELDS = ['id', 'name', 'description', 'image', 'price', 'type', 'rarity', 'is_active', 'is_donation_only']
+
+    # (версия, предметы) одним кортежем, чтобы версия не разошлась со снимком
+    _snapshot: tuple[int, list[dict]] | None = None
+
+    @classmethod
+    def invalidate(cls) -> None:
+        SharedVersion.bump(cls.VERSION_KEY)
+
+    @classmethod
+    def items(cls, type: str | None = None) -> tuple[int, list[dict]]:
+        """Возвращает версию снимка и его предметы; версия нужна для etag()."""
+        version = SharedVersion.get(cls.VERSION_KEY)
+        if cls._snapshot is None or cls._snapshot[0] != version:
+            cls._snapshot = (version, cls._build())
+
+        items = cls._snapshot[1]
+        if type:
+            items = [item for item in items if item['type'] == type]
+        return version, items
+
+    @staticmethod
+    def owned_ids(user: User) -> set[int]:
+        return set(UserInventory.objects.filter(user=user).values_list('item_id', flat=True))
+
+    @classmethod
+    def etag(cls, version: int, url: str, owned_ids) -> str:
+        """
+        ETag страницы: версия каталога, полный адрес запроса и купленные предметы на странице.
+        Хост входит в адрес, потому что ссылки на картинки в ответе абсолютные.
+        """
+        key = f'{version}:{url}:{",".join(map(str, sorted(owned_ids)))}'
+        return hashlib.md5(key.encode()).hexdigest()
+
+    @classmethod
+    def _build(cls) -> list[dict]:
+        items = []
+        for item in BaseShopItem.objects.filter(is_active=True).order_by('id'):
+            row = {field: getattr(item, field) for field in cls.FIELDS}
+            row['image'] = item.image.url if item.image else None
+            items.append(row)
+        return items
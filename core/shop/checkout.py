@@ -0,0 +1,90 @@
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from core.accounts.ledger import Ledger
+from core.accounts.models import User, UserInventory, UserProfile, OutboxEvent
+from core.accounts.outbox import Outbox
+from core.shop.models import BaseShopItem, ShopOrder
+
+
+class Checkout:
+    """
+    Покупка корзины предметов.
+
+    Предметы и уже купленные пользователем позиции проверяются двумя запросами
+    на всю корзину, монеты и кристаллы списываются одним условным UPDATE
+    через Ledger, записи инвентаря создаются одним bulk_create, а в очередь
+    уходит одно событие на весь заказ. Повтор запроса с тем же ключом
+    идемпотентности возвращает уже оформленный заказ и ничего не списывает,
+    а повтор ключа с другой корзиной отклоняется с кодом KEY_REUSED.
+    """
+    KEY_REUSED = 'idempotency_key_reused'
+    MAX_ITEMS = 50
+
+    def __init__(self, user: User) -> None:
+        self.user = user
+
+    def buy(self, items_ids: list[int], idempotency_key: str | None = None) -> tuple[ShopOrder, bool]:
+        """Возвращает (заказ, создан ли он этим вызовом)."""
+        if idempotency_key:
+            order = self._find(idempotency_key, items_ids)
+            if order is not None:
+                return order, False
+
+        items = self._items(items_ids)
+        coins = sum(item.price for item in items if not item.is_donation_only)
+        crystals = sum(item.price for item in items if item.is_donation_only)
+
+        try:
+            with transaction.atomic():
+                order = ShopOrder.objects.create(
+                    user=self.user,
+                    idempotency_key=idempotency_key or None,
+                    items_ids=[item.id for item in items],
+                    coins=coins,
+                    crystals=crystals,
+                )
+                if not Ledger(self.user).debit('item_bought', coins=coins, crystals=crystals):
+                    raise ValidationError(self._shortage_message(coins, crystals))
+
+                UserInventory.objects.bulk_create([UserInventory(user=self.user, item=item) for item in items])
+                Outbox.publish(self.user, OutboxEvent.Kind.ITEM_BOUGHT, {'items_ids': order.items_ids})
+        except IntegrityError:
+            # Параллельный запрос с тем же ключом или теми же предметами успел раньше
+            order = self._find(idempotency_key, items_ids) if idempotency_key else None
+            if order is None:
+                raise ValidationError('Предмет уже куплен')
+            return order, False
+
+        return order, True
+
+    def _find(self, idempotency_key: str, items_ids: list[int]) -> ShopOrder | None:
+        order = ShopOrder.objects.filter(user=self.user, idempotency_key=idempotency_key).first()
+        if order is not None and set(order.items_ids) != set(items_ids):
+            raise ValidationError('Ключ идемпотентности уже использован для другой корзины', code=self.KEY_REUSED)
+        return order
+
+    def _shortage_message(self, coins: int, crystals: int) -> str:
+        """Называет валюту, которой не хватило: списание проверяет обе сразу."""
+        balance, donation_balance = UserProfile.objects.filter(user_id=self.user.id).values_list(
+            'balance', 'donation_balance'
+        ).get()
+        short = [name for name, price, available in (
+            ('монет', coins, balance),
+            ('кристаллов', crystals, donation_balance),
+        ) if price > available]
+        return f"Недостаточно {' и '.join(short or ['монет'])}"
+
+    def _items(self, items_ids: list[int]) -> list[BaseShopItem]:
+        items_ids = list(dict.fromkeys(items_ids))
+        if not items_ids:
+            raise ValidationError('Корзина пуста')
+        if len(items_ids) > self.MAX_ITEMS:
+            raise ValidationError(f'В корзине может быть не больше {self.MAX_ITEMS} предметов')
+
+        items = BaseShopItem.objects.filter(is_active=True).in_bulk(items_ids)
+        if len(items) != len(items_ids):
+            raise ValidationError('Предмет не доступен')
+        if UserInventory.objects.filter(user=self.user, item_id__in=items_ids).exists():
+            raise ValidationError('Предмет уже куплен')
+        return [items[item_id] for item_id in items_ids]
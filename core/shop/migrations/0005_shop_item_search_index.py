@@ -0,0 +1,76 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+from django.db.models.functions import Cast, Upper
+
+
+FTS_TABLE = 'shop_item_fts'
+SEARCH_INDEX = 'shop_item_search_idx'
+TRIGRAM_INDEX = 'shop_item_name_trgm_idx'
+
+SQLITE_CREATE = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(name, description, content='shop_baseshopitem', content_rowid='id')",
+    f"""CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON shop_baseshopitem BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON shop_baseshopitem BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON shop_baseshopitem BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_DROP = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def postgres_indexes():
+    return [
+        GinIndex(SearchVector('name', 'description', config='simple'), name=SEARCH_INDEX),
+        # name__icontains на PostgreSQL: UPPER(name::text) LIKE UPPER(%s)
+        GinIndex(
+            OpClass(Upper(Cast('name', models.TextField())), name='gin_trgm_ops'),
+            name=TRIGRAM_INDEX,
+        ),
+    ]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for sql in SQLITE_CREATE:
+            schema_editor.execute(sql)
+    elif vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        model = apps.get_model('shop', 'BaseShopItem')
+        for index in postgres_indexes():
+            schema_editor.add_index(model, index)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for sql in SQLITE_DROP:
+            schema_editor.execute(sql)
+    elif vendor == 'postgresql':
+        model = apps.get_model('shop', 'BaseShopItem')
+        for index in postgres_indexes():
+            schema_editor.remove_index(model, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0004_baseshopitem_is_donation_only'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -1,9 +1,14 @@
+from collections import defaultdict
+
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.db import transaction
 
-from core.accounts.models import UserInventory
+from core.accounts.models import UserInventory, UserBoost
+from core.accounts.boosts import ActiveBoosts
+from core.accounts.feed import ActivityFeed, Verb
 from .interfaces import SaveableItemMixin, ApplicableItemMixin
 
 User = get_user_model()
@@ -37,41 +42,48 @@ class BaseShopItem(models.Model):
         abstract = False
 
     def buy_item(self, user) -> tuple[bool, str]:
-        if not self.is_active:
-            return False, 'Предмет не доступен'
-
-        if self.is_donation_only:
-            if self.price > user.profile.donation_balance:
-                return False, 'Недостаточно кристаллов'
-            user.profile.donation_balance -= self.price
-        else:
-            if self.price > user.profile.balance:
-                return False, 'Недостаточно монет'
-            user.profile.balance -= self.price
-            
-        with transaction.atomic():
-            user.profile.save()
-            UserInventory.objects.create(user=user, item=self)
-            self.__update_progress()
+        from core.shop.checkout import Checkout
 
+        try:
+            Checkout(user).buy([self.id])
+        except ValidationError as e:
+            return False, e.messages[0]
         return True, 'Предмет успешно куплен'
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def get_item_classes(cls) -> dict:
+        return {
+            cls.ItemType.BACKGROUND: BackgroundItem,
+            cls.ItemType.AVATAR: AvatarItem,
+            cls.ItemType.ICON: IconItem,
+            cls.ItemType.BOOST: BoostItem
+        }
+
     def get_instance_by_type(self):
-        item_class = {
-            self.ItemType.BACKGROUND: BackgroundItem,
-            self.ItemType.AVATAR: AvatarItem,
-            self.ItemType.ICON: IconItem,
-            self.ItemType.BOOST: BoostItem
-        }.get(self.type)
+        item_class = self.get_item_classes().get(self.type)
 
         return item_class.objects.get(id=self.id)
 
-    def __update_progress(self):
-        UserProgressService(self.user).update_stat('items_bought')
-        AchievementService(self.user).check_achievements('total_purchases', {'total_purchases': self.user.inventory.count()})
+    @classmethod
+    def get_instances_by_type(cls, items) -> list:
+        """
+        Типизированные экземпляры для списка предметов в том же порядке.
+        Делает по одному запросу на каждый встретившийся тип, а не на каждый предмет.
+        """
+        items = list(items)
+        ids_by_type = defaultdict(list)
+        for item in items:
+            ids_by_type[item.type].append(item.id)
+
+        typed = {}
+        item_classes = cls.get_item_classes()
+        for item_type, ids in ids_by_type.items():
+            if item_type in item_classes:
+                typed.update(item_classes[item_type].objects.in_bulk(ids))
+        return [typed.get(item.id, item) for item in items]
 
 class BackgroundItem(BaseShopItem, SaveableItemMixin, ApplicableItemMixin):
     def save(self, *args, **kwargs):
@@ -82,6 +94,7 @@ class BackgroundItem(BaseShopItem, SaveableItemMixin, ApplicableItemMixin):
         with transaction.atomic():
             UserInventory.objects.filter(user=user, item__type=self.ItemType.BACKGROUND).update(is_equipped=False)
             UserInventory.objects.update_or_create(user=user, item=self, defaults={'is_equipped': True})
+            ActivityFeed(user).publish(Verb.ITEM_EQUIPPED, {'item_id': self.id, 'name': self.name, 'type': self.type})
 
 class AvatarItem(BaseShopItem, SaveableItemMixin, ApplicableItemMixin):
     def save(self, *args, **kwargs):
@@ -92,6 +105,7 @@ class AvatarItem(BaseShopItem, SaveableItemMixin, ApplicableItemMixin):
         with transaction.atomic():
             UserInventory.objects.filter(user=user, item__type=self.ItemType.AVATAR).update(is_equipped=False)
             UserInventory.objects.update_or_create(user=user, item=self, defaults={'is_equipped': True})
+            ActivityFeed(user).publish(Verb.ITEM_EQUIPPED, {'item_id': self.id, 'name': self.name, 'type': self.type})
 
 
 class IconItem(BaseShopItem, SaveableItemMixin, ApplicableItemMixin):
@@ -103,6 +117,7 @@ class IconItem(BaseShopItem, SaveableItemMixin, ApplicableItemMixin):
         with transaction.atomic():
             UserInventory.objects.filter(user=user, item__type=self.ItemType.ICON).update(is_equipped=False)
             UserInventory.objects.update_or_create(user=user, item=self, defaults={'is_equipped': True})
+            ActivityFeed(user).publish(Verb.ITEM_EQUIPPED, {'item_id': self.id, 'name': self.name, 'type': self.type})
 
 #profile frame name font / style UI skin / theme
 
@@ -120,7 +135,26 @@ class BoostItem(BaseShopItem, SaveableItemMixin, ApplicableItemMixin):
         super().save(*args, **kwargs)
 
     def apply_to_user(self, user):
-        if UserBoost.objects.filter(user=user, boost=self, expires_at__gt=timezone.now()).exists():
+        if self.id in ActiveBoosts.get(user.id).boost_ids:
             raise ValueError("User already has boost")
         expires = timezone.now() + timezone.timedelta(minutes=self.duration_minutes)
-        UserBoost.objects.create(user=user, boost=self, expires_at=expires)
\ No newline at end of file
+        UserBoost.objects.create(user=user, boost=self, expires_at=expires)
+
+class ShopOrder(models.Model):
+    """Оплаченная покупка одного или нескольких предметов."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='shop_orders')
+    idempotency_key = models.CharField(max_length=64, blank=True, null=True)
+    items_ids = models.JSONField(default=list)
+    coins = models.PositiveIntegerField(default=0)
+    crystals = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Заказ'
+        verbose_name_plural = 'Заказы'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'idempotency_key'], name='shop_order_idempotency_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} | {self.items_ids} ({self.created_at})'
@@ -0,0 +1,131 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db import connection
+from django.db.models import Count, Exists, F, Max, Min, OuterRef, Q, Value, FloatField
+from django.db.models.expressions import RawSQL
+
+from core.accounts.models import User, UserInventory
+from core.shop.models import BaseShopItem
+
+
+class ShopSearch:
+    """
+    Поиск по магазину с фильтрами и фасетами.
+
+    Текст ищется по индексу названия и описания: FTS5-таблица shop_item_fts
+    на SQLite, tsvector и триграммы на PostgreSQL (миграция 0005), поэтому
+    запрос не сканирует весь каталог. Фасеты считаются одним агрегатом;
+    счётчики каждого фасета учитывают все фильтры, кроме собственного,
+    чтобы клиент видел, сколько предметов даст соседнее значение.
+    """
+    FTS_TABLE = 'shop_item_fts'
+    SEARCH_CONFIG = 'simple'
+    DIMENSIONS = ('type', 'rarity', 'price', 'is_donation_only')
+
+    def __init__(
+        self,
+        query: str | None = None,
+        type: list[str] | None = None,
+        rarity: list[str] | None = None,
+        min_price: int | None = None,
+        max_price: int | None = None,
+        is_donation_only: bool | None = None,
+    ) -> None:
+        self.query = (query or '').strip()
+        self.type = [value for value in type or [] if value in BaseShopItem.ItemType.values]
+        self.rarity = [value for value in rarity or [] if value in BaseShopItem.RarityChoices.values]
+        self.min_price = min_price
+        self.max_price = max_price
+        self.is_donation_only = is_donation_only
+
+    def results(self, user: User):
+        """Найденные предметы: сначала самые релевантные, затем по id."""
+        items = self._matched(ranked=True).filter(self._filters())
+        items = items.annotate(is_bought=Exists(UserInventory.objects.filter(user=user, item=OuterRef('pk'))))
+        if self.query:
+            return items.order_by('-relevance', 'id')
+        return items.order_by('id')
+
+    def facets(self) -> dict:
+        aggregates = {}
+        for dimension, values in (('type', BaseShopItem.ItemType.values), ('rarity', BaseShopItem.RarityChoices.values)):
+            others = self._filters(exclude=dimension)
+            for value in values:
+                aggregates[f'{dimension}:{value}'] = Count('id', filter=others & Q(**{dimension: value}))
+
+        others = self._filters(exclude='is_donation_only')
+        for value in (True, False):
+            aggregates[f'is_donation_only:{value}'] = Count('id', filter=others & Q(is_donation_only=value))
+
+        others = self._filters(exclude='price')
+        aggregates['price:min'] = Min('price', filter=others)
+        aggregates['price:max'] = Max('price', filter=others)
+
+        row = self._matched().aggregate(**aggregates)
+        return {
+            'type': {value: row[f'type:{value}'] for value in BaseShopItem.ItemType.values},
+            'rarity': {value: row[f'rarity:{value}'] for value in BaseShopItem.RarityChoices.values},
+            'is_donation_only': {str(value).lower(): row[f'is_donation_only:{value}'] for value in (True, False)},
+            'price': {'min': row['price:min'], 'max': row['price:max']},
+        }
+
+    def _filters(self, exclude: str | None = None) -> Q:
+        filters = Q()
+        if self.type and exclude != 'type':
+            filters &= Q(type__in=self.type)
+        if self.rarity and exclude != 'rarity':
+            filters &= Q(rarity__in=self.rarity)
+        if exclude != 'price':
+            if self.min_price is not None:
+                filters &= Q(price__gte=self.min_price)
+            if self.max_price is not None:
+                filters &= Q(price__lte=self.max_price)
+        if self.is_donation_only is not None and exclude != 'is_donation_only':
+            filters &= Q(is_donation_only=self.is_donation_only)
+        return filters
+
+    def _matched(self, ranked: bool = False):
+        """Активные предметы, подходящие под текстовый запрос."""
+        items = BaseShopItem.objects.filter(is_active=True)
+        if not self.query:
+            return items
+
+        vendor = connection.vendor
+        if vendor == 'sqlite':
+            return self._match_fts5(items, ranked)
+        if vendor == 'postgresql':
+            return self._match_postgres(items, ranked)
+
+        items = items.filter(Q(name__icontains=self.query) | Q(description__icontains=self.query))
+        if ranked:
+            items = items.annotate(relevance=Value(0.0, output_field=FloatField()))
+        return items
+
+    def _match_fts5(self, items, ranked: bool):
+        # Каждое слово запроса ищется как префикс; кавычки экранируют синтаксис FTS5
+        tokens = re.findall(r'\w+', self.query)
+        if not tokens:
+            items = items.none()
+            return items.annotate(relevance=Value(0.0, output_field=FloatField())) if ranked else items
+
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        items = items.filter(id__in=RawSQL(f'SELECT rowid FROM {self.FTS_TABLE} WHERE {self.FTS_TABLE} MATCH %s', [match]))
+        if ranked:
+            # bm25() доступна только в запросе с MATCH, поэтому ранг — коррелированный подзапрос
+            items = items.annotate(relevance=RawSQL(
+                f'SELECT -bm25({self.FTS_TABLE}) FROM {self.FTS_TABLE} '
+                f'WHERE {self.FTS_TABLE} MATCH %s AND rowid = {BaseShopItem._meta.db_table}.id',
+                [match],
+                output_field=FloatField(),
+            ))
+        return items
+
+    def _match_postgres(self, items, ranked: bool):
+        # Выражения совпадают с индексами из миграции 0005
+        vector = SearchVector('name', 'description', config=self.SEARCH_CONFIG)
+        query = SearchQuery(self.query, config=self.SEARCH_CONFIG, search_type='websearch')
+        items = items.annotate(document=vector).filter(Q(document=query) | Q(name__icontains=self.query))
+        if ranked:
+            items = items.annotate(relevance=SearchRank(F('document'), query) + TrigramSimilarity('name', self.query))
+        return items
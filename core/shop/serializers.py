@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
-from core.shop.models import BaseShopItem
+from core.shop.models import BaseShopItem, ShopOrder
+from core.shop.checkout import Checkout
 from core.accounts.models import UserInventory
 
 
@@ -10,14 +11,25 @@ class BaseShopItemSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = BaseShopItem
-        fields = ['id', 'name', 'description', 'image', 'price', 'type', 'is_active', 'is_donation_only', 'is_bought']
+        fields = ['id', 'name', 'description', 'image', 'price', 'type', 'rarity', 'is_active', 'is_donation_only', 'is_bought']
         read_only_fields = ['id', 'is_donation_only', 'is_bought']
 
     def get_is_bought(self, obj):
+        if hasattr(obj, 'is_bought'):
+            return obj.is_bought
         return UserInventory.objects.filter(user=self.context['request'].user, item=obj).exists()
         
 class ShopItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = BaseShopItem
         fields = ['id', 'name', 'description', 'image', 'price', 'type']
-        
\ No newline at end of file
+
+
+class CheckoutSerializer(serializers.Serializer):
+    items_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=Checkout.MAX_ITEMS)
+
+
+class ShopOrderSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ShopOrder
+        fields = ['id', 'items_ids', 'coins', 'crystals', 'created_at']
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.shop.catalog import Catalog
+from core.shop.models import BaseShopItem, BackgroundItem, AvatarItem, IconItem, BoostItem
+
+
+@receiver(post_save, sender=BaseShopItem)
+@receiver(post_save, sender=BackgroundItem)
+@receiver(post_save, sender=AvatarItem)
+@receiver(post_save, sender=IconItem)
+@receiver(post_save, sender=BoostItem)
+@receiver(post_delete, sender=BaseShopItem)
+def invalidate_catalog(sender, **kwargs):
+    Catalog.invalidate()
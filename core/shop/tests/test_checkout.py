@@ -0,0 +1,155 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.accounts.models import LedgerEntry, OutboxEvent, UserInventory, UserProfile
+from core.shop.checkout import Checkout
+from core.shop.models import BaseShopItem, ShopOrder
+
+User = get_user_model()
+
+
+def create_items(count, price=100, is_donation_only=False):
+    return BaseShopItem.objects.bulk_create([
+        BaseShopItem(name=f'Item {i}', price=price, image='item.png', type=BaseShopItem.ItemType.ICON, is_donation_only=is_donation_only)
+        for i in range(count)
+    ])
+
+
+class CheckoutTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='buyer', password='pass')
+        UserProfile.objects.filter(user=self.user).update(balance=1000, donation_balance=50)
+
+    def _profile(self):
+        return UserProfile.objects.get(user=self.user)
+
+    def test_buys_cart(self):
+        items = create_items(3, price=100) + create_items(1, price=30, is_donation_only=True)
+        order, created = Checkout(self.user).buy([item.id for item in items])
+
+        self.assertTrue(created)
+        self.assertEqual((order.coins, order.crystals), (300, 30))
+        self.assertEqual((self._profile().balance, self._profile().donation_balance), (700, 20))
+        self.assertEqual(UserInventory.objects.filter(user=self.user).count(), 4)
+
+        event = OutboxEvent.objects.get(user=self.user)
+        self.assertEqual(event.kind, OutboxEvent.Kind.ITEM_BOUGHT)
+        self.assertEqual(event.payload['items_ids'], [item.id for item in items])
+
+    def test_query_count_does_not_depend_on_cart_size(self):
+        def queries(count):
+            items = create_items(count, price=1)
+            with CaptureQueriesContext(connection) as captured:
+                Checkout(self.user).buy([item.id for item in items])
+            return len(captured)
+
+        self.assertEqual(queries(1), queries(20))
+
+    def test_insufficient_funds_rolls_back(self):
+        items = create_items(2, price=600)
+
+        with self.assertRaisesMessage(ValidationError, 'Недостаточно монет'):
+            Checkout(self.user).buy([item.id for item in items])
+
+        self.assertEqual(self._profile().balance, 1000)
+        self.assertFalse(UserInventory.objects.filter(user=self.user).exists())
+        self.assertFalse(ShopOrder.objects.exists())
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_coins_and_crystals_are_debited_together(self):
+        coins_item = create_items(1, price=100)[0]
+        crystals_item = create_items(1, price=500, is_donation_only=True)[0]
+
+        with self.assertRaisesMessage(ValidationError, 'Недостаточно кристаллов'):
+            Checkout(self.user).buy([coins_item.id, crystals_item.id])
+        self.assertEqual(self._profile().balance, 1000)
+        self.assertFalse(LedgerEntry.objects.filter(user=self.user).exists())
+
+    def test_rejects_owned_inactive_and_missing_items(self):
+        owned, inactive, free = create_items(3)
+        UserInventory.objects.create(user=self.user, item=owned)
+        BaseShopItem.objects.filter(id=inactive.id).update(is_active=False)
+
+        with self.assertRaisesMessage(ValidationError, 'Предмет уже куплен'):
+            Checkout(self.user).buy([owned.id, free.id])
+        with self.assertRaisesMessage(ValidationError, 'Предмет не доступен'):
+            Checkout(self.user).buy([inactive.id, free.id])
+        with self.assertRaisesMessage(ValidationError, 'Предмет не доступен'):
+            Checkout(self.user).buy([free.id, 0])
+        self.assertEqual(self._profile().balance, 1000)
+
+    def test_duplicate_ids_are_bought_once(self):
+        item = create_items(1)[0]
+        order, _ = Checkout(self.user).buy([item.id, item.id])
+        self.assertEqual(order.items_ids, [item.id])
+        self.assertEqual(self._profile().balance, 900)
+
+    def test_idempotency_key(self):
+        items = create_items(2)
+        first, created = Checkout(self.user).buy([item.id for item in items], idempotency_key='retry-1')
+        self.assertTrue(created)
+
+        second, created = Checkout(self.user).buy([item.id for item in items], idempotency_key='retry-1')
+        self.assertFalse(created)
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(self._profile().balance, 800)
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+
+    def test_idempotency_key_with_other_cart(self):
+        first, second = create_items(2)
+        Checkout(self.user).buy([first.id], idempotency_key='retry-1')
+
+        with self.assertRaises(ValidationError) as error:
+            Checkout(self.user).buy([second.id], idempotency_key='retry-1')
+        self.assertEqual(error.exception.code, Checkout.KEY_REUSED)
+        self.assertEqual(self._profile().balance, 900)
+        self.assertFalse(UserInventory.objects.filter(user=self.user, item=second).exists())
+
+    def test_buy_item_uses_checkout(self):
+        item = create_items(1, price=2000)[0]
+        self.assertEqual(item.buy_item(self.user), (False, 'Недостаточно монет'))
+
+        UserProfile.objects.filter(user=self.user).update(balance=2000)
+        self.assertEqual(item.buy_item(self.user), (True, 'Предмет успешно куплен'))
+        self.assertEqual(item.buy_item(self.user), (False, 'Предмет уже куплен'))
+
+
+class CheckoutViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='buyer', password='pass')
+        UserProfile.objects.filter(user=self.user).update(balance=1000)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('shop:checkout')
+
+    def test_checkout_and_retry(self):
+        items = create_items(2)
+        data = {'items_ids': [item.id for item in items]}
+
+        response = self.client.post(self.url, data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['coins'], 200)
+
+        retry = self.client.post(self.url, data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.data['id'], response.data['id'])
+        self.assertEqual(UserProfile.objects.get(user=self.user).balance, 800)
+
+        other = create_items(1)[0]
+        response = self.client.post(self.url, {'items_ids': [other.id]}, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(response.status_code, 409)
+
+    def test_errors(self):
+        response = self.client.post(self.url, {'items_ids': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        item = create_items(1, price=5000)[0]
+        response = self.client.post(self.url, {'items_ids': [item.id]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'Недостаточно монет')
@@ -0,0 +1,158 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.accounts.models import UserInventory
+from core.shop.models import BaseShopItem
+from core.shop.search import ShopSearch
+
+User = get_user_model()
+
+
+def create_item(name, description='', price=100, rarity='common', type='icon', is_donation_only=False, is_active=True):
+    return BaseShopItem.objects.create(
+        name=name,
+        description=description,
+        price=price,
+        rarity=rarity,
+        type=type,
+        image='item.png',
+        is_donation_only=is_donation_only,
+        is_active=is_active,
+    )
+
+
+class ShopSearchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+
+    def _names(self, **kwargs):
+        return [item.name for item in ShopSearch(**kwargs).results(self.user)]
+
+    def test_matches_name_and_description(self):
+        create_item('Звёздное небо', description='Фон с ночным небом')
+        create_item('Рыжий кот', description='Аватар')
+        create_item('Луна', description='Ночное небо над городом')
+
+        self.assertEqual(self._names(query='кот'), ['Рыжий кот'])
+        self.assertEqual(set(self._names(query='небо')), {'Звёздное небо', 'Луна'})
+        self.assertEqual(self._names(query='КОТ'), ['Рыжий кот'])
+
+    def test_prefix_and_all_words(self):
+        create_item('Dragon egg')
+        create_item('Dragon scale')
+
+        self.assertEqual(set(self._names(query='drag')), {'Dragon egg', 'Dragon scale'})
+        self.assertEqual(self._names(query='dragon sca'), ['Dragon scale'])
+
+    def test_ranking(self):
+        weak = create_item('Shield', description='A shield with a fire emblem')
+        strong = create_item('Fire fire', description='Fire everywhere')
+
+        results = list(ShopSearch(query='fire').results(self.user))
+        self.assertEqual([item.id for item in results], [strong.id, weak.id])
+
+    def test_index_follows_updates_and_deletes(self):
+        item = create_item('Old name')
+        item.name = 'New name'
+        item.save()
+
+        self.assertEqual(self._names(query='old'), [])
+        self.assertEqual(self._names(query='new'), ['New name'])
+
+        item.delete()
+        self.assertEqual(self._names(query='new'), [])
+
+    def test_query_syntax_is_escaped(self):
+        create_item('Cat')
+        self.assertEqual(self._names(query='"cat" OR NEAR(*'), [])
+        self.assertEqual(self._names(query='cat)'), ['Cat'])
+        self.assertEqual(self._names(query='***'), [])
+
+    def test_combined_filters(self):
+        create_item('Sword common', price=100, rarity='common', type='icon')
+        create_item('Sword rare', price=400, rarity='rare', type='icon')
+        create_item('Sword epic', price=900, rarity='epic', type='avatar')
+        create_item('Sword legend', price=50, rarity='legendary', type='icon', is_donation_only=True)
+        create_item('Sword hidden', price=400, rarity='rare', type='icon', is_active=False)
+
+        self.assertEqual(self._names(query='sword', rarity=['rare', 'epic'], max_price=500), ['Sword rare'])
+        self.assertEqual(self._names(type=['icon'], min_price=80, is_donation_only=False), ['Sword common', 'Sword rare'])
+        self.assertEqual(self._names(is_donation_only=True), ['Sword legend'])
+
+    def test_facets_exclude_own_dimension(self):
+        create_item('A', price=100, rarity='common', type='icon')
+        create_item('B', price=400, rarity='rare', type='icon')
+        create_item('C', price=900, rarity='rare', type='avatar')
+        create_item('D', price=50, rarity='legendary', type='background', is_donation_only=True)
+
+        with CaptureQueriesContext(connection) as queries:
+            facets = ShopSearch(rarity=['rare'], type=['icon']).facets()
+        self.assertEqual(len(queries), 1)
+
+        self.assertEqual(facets['rarity'], {'common': 1, 'rare': 1, 'epic': 0, 'legendary': 0})
+        self.assertEqual(facets['type'], {'background': 0, 'avatar': 1, 'icon': 1, 'boost': 0})
+        self.assertEqual(facets['is_donation_only'], {'true': 0, 'false': 1})
+        self.assertEqual(facets['price'], {'min': 400, 'max': 400})
+
+    def test_facets_follow_text_query(self):
+        create_item('Red cat', price=100, rarity='common')
+        create_item('Black cat', price=300, rarity='rare')
+        create_item('Red dog', price=500, rarity='rare')
+
+        facets = ShopSearch(query='cat').facets()
+        self.assertEqual(facets['rarity']['common'], 1)
+        self.assertEqual(facets['rarity']['rare'], 1)
+        self.assertEqual(facets['price'], {'min': 100, 'max': 300})
+
+
+class ShopSearchViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('shop:shop')
+
+    def test_search_response(self):
+        owned = create_item('Blue cat', rarity='rare', price=400)
+        create_item('Green cat', rarity='common', price=150)
+        create_item('Blue dog', rarity='rare', price=400)
+        UserInventory.objects.create(user=self.user, item=owned)
+
+        response = self.client.get(self.url, {'search': 'cat', 'rarity': 'rare'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['id'], owned.id)
+        self.assertTrue(response.data['results'][0]['is_bought'])
+        self.assertEqual(response.data['results'][0]['rarity'], 'rare')
+        self.assertEqual(response.data['facets']['rarity']['common'], 1)
+
+    def test_query_count_is_flat(self):
+        for i in range(3):
+            create_item(f'Cat {i}')
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.url, {'search': 'cat', 'page_size': 100})
+
+        for i in range(3, 60):
+            create_item(f'Cat {i}')
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(self.url, {'search': 'cat', 'page_size': 100})
+
+        self.assertEqual(response.data['count'], 60)
+        self.assertEqual(len(few), len(many))
+
+    def test_invalid_price(self):
+        response = self.client.get(self.url, {'min_price': 'cheap'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_plain_listing_has_no_facets(self):
+        create_item('Cat')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('facets', response.data)
@@ -0,0 +1,123 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.accounts.models import UserInventory
+from core.accounts.versions import SharedVersion
+from core.shop.catalog import Catalog
+from core.shop.models import AvatarItem, BaseShopItem
+
+User = get_user_model()
+
+
+class ShopViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('shop:shop')
+
+    def _create_items(self, count):
+        items = BaseShopItem.objects.bulk_create([
+            BaseShopItem(name=f'Item {i}', price=10, image='item.png', type=BaseShopItem.ItemType.ICON)
+            for i in range(count)
+        ])
+        # bulk_create skips post_save
+        Catalog.invalidate()
+        return items
+
+    def _get(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_is_bought(self):
+        owned, other = self._create_items(2)
+        UserInventory.objects.create(user=self.user, item=owned)
+
+        response, _ = self._get()
+        is_bought = {row['id']: row['is_bought'] for row in response.data['results']}
+        self.assertEqual(is_bought, {owned.id: True, other.id: False})
+
+    def test_query_count_is_flat(self):
+        self._create_items(2)
+        _, few = self._get()
+
+        self._create_items(98)
+        response, many = self._get()
+
+        self.assertEqual(len(response.data['results']), 100)
+        self.assertEqual(few, many)
+
+    def test_warm_catalog_skips_item_query(self):
+        self._create_items(5)
+        self._get()
+
+        # Сверка версии каталога и купленные предметы пользователя
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'page_size': 100})
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_conditional_get(self):
+        owned, other = self._create_items(2)
+        response = self.client.get(self.url)
+        etag = response['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        UserInventory.objects.create(user=self.user, item=owned)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        AvatarItem.objects.create(name='New', price=10, image='new.png')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 3)
+
+    @override_settings(ALLOWED_HOSTS=['testserver', 'cdn.example.com'])
+    def test_etag_depends_on_host(self):
+        self._create_items(1)
+        etag = self.client.get(self.url)['ETag']
+
+        # Ссылки на картинки абсолютные, поэтому ответ для другого хоста не совпадает
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, HTTP_HOST='cdn.example.com')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['results'][0]['image'].startswith('http://cdn.example.com/'))
+
+    def test_catalog_reloads_after_delete(self):
+        item = AvatarItem.objects.create(name='Old', price=10, image='old.png')
+        self.assertEqual(len(self._get()[0].data['results']), 1)
+
+        item.delete()
+        self.assertEqual(len(self._get()[0].data['results']), 0)
+
+    def test_change_in_other_process(self):
+        item = AvatarItem.objects.create(name='Old', price=10, image='old.png')
+        etag = self.client.get(self.url)['ETag']
+
+        # Другой процесс меняет предмет и сдвигает версию в БД, локальный снимок об этом не знает
+        BaseShopItem.objects.filter(id=item.id).update(name='New')
+        SharedVersion.bump(Catalog.VERSION_KEY)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['name'], 'New')
+
+    def test_filters(self):
+        self._create_items(2)
+        AvatarItem.objects.create(name='Кот', price=10, image='cat.png')
+
+        response = self.client.get(self.url, {'type': 'avatar'})
+        self.assertEqual([row['name'] for row in response.data['results']], ['Кот'])
+        response = self.client.get(self.url, {'search': 'кот'})
+        self.assertEqual([row['name'] for row in response.data['results']], ['Кот'])
@@ -1,10 +1,11 @@
 from django.urls import path
 
-from .views import ShopView, BuyShopItemView
+from .views import ShopView, BuyShopItemView, CheckoutView
 
 app_name = 'shop'
 
 urlpatterns = [
     path('shop/', ShopView.as_view(), name='shop'),
     path('shop/buy/<int:item_id>/', BuyShopItemView.as_view(), name='buy_shop_item'),
+    path('shop/checkout/', CheckoutView.as_view(), name='checkout'),
 ]
\ No newline at end of file
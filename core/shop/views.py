@@ -7,15 +7,18 @@ from rest_framework.views import APIView
 from rest_framework import generics
 from rest_framework import permissions
 
+from django.core.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
+from django.utils.cache import parse_etags, patch_cache_control, quote_etag
 
 from core.docs.templates import AUTH_HEADER
-from core.shop.serializers import BaseShopItemSerializer
+from core.shop.serializers import BaseShopItemSerializer, CheckoutSerializer, ShopOrderSerializer
 from core.shop.models import BaseShopItem
-from core.accounts.models import UserInventory
+from core.shop.catalog import Catalog
+from core.shop.search import ShopSearch
+from core.shop.checkout import Checkout
 from core.utils.paginator import CustomPageNumberPagination
 
-from django.db.models import Exists, OuterRef
 
 """
 Common		120-180
@@ -28,30 +31,72 @@ class ShopView(generics.ListAPIView):
     serializer_class = BaseShopItemSerializer
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = CustomPageNumberPagination
+    SEARCH_PARAMS = ('search', 'rarity', 'min_price', 'max_price', 'is_donation_only')
 
     @swagger_auto_schema(
         manual_parameters=[
             AUTH_HEADER,
             openapi.Parameter('page_size', openapi.IN_QUERY, description='Number of results per page', type=openapi.TYPE_INTEGER, required=False),
             openapi.Parameter('type', openapi.IN_QUERY, description="Фильтрация по типу", type=openapi.TYPE_STRING, required=False),
-            openapi.Parameter('search', openapi.IN_QUERY, description="Поиск предметов по названию", type=openapi.TYPE_STRING, required=False)
+            openapi.Parameter('search', openapi.IN_QUERY, description="Поиск предметов по названию и описанию", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('rarity', openapi.IN_QUERY, description="Фильтрация по редкости (через запятую)", type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('min_price', openapi.IN_QUERY, description="Минимальная цена", type=openapi.TYPE_INTEGER, required=False),
+            openapi.Parameter('max_price', openapi.IN_QUERY, description="Максимальная цена", type=openapi.TYPE_INTEGER, required=False),
+            openapi.Parameter('is_donation_only', openapi.IN_QUERY, description="Только донатные предметы", type=openapi.TYPE_BOOLEAN, required=False),
         ]
     )
-    def get(self,request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
-
-    def get_queryset(self):
-        type = self.request.query_params.get('type', None)
-        search = self.request.query_params.get('search', None)
-        
-        query = BaseShopItem.objects.filter(is_active=True)
-        if type:
-            if type in BaseShopItem.ItemType.values:
-                query = query.filter(type=type)
-        if search:
-            query = query.filter(name__icontains=search)
-        # query = query.annotate(is_bought=Exists(UserInventory.objects.filter(user=self.request.user, item=OuterRef('pk'))))
-        return query
+    def get(self, request, *args, **kwargs):
+        if any(request.query_params.get(param) for param in self.SEARCH_PARAMS):
+            return self.search(request)
+
+        type = request.query_params.get('type', None)
+        if type not in BaseShopItem.ItemType.values:
+            type = None
+        version, items = Catalog.items(type=type)
+        items = self.paginate_queryset(items)
+
+        owned_ids = Catalog.owned_ids(request.user)
+        etag = quote_etag(Catalog.etag(version, request.build_absolute_uri(), owned_ids.intersection(item['id'] for item in items)))
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = self.get_paginated_response([
+                {
+                    **item,
+                    'image': request.build_absolute_uri(item['image']) if item['image'] else None,
+                    'is_bought': item['id'] in owned_ids,
+                }
+                for item in items
+            ])
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def search(self, request):
+        """
+        Поиск и фильтры идут в индекс БД, а не в снимок каталога:
+        ответ содержит ранжированные предметы и фасеты по выдаче.
+        """
+        params = request.query_params
+        try:
+            min_price = int(params['min_price']) if params.get('min_price') else None
+            max_price = int(params['max_price']) if params.get('max_price') else None
+        except ValueError:
+            return Response({'error': 'Цена должна быть числом'}, status=status.HTTP_400_BAD_REQUEST)
+
+        is_donation_only = params.get('is_donation_only')
+        search = ShopSearch(
+            query=params.get('search'),
+            type=params['type'].split(',') if params.get('type') else None,
+            rarity=params['rarity'].split(',') if params.get('rarity') else None,
+            min_price=min_price,
+            max_price=max_price,
+            is_donation_only=is_donation_only.lower() in ('1', 'true') if is_donation_only else None,
+        )
+        page = self.paginate_queryset(search.results(request.user))
+        response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        response.data['facets'] = search.facets()
+        return response
 
 
 class BuyShopItemView(APIView):
@@ -64,4 +109,32 @@ class BuyShopItemView(APIView):
         success, message = item.buy_item(request.user)
         if not success:
             return Response({'error': message}, status=status.HTTP_400_BAD_REQUEST)
-        return Response({'message': message}, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response({'message': message}, status=status.HTTP_200_OK)
+
+
+class CheckoutView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        request_body=CheckoutSerializer,
+        manual_parameters=[
+            AUTH_HEADER,
+            openapi.Parameter('Idempotency-Key', openapi.IN_HEADER, description="Ключ для безопасного повтора запроса", type=openapi.TYPE_STRING, required=False),
+        ],
+        responses={201: ShopOrderSerializer, 200: ShopOrderSerializer, 409: 'Ключ уже использован для другой корзины'},
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = CheckoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        idempotency_key = request.headers.get('Idempotency-Key', '')[:64]
+        try:
+            order, created = Checkout(request.user).buy(serializer.validated_data['items_ids'], idempotency_key)
+        except ValidationError as e:
+            if e.code == Checkout.KEY_REUSED:
+                return Response({'error': e.messages[0]}, status=status.HTTP_409_CONFLICT)
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            ShopOrderSerializer(order).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
@@ -1,7 +1,8 @@
 from django.contrib import admin
 
-from core.todo.models import Todo, Habit
+from core.todo.models import Todo, Habit, HabitCheckIn
 
 # Register your models here.
 admin.site.register(Todo)
-admin.site.register(Habit)
\ No newline at end of file
+admin.site.register(Habit)
+admin.site.register(HabitCheckIn)
@@ -0,0 +1,116 @@
+import calendar
+from datetime import date, timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from core.todo.models import Habit, HabitCheckIn, HabitYear
+
+
+def day_of_year(day: date) -> int:
+    return day.timetuple().tm_yday - 1
+
+
+def days_in_year(year: int) -> int:
+    return 366 if calendar.isleap(year) else 365
+
+
+def run_ending_at(bits: int, position: int) -> int:
+    """Количество подряд установленных битов, заканчивающихся на бите position (включительно)."""
+    mask = (1 << (position + 1)) - 1
+    gaps = ~bits & mask
+    return position - gaps.bit_length() + 1
+
+
+class HabitLog:
+    """
+    История выполнения привычки.
+
+    Каждая отметка — строка HabitCheckIn; уникальный индекс (habit, date)
+    не даёт отметить привычку дважды за день даже параллельными запросами.
+    Параллельно отметки хранятся битовой картой по годам (HabitYear, 46 байт
+    на год): тепловая карта года — одна строка, а серия считается битовыми
+    операциями по нескольким годам без чтения отдельных отметок.
+    """
+    BITMAP_SIZE = 46
+
+    def __init__(self, habit: Habit) -> None:
+        self.habit = habit
+
+    def check_in(self, day: date | None = None) -> int:
+        """Отмечает привычку за день и возвращает пересчитанную серию."""
+        day = day or timezone.localdate()
+        try:
+            with transaction.atomic():
+                HabitCheckIn.objects.create(habit=self.habit, date=day)
+        except IntegrityError:
+            raise ValidationError('Habit is already completed today')
+
+        rows = {
+            row.year: row
+            for row in HabitYear.objects.select_for_update().filter(habit=self.habit, year__in=[day.year - 1, day.year])
+        }
+        current = rows.get(day.year) or HabitYear(habit=self.habit, year=day.year)
+        bits = self._to_int(current.days) | (1 << day_of_year(day))
+        current.days = bits.to_bytes(self.BITMAP_SIZE, 'little')
+        current.save()
+
+        years = {year: self._to_int(row.days) for year, row in rows.items()}
+        years.setdefault(day.year - 1, 0)
+        years[day.year] = bits
+        streak = self._streak(years, day)
+        Habit.objects.filter(id=self.habit.id).update(streak=streak)
+        return streak
+
+    def streak(self, today: date | None = None) -> int:
+        """Текущая серия: дни подряд до сегодняшнего, либо до вчерашнего, если сегодня отметки ещё нет."""
+        today = today or timezone.localdate()
+        return self._streak(self._load(today.year - 1, today.year), today)
+
+    def heatmap(self, year: int) -> dict:
+        bits = self._load(year)[year]
+        return {
+            'year': year,
+            'total': bits.bit_count(),
+            'days': [(bits >> day) & 1 for day in range(days_in_year(year))],
+        }
+
+    def is_done(self, day: date | None = None) -> bool:
+        return HabitCheckIn.objects.filter(habit=self.habit, date=day or timezone.localdate()).exists()
+
+    def _streak(self, years: dict[int, int], today: date) -> int:
+        def bits(year: int) -> int:
+            if year not in years:
+                # Длинная серия: все более ранние годы одним запросом
+                earlier = self._load_until(year)
+                for missing in range(min(earlier, default=year) - 1, year + 1):
+                    years[missing] = earlier.get(missing, 0)
+            return years[year]
+
+        if not (bits(today.year) >> day_of_year(today)) & 1:
+            today -= timedelta(days=1)
+
+        year, position, streak = today.year, day_of_year(today), 0
+        while True:
+            run = run_ending_at(bits(year), position)
+            streak += run
+            if run <= position:
+                return streak
+            # Серия дошла до 1 января и продолжается в прошлом году
+            year -= 1
+            position = days_in_year(year) - 1
+
+    def _load(self, *years: int) -> dict[int, int]:
+        loaded = dict.fromkeys(years, 0)
+        for year, days in HabitYear.objects.filter(habit=self.habit, year__in=years).values_list('year', 'days'):
+            loaded[year] = self._to_int(days)
+        return loaded
+
+    def _load_until(self, year: int) -> dict[int, int]:
+        rows = HabitYear.objects.filter(habit=self.habit, year__lte=year).values_list('year', 'days')
+        return {row_year: self._to_int(days) for row_year, days in rows}
+
+    @staticmethod
+    def _to_int(days) -> int:
+        return int.from_bytes(bytes(days or b''), 'little')
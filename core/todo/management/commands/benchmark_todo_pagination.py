@@ -0,0 +1,78 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.todo.models import Todo
+from core.todo.views import TodoListCreateView
+from core.utils.paginator import KeysetPagination
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает OFFSET- и keyset-пагинацию списка задач на глубоких страницах (всё откатывается)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--todos', type=int, default=50_000)
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--depths', type=int, nargs='+', default=[1, 100, 1000, 2000])
+        parser.add_argument('--orderings', nargs='+', default=['-created_at', 'deadline', '-deadline', '-executed_at', 'executed_at'])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        page_size, repeat = options['page_size'], options['repeat']
+        factory = APIRequestFactory()
+        now = timezone.now()
+        with transaction.atomic():
+            user = User.objects.create(username='pagination_bench')
+            # Половина задач без срока и треть без даты выполнения: глубокие страницы попадают и в блок NULL
+            Todo.objects.bulk_create(
+                [
+                    Todo(
+                        user=user,
+                        title=f'Todo {i}',
+                        deadline=(now + timezone.timedelta(days=i % 365)).date() if i % 2 else None,
+                        executed_at=now - timezone.timedelta(minutes=i) if i % 3 else None,
+                    )
+                    for i in range(options['todos'])
+                ],
+                batch_size=5000,
+            )
+
+            todos = Todo.objects.filter(user=user, is_completed__in=[False], is_dream_step__in=[False])
+            for ordering in options['orderings']:
+                field = ordering.lstrip('-')
+                expression = F(field).desc(nulls_last=True) if ordering.startswith('-') else F(field).asc(nulls_last=True)
+                ordered = todos.order_by(expression, '-id' if ordering.startswith('-') else 'id')
+                self.stdout.write(ordering)
+
+                for depth in options['depths']:
+                    offset = (depth - 1) * page_size
+                    if offset >= options['todos']:
+                        continue
+                    params = {'order_by': ordering, 'page_size': page_size}
+                    if offset:
+                        last = ordered.values(field, 'id')[offset - 1]
+                        params['cursor'] = KeysetPagination.encode_cursor(last[field], last['id'])
+                    request = Request(factory.get('/todos/', params))
+
+                    started = time.perf_counter()
+                    for _ in range(repeat):
+                        todos.count()
+                        list(ordered[offset:offset + page_size])
+                    offset_ms = (time.perf_counter() - started) / repeat * 1000
+
+                    started = time.perf_counter()
+                    for _ in range(repeat):
+                        KeysetPagination().paginate_queryset(todos, request, TodoListCreateView)
+                    keyset_ms = (time.perf_counter() - started) / repeat * 1000
+
+                    self.stdout.write(f'  page {depth:>6}: offset {offset_ms:8.2f} ms, keyset {keyset_ms:8.2f} ms')
+            transaction.set_rollback(True)
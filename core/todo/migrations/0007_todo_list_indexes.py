@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 10:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dream', '0002_dreamimage_is_preview'),
+        ('todo', '0006_todo_is_golden'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['user', 'is_completed', 'is_dream_step', 'created_at', 'id'], name='todo_list_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['user', 'is_completed', 'is_dream_step', 'deadline', 'id'], name='todo_list_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['user', 'is_completed', 'is_dream_step', 'executed_at', 'id'], name='todo_list_executed_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2 on 2026-10-18 10:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0007_todo_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HabitCheckIn',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('habit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='check_ins', to='todo.habit')),
+            ],
+            options={
+                'verbose_name': 'Отметка привычки',
+                'verbose_name_plural': 'Отметки привычек',
+                'constraints': [models.UniqueConstraint(fields=('habit', 'date'), name='habit_checkin_day_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='HabitYear',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('days', models.BinaryField(default=bytes, max_length=46)),
+                ('habit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='years', to='todo.habit')),
+            ],
+            options={
+                'verbose_name': 'Год привычки',
+                'verbose_name_plural': 'Годы привычек',
+                'constraints': [models.UniqueConstraint(fields=('habit', 'year'), name='habit_year_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2 on 2026-10-18 12:40
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import migrations
+from django.utils import timezone
+
+# Значение HabitLog на момент миграции
+BITMAP_SIZE = 46
+
+
+def backfill_habit_checkins(apps, schema_editor):
+    """
+    До отметок по дням серия хранилась только счётчиком Habit.streak, без дат.
+    Серия каждой привычки раскладывается на streak дней, заканчивающихся
+    вчерашним днём: иначе первая отметка после миграции пересчитала бы серию
+    по пустой битовой карте и сбросила бы её до 1.
+    """
+    Habit = apps.get_model('todo', 'Habit')
+    HabitCheckIn = apps.get_model('todo', 'HabitCheckIn')
+    HabitYear = apps.get_model('todo', 'HabitYear')
+
+    yesterday = timezone.localdate() - timedelta(days=1)
+    habits = Habit.objects.filter(streak__gt=0).order_by('id').values_list('id', 'streak').iterator(chunk_size=1000)
+    for habit_id, streak in habits:
+        days = [yesterday - timedelta(days=offset) for offset in range(streak)]
+        HabitCheckIn.objects.bulk_create(
+            [HabitCheckIn(habit_id=habit_id, date=day) for day in days], batch_size=5000, ignore_conflicts=True
+        )
+
+        years = defaultdict(int)
+        for day in days:
+            years[day.year] |= 1 << (day.timetuple().tm_yday - 1)
+        existing = {row.year: row for row in HabitYear.objects.filter(habit_id=habit_id, year__in=years)}
+        for year, bits in years.items():
+            row = existing.get(year) or HabitYear(habit_id=habit_id, year=year)
+            bits |= int.from_bytes(bytes(row.days or b''), 'little')
+            row.days = bits.to_bytes(BITMAP_SIZE, 'little')
+            row.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0008_habit_checkins'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_habit_checkins, migrations.RunPython.noop),
+    ]
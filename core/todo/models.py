@@ -1,12 +1,16 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import transaction
 from django.utils import timezone
 
-from core.accounts.progress import UserActionProgressService
 from core.todo.utils import get_xp_by_lvl, get_coins_by_lvl
-from core.accounts.services import UserStreakService
+from core.accounts.ledger import Ledger
+from core.accounts.models import OutboxEvent
+from core.accounts.outbox import Outbox
+from core.accounts.boosts import ActiveBoosts, BoostState
+from core.shop.models import BoostItem
 import random
 User = get_user_model()
 
@@ -26,6 +30,8 @@ class Todo(models.Model):
 
     is_golden = models.BooleanField(default=False)
 
+    GOLDEN_CHANCE = 0.1
+
     def __str__(self):
         return self.title
 
@@ -33,6 +39,11 @@ class Todo(models.Model):
         verbose_name = 'Задача'
         verbose_name_plural = 'Задачи'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_completed', 'is_dream_step', 'created_at', 'id'], name='todo_list_created_idx'),
+            models.Index(fields=['user', 'is_completed', 'is_dream_step', 'deadline', 'id'], name='todo_list_deadline_idx'),
+            models.Index(fields=['user', 'is_completed', 'is_dream_step', 'executed_at', 'id'], name='todo_list_executed_idx'),
+        ]
     
     def clean(self):
         from django.core.exceptions import ValidationError
@@ -45,45 +56,109 @@ class Todo(models.Model):
 
 
     def execute_task(self):
-        self.deadline = None
-        self.is_completed = True
-        self.executed_at = timezone.now()
-
-        todo_service = TodoService(self)
-
-        if not self.is_golden:
-            val = random.random()
-            if val < 0.1:
-                self.is_golden = True
-                self.save()
+        """
+        Задача закрывается условным UPDATE вместе с наградой в одной транзакции,
+        как в TodoBatchService: из параллельных выполнений одной задачи награду
+        получит только одно, остальные получат ValidationError. Серия, статистика,
+        лента и достижения применяются воркером очереди по событию TASK_COMPLETED.
+        """
+        executed_at = timezone.now()
+        is_golden = self.is_golden or random.random() < self.GOLDEN_CHANCE
 
         with transaction.atomic():
-            xp, coins = todo_service.apply_rewards()
-            self.save()
-            UserActionProgressService(self.user).update_stat('task_completed')
+            completed = Todo.objects.filter(id=self.id, is_completed=False).update(
+                deadline=None, is_completed=True, executed_at=executed_at, is_golden=is_golden
+            )
+            if not completed:
+                raise ValidationError('Task is already completed')
+            self.deadline = None
+            self.is_completed = True
+            self.executed_at = executed_at
+            self.is_golden = is_golden
+
+            xp, coins = TodoService(self).apply_rewards()
+            Outbox.publish(self.user, OutboxEvent.Kind.TASK_COMPLETED, self.completed_event_payload())
         
         return xp, coins
 
+    def completed_event_payload(self) -> dict:
+        payload = {'todo_id': self.id, 'title': self.title}
+        if self.dream_id:
+            # По dream_id воркер пересчитывает прогресс и рейтинг мечты
+            payload['dream_id'] = self.dream_id
+        return payload
+
 
 class TodoService:
     def __init__(self, task: Todo) -> None:
         self.task = task
         self.user = task.user
-        self.profile = self.user.profile
     
     def apply_rewards(self) -> tuple[int, int]:
-        # Streak earn
-        self._increase_streak()
-
-        # Profile earn
         xp, coins = RewardService(self.task).calculate_rewards()
-        self.profile.xp += xp
-        self.profile.balance += coins
-        self.profile.save()
+        Ledger(self.user).credit('task_completed', xp=xp, coins=coins)
         return xp, coins
-   
-    def _increase_streak(self) -> None:
-        UserStreakService(self.user).increase_streak()
+
+
+class TodoBatchService:
+    """
+    Выполнение нескольких задач пользователя за один запрос.
+
+    Задачи проверяются одним запросом, бусты читаются один раз на всю пачку,
+    награда начисляется одной записью в Ledger, задачи закрываются условным
+    UPDATE (повторное выполнение той же задачи параллельным запросом откатит
+    пачку), а события очереди создаются одним bulk_create — воркер схлопнет
+    их в одно обновление серии, статистики и достижений.
+    """
+    # Не больше суточного лимита ExecuteThrottle, иначе пачка всегда получала бы 429
+    MAX_TODOS = 30
+
+    def __init__(self, user: User) -> None:
+        self.user = user
+
+    def execute(self, todo_ids: list[int]) -> list[dict]:
+        todo_ids = list(dict.fromkeys(todo_ids))
+        if not todo_ids:
+            raise ValidationError('No tasks to execute')
+        if len(todo_ids) > self.MAX_TODOS:
+            raise ValidationError(f'Cannot execute more than {self.MAX_TODOS} tasks at once')
+
+        todos = Todo.objects.filter(user=self.user, id__in=todo_ids, is_completed=False).in_bulk()
+        missing = [todo_id for todo_id in todo_ids if todo_id not in todos]
+        if missing:
+            raise ValidationError(f'Tasks not found or already completed: {missing}')
+
+        now = timezone.now()
+        boosts = ActiveBoosts.get(self.user.id)
+        results = []
+        golden_ids = []
+        for todo_id in todo_ids:
+            todo = todos[todo_id]
+            todo.user = self.user
+            if not todo.is_golden and random.random() < Todo.GOLDEN_CHANCE:
+                todo.is_golden = True
+                golden_ids.append(todo.id)
+            xp, coins = RewardService(todo).calculate_rewards(boosts)
+            results.append({'id': todo.id, 'xp': xp, 'coins': coins})
+
+        with transaction.atomic():
+            completed = Todo.objects.filter(id__in=todo_ids, is_completed=False).update(
+                is_completed=True, executed_at=now, deadline=None
+            )
+            if completed != len(todo_ids):
+                raise ValidationError('Some tasks are already completed')
+            if golden_ids:
+                Todo.objects.filter(id__in=golden_ids).update(is_golden=True)
+
+            Ledger(self.user).credit(
+                'task_completed',
+                xp=sum(result['xp'] for result in results),
+                coins=sum(result['coins'] for result in results),
+            )
+            Outbox.publish_many(self.user, OutboxEvent.Kind.TASK_COMPLETED, [
+                todos[todo_id].completed_event_payload() for todo_id in todo_ids
+            ])
+        return results
 
 class Habit(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='habits')
@@ -97,43 +172,68 @@ class Habit(models.Model):
         return self.title
 
     def execute_habit(self):
+        from core.todo.checkins import HabitLog
+
         xp, coins = RewardService(self).calculate_rewards()
-        self.user.profile.xp += xp
-        self.user.profile.balance += coins
         with transaction.atomic():
-            self.user.profile.save()
-            self.save()
-            self._increase_streak()
+            self.streak = HabitLog(self).check_in()
+            Ledger(self.user).credit('habit_completed', xp=xp, coins=coins)
+            Outbox.publish(self.user, OutboxEvent.Kind.HABIT_COMPLETED, {'habit_id': self.id})
         
         return xp, coins
 
-    def _increase_streak(self) -> None:
-        self.streak += 1
-        self.save()
-        UserActionProgressService(self.user).update_stat('habits_completed')
-
-
     class Meta:
         verbose_name = 'Привычка'
         verbose_name_plural = 'Привычки'
 
+
+class HabitCheckIn(models.Model):
+    habit = models.ForeignKey(Habit, on_delete=models.CASCADE, related_name='check_ins')
+    date = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Отметка привычки'
+        verbose_name_plural = 'Отметки привычек'
+        constraints = [
+            models.UniqueConstraint(fields=['habit', 'date'], name='habit_checkin_day_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.habit_id} | {self.date}'
+
+
+class HabitYear(models.Model):
+    """Отметки привычки за год: бит N (little-endian) — N-й день года, начиная с 0."""
+    habit = models.ForeignKey(Habit, on_delete=models.CASCADE, related_name='years')
+    year = models.PositiveSmallIntegerField()
+    days = models.BinaryField(max_length=46, default=bytes)
+
+    class Meta:
+        verbose_name = 'Год привычки'
+        verbose_name_plural = 'Годы привычек'
+        constraints = [
+            models.UniqueConstraint(fields=['habit', 'year'], name='habit_year_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.habit_id} | {self.year}'
+
 class RewardService:
     def __init__(self, obj: Todo | Habit) -> None:
         self.obj = obj
         self.user = obj.user
-        self.profile = self.user.profile
     
-    def calculate_rewards(self):
+    def calculate_rewards(self, boosts: BoostState | None = None):
         xp = get_xp_by_lvl(self.obj.difficulty)
         coins = get_coins_by_lvl(self.obj.difficulty)
-        xp *= self.get_multiplier('xp')
-        coins *= self.get_multiplier('coins')
+        boosts = boosts or ActiveBoosts.get(self.user.id)
+        xp *= self.get_multiplier(BoostItem.BoostType.XP, boosts)
+        coins *= self.get_multiplier(BoostItem.BoostType.MONEY, boosts)
         return int(xp), int(coins)
     
-    def get_multiplier(self, boost_type: str) -> float:
-        boosts = {b.boost.boost_type: b.boost.multiplier for b in self.user.boosts.all() if b.expires_at > timezone.now()}
-        boost_multiplier = boosts.get(boost_type, 1.0)
-        if self.obj.is_golden:
+    def get_multiplier(self, boost_type: str, boosts: BoostState | None = None) -> float:
+        boost_multiplier = (boosts or ActiveBoosts.get(self.user.id)).multiplier(boost_type)
+        if getattr(self.obj, 'is_golden', False):
             return boost_multiplier * 2
         return boost_multiplier
-
@@ -2,7 +2,8 @@ from rest_framework import serializers
 
 from django.utils import timezone
 
-from .models import Habit, Todo
+from .models import Habit, Todo, TodoBatchService
+from .checkins import HabitLog
 
 class TodoSerializer(serializers.ModelSerializer):
     is_expired = serializers.SerializerMethodField()
@@ -19,11 +20,21 @@ class TodoSerializer(serializers.ModelSerializer):
     def get_is_expired(self, obj):
         return obj.deadline and obj.deadline < timezone.now().date()
 
+class TodoBulkExecuteSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=TodoBatchService.MAX_TODOS)
+
 class HabitSerializer(serializers.ModelSerializer):
+    done_today = serializers.SerializerMethodField()
+
     class Meta:
         model = Habit
-        fields = ['id', 'title', 'description', 'difficulty', 'user', 'streak']
-        read_only_fields = ['id', 'user', 'streak']
+        fields = ['id', 'title', 'description', 'difficulty', 'user', 'streak', 'done_today']
+        read_only_fields = ['id', 'user', 'streak', 'done_today']
+
+    def get_done_today(self, obj):
+        if hasattr(obj, 'done_today'):
+            return obj.done_today
+        return HabitLog(obj).is_done()
 
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
@@ -0,0 +1,122 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.todo.checkins import HabitLog, run_ending_at
+from core.todo.models import Habit, HabitCheckIn, HabitYear
+
+User = get_user_model()
+
+
+class RunEndingAtTest(TestCase):
+    def test_runs(self):
+        self.assertEqual(run_ending_at(0b0111, 2), 3)
+        self.assertEqual(run_ending_at(0b0111, 3), 0)
+        self.assertEqual(run_ending_at(0b1101, 3), 2)
+        self.assertEqual(run_ending_at((1 << 366) - 1, 365), 366)
+
+
+class HabitLogTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.habit = Habit.objects.create(user=self.user, title='Run')
+        self.log = HabitLog(self.habit)
+
+    def _check_in_days(self, start, count):
+        for offset in range(count):
+            self.log.check_in(start + timedelta(days=offset))
+
+    def test_one_check_in_per_day(self):
+        day = date(2026, 3, 1)
+        self.log.check_in(day)
+        with self.assertRaises(ValidationError):
+            self.log.check_in(day)
+        with self.assertRaises(IntegrityError):
+            HabitCheckIn.objects.create(habit=self.habit, date=day)
+
+    def test_streak_is_recomputed_from_bitmap(self):
+        self._check_in_days(date(2026, 3, 1), 3)
+        self.assertEqual(Habit.objects.get(id=self.habit.id).streak, 3)
+
+        # Пропуск обрывает серию
+        self.assertEqual(self.log.check_in(date(2026, 3, 5)), 1)
+        self.assertEqual(self.log.streak(date(2026, 3, 5)), 1)
+        self.assertEqual(self.log.streak(date(2026, 3, 6)), 1)
+        self.assertEqual(self.log.streak(date(2026, 3, 7)), 0)
+
+    def test_streak_crosses_years(self):
+        self._check_in_days(date(2025, 12, 30), 4)
+        self.assertEqual(self.log.streak(date(2026, 1, 2)), 4)
+        self.assertEqual(HabitYear.objects.filter(habit=self.habit).count(), 2)
+
+    def test_long_streak(self):
+        HabitYear.objects.create(habit=self.habit, year=2024, days=((1 << 366) - 1).to_bytes(46, 'little'))
+        HabitYear.objects.create(habit=self.habit, year=2025, days=((1 << 365) - 1).to_bytes(46, 'little'))
+        self.assertEqual(self.log.check_in(date(2026, 1, 1)), 366 + 365 + 1)
+
+        with self.assertNumQueries(2):
+            self.assertEqual(self.log.streak(date(2026, 1, 1)), 732)
+
+    def test_heatmap(self):
+        self._check_in_days(date(2024, 2, 28), 3)
+        heatmap = self.log.heatmap(2024)
+        self.assertEqual(len(heatmap['days']), 366)
+        self.assertEqual(heatmap['total'], 3)
+        self.assertEqual(heatmap['days'][58:61], [1, 1, 1])
+        self.assertEqual(self.log.heatmap(2023)['total'], 0)
+
+
+class HabitViewsTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.habit = Habit.objects.create(user=self.user, title='Run')
+
+    def test_execute_once_per_day(self):
+        url = reverse('habit-execute', kwargs={'pk': self.habit.pk})
+        response = self.client.patch(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['streak'], 1)
+
+        response = self.client.patch(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(HabitCheckIn.objects.filter(habit=self.habit).count(), 1)
+
+    def test_heatmap_and_done_today(self):
+        today = timezone.localdate()
+        HabitLog(self.habit).check_in(today - timedelta(days=1))
+        Habit.objects.create(user=self.user, title='Read')
+
+        response = self.client.get(reverse('habit-list-create'))
+        self.assertEqual([row['done_today'] for row in response.data['results']], [False, False])
+
+        self.client.patch(reverse('habit-execute', kwargs={'pk': self.habit.pk}))
+        response = self.client.get(reverse('habit-list-create'))
+        self.assertEqual([row['done_today'] for row in response.data['results']], [True, False])
+
+        response = self.client.get(reverse('habit-heatmap', kwargs={'pk': self.habit.pk}), {'year': today.year})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['days'][today.timetuple().tm_yday - 1], 1)
+        self.assertEqual(response.data['streak'], 2)
+
+    def test_heatmap_of_foreign_habit(self):
+        other = User.objects.create_user(username='other', password='testpassword')
+        habit = Habit.objects.create(user=other, title='Secret')
+        response = self.client.get(reverse('habit-heatmap', kwargs={'pk': habit.pk}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_heatmap_year_out_of_range(self):
+        url = reverse('habit-heatmap', kwargs={'pk': self.habit.pk})
+        for year in ['99999999999', '0', '-5', 'abc']:
+            with self.subTest(year=year):
+                self.assertEqual(self.client.get(url, {'year': year}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'year': 9999}).status_code, status.HTTP_200_OK)
@@ -1,6 +1,10 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
-from core.todo.models import Todo, TodoService
+from django.core.cache import cache
+from core.accounts.models import OutboxEvent
+from django.utils import timezone
+from core.todo.checkins import HabitLog
+from core.todo.models import Todo, TodoService, Habit, RewardService
 from unittest.mock import patch
 
 User = get_user_model()
@@ -22,3 +26,50 @@ class TestRewardServiceIntegration(TestCase):
         self.assertEqual(coins, 10)
         self.user.profile.refresh_from_db()
         self.assertEqual(self.user.profile.xp, 20)
+
+
+class RewardQueryBudgetTest(TestCase):
+    """
+    Бюджет запросов на выполнение задачи и привычки (с учётом SAVEPOINT/RELEASE
+    транзакции теста). Если тест упал, значит в путь награды добавился запрос.
+    """
+    # лидерборды: старые очки, запись и перенос между корзинами гистограммы (один upsert)
+    LEADERBOARD = 3
+    # версия бустов (SharedVersion) + начисление (UPDATE, журнал, балансы, лидерборды) + UPDATE задачи + событие очереди
+    TASK_BUDGET = 2 + 1 + 3 + LEADERBOARD + 1 + 1
+    # отметка (SAVEPOINT, INSERT, RELEASE) + битовая карта (SELECT, UPDATE) + серия + версия бустов + начисление + событие
+    HABIT_BUDGET = 2 + 3 + 2 + 1 + 1 + 3 + LEADERBOARD + 1
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='u', password='p')
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_execute_task(self):
+        todo = Todo.objects.create(user=self.user, title='t', difficulty=2)
+        todo = Todo.objects.select_related('user').get(id=todo.id)
+        TodoService(todo).apply_rewards()
+
+        with patch('core.todo.models.random.random', return_value=0.0), self.assertNumQueries(self.TASK_BUDGET):
+            xp, coins = todo.execute_task()
+
+        todo.refresh_from_db()
+        self.assertTrue(todo.is_completed)
+        self.assertTrue(todo.is_golden)
+        self.assertEqual((xp, coins), (30, 20))
+        self.assertEqual(OutboxEvent.objects.filter(kind=OutboxEvent.Kind.TASK_COMPLETED).count(), 1)
+
+    def test_execute_habit(self):
+        habit = Habit.objects.create(user=self.user, title='h')
+        habit = Habit.objects.select_related('user').get(id=habit.id)
+        HabitLog(habit).check_in(timezone.localdate() - timezone.timedelta(days=1))
+        RewardService(habit).calculate_rewards()
+
+        with self.assertNumQueries(self.HABIT_BUDGET):
+            xp, coins = habit.execute_habit()
+
+        habit.refresh_from_db()
+        self.assertEqual(habit.streak, 2)
+        self.assertEqual((xp, coins), (10, 5))
@@ -1,13 +1,20 @@
+from unittest.mock import patch
+
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
-from rest_framework import status
+from rest_framework import generics, status
 from rest_framework.test import APIClient
 
 
-from core.todo.models import Todo
+from core.accounts.models import LedgerEntry, OutboxEvent
+from core.todo.models import Todo, TodoBatchService
+from core.todo.views import TodoListCreateView
 
 User = get_user_model()
 
@@ -61,6 +68,22 @@ class TodoExecuteViewTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('error', response.data)
 
+    def test_parallel_execute_credits_once(self):
+        get_object_or_404 = generics.get_object_or_404
+
+        def read_then_lose_race(*args, **kwargs):
+            todo = get_object_or_404(*args, **kwargs)
+            # Параллельный запрос выполняет задачу после того, как этот её прочитал
+            Todo.objects.select_related('user').get(pk=todo.pk).execute_task()
+            return todo
+
+        with patch('core.todo.views.generics.get_object_or_404', side_effect=read_then_lose_race):
+            response = self.client.patch(self.execute_url)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(LedgerEntry.objects.filter(user=self.user, reason='task_completed', currency='xp').count(), 1)
+        self.assertEqual(OutboxEvent.objects.filter(kind=OutboxEvent.Kind.TASK_COMPLETED).count(), 1)
+
     def test_execute_unauthorized(self):
         self.client.force_authenticate(user=None)
         response = self.client.patch(self.execute_url)
@@ -138,3 +161,166 @@ class TodoExecuteViewTest(TestCase):
         # For a basic test, we can verify the throttle class is applied
         from core.todo.views import TodoExecuteView
         self.assertTrue(hasattr(TodoExecuteView, 'throttle_classes'))
+
+
+class TodoBulkExecuteViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('todo-bulk-execute')
+
+    def tearDown(self):
+        cache.clear()
+
+    def _create_todos(self, count, user=None):
+        return Todo.objects.bulk_create([
+            Todo(user=user or self.user, title=f'Todo {i}', difficulty=i % 3 + 1) for i in range(count)
+        ])
+
+    def _post(self, todos):
+        return self.client.post(self.url, {'ids': [todo.id for todo in todos]}, format='json')
+
+    def test_bulk_execute(self):
+        todos = self._create_todos(3)
+        with patch('core.todo.models.random.random', return_value=1.0):
+            response = self._post(todos)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['id'] for result in response.data['results']], [todo.id for todo in todos])
+        self.assertEqual([result['xp'] for result in response.data['results']], [10, 15, 25])
+        self.assertEqual(response.data['coins'], 5 + 10 + 20)
+        self.assertEqual(Todo.objects.filter(is_completed=True).count(), 3)
+
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.xp, 50)
+        self.assertEqual(OutboxEvent.objects.filter(kind=OutboxEvent.Kind.TASK_COMPLETED).count(), 3)
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        def queries(count):
+            todos = self._create_todos(count)
+            with CaptureQueriesContext(connection) as captured:
+                response = self._post(todos)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(captured)
+
+        with patch('core.todo.models.random.random', return_value=1.0):
+            queries(1)
+            self.assertEqual(queries(1), queries(20))
+
+    def test_foreign_or_completed_todos_fail_whole_batch(self):
+        other = User.objects.create_user(username='other', password='testpassword')
+        own = self._create_todos(2)
+        foreign = self._create_todos(1, user=other)
+
+        response = self._post(own + foreign)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Todo.objects.filter(is_completed=True).exists())
+
+        self._post(own[:1])
+        response = self._post(own)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Todo.objects.get(id=own[1].id).is_completed)
+
+    def test_throttle_counts_tasks(self):
+        response = self._post(self._create_todos(25))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self._post(self._create_todos(6))
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        response = self._post(self._create_todos(5))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        todo = self._create_todos(1)[0]
+        response = self.client.patch(reverse('todo-execute', kwargs={'pk': todo.pk}))
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_throttle_bills_unique_tasks(self):
+        todos = self._create_todos(15)
+        response = self._post(todos + todos)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self._post(self._create_todos(15))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_oversized_batch_is_rejected(self):
+        response = self._post(self._create_todos(TodoBatchService.MAX_TODOS + 1))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self._post(self._create_todos(TodoBatchService.MAX_TODOS))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class TodoListPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('todo-list-create')
+
+        today = timezone.now().date()
+        created_at = timezone.now()
+        todos = Todo.objects.bulk_create([
+            Todo(
+                user=self.user,
+                title=f'Todo {i}',
+                deadline=today + timezone.timedelta(days=i % 4) if i % 5 else None,
+            )
+            for i in range(23)
+        ])
+        # Одинаковые created_at проверяют добор по id
+        Todo.objects.filter(id__in=[todo.id for todo in todos[:10]]).update(created_at=created_at)
+
+    def _walk(self, ordering):
+        ids = []
+        params = {'order_by': ordering, 'page_size': 5}
+        url = self.url
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 5)
+            ids += [row['id'] for row in response.data['results']]
+            url, params = response.data['next'], None
+        return ids
+
+    def _expected(self, field, descending):
+        todos = list(Todo.objects.filter(user=self.user, is_completed=False, is_dream_step=False))
+        present = sorted([todo for todo in todos if getattr(todo, field) is not None], key=lambda todo: (getattr(todo, field), todo.id), reverse=descending)
+        missing = sorted([todo for todo in todos if getattr(todo, field) is None], key=lambda todo: todo.id, reverse=descending)
+        return [todo.id for todo in present + missing]
+
+    def test_walks_every_ordering(self):
+        for ordering in TodoListCreateView.keyset_orderings:
+            with self.subTest(ordering=ordering):
+                self.assertEqual(self._walk(ordering), self._expected(ordering.lstrip('-'), ordering.startswith('-')))
+
+    def test_null_block_is_a_separate_seek(self):
+        for ordering in ['deadline', '-deadline']:
+            with self.subTest(ordering=ordering), CaptureQueriesContext(connection) as captured:
+                self.assertEqual(self._walk(ordering), self._expected('deadline', ordering.startswith('-')))
+            # «OR поле IS NULL» не дал бы SQLite взять диапазон по индексу todo_list_deadline_idx
+            self.assertFalse(any('IS NULL' in query['sql'] and ' OR ' in query['sql'] for query in captured))
+
+    def test_unknown_ordering_falls_back_to_default(self):
+        self.assertEqual(self._walk('title'), self._expected('created_at', True))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_deep_page_costs_the_same(self):
+        first = self.client.get(self.url, {'page_size': 5})
+        with CaptureQueriesContext(connection) as shallow:
+            second = self.client.get(first.data['next'])
+        url = second.data['next']
+        while True:
+            response = self.client.get(url)
+            if not response.data['next']:
+                break
+            url = response.data['next']
+        with CaptureQueriesContext(connection) as deep:
+            self.client.get(url)
+        self.assertEqual(len(shallow), len(deep))
+        self.assertFalse(any('COUNT(' in query['sql'] or 'OFFSET' in query['sql'] for query in deep))
@@ -1,17 +1,19 @@
 from django.urls import path
 from .views import (
-    TodoListCreateView, TodoRetrieveUpdateDestroyView, TodoExecuteView,
-    HabitListCreateView, HabitRetrieveUpdateDestroyView, HabitExecuteView
+    TodoListCreateView, TodoRetrieveUpdateDestroyView, TodoExecuteView, TodoBulkExecuteView,
+    HabitListCreateView, HabitRetrieveUpdateDestroyView, HabitExecuteView, HabitHeatmapView
 )
 
 urlpatterns = [
     # Todo
     path('todos/', TodoListCreateView.as_view(), name='todo-list-create'),
+    path('todos/execute/', TodoBulkExecuteView.as_view(), name='todo-bulk-execute'),
     path('todos/<int:pk>/', TodoRetrieveUpdateDestroyView.as_view(), name='todo-retrieve-update-destroy'),
     path('todos/<int:pk>/execute/', TodoExecuteView.as_view(), name='todo-execute'),
     
     # Habit
     path('habits/', HabitListCreateView.as_view(), name='habit-list-create'),
     path('habits/<int:pk>/', HabitRetrieveUpdateDestroyView.as_view(), name='habit-retrieve-update-destroy'),
-    path('habits/<int:pk>/execute/', HabitExecuteView.as_view(), name='habit-execute')
+    path('habits/<int:pk>/execute/', HabitExecuteView.as_view(), name='habit-execute'),
+    path('habits/<int:pk>/heatmap/', HabitHeatmapView.as_view(), name='habit-heatmap')
 ]
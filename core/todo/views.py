@@ -8,14 +8,26 @@ from rest_framework import status
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-from core.todo.models import Todo, Habit
-from core.todo.serializers import HabitSerializer, TodoSerializer
+from datetime import MAXYEAR, MINYEAR
+
+from django.core.exceptions import ValidationError
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from core.todo.models import Todo, Habit, HabitCheckIn, TodoBatchService
+from core.todo.checkins import HabitLog
+from core.todo.serializers import HabitSerializer, TodoSerializer, TodoBulkExecuteSerializer
 from core.docs.templates import AUTH_HEADER
+from core.utils.paginator import KeysetPagination
 
 
 class TodoListCreateView(generics.ListCreateAPIView):
     serializer_class = TodoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    # Каждой сортировке соответствует индекс todo_list_* (user, is_completed, is_dream_step, поле, id);
+    # строки с NULL в deadline/executed_at выбираются отдельной фазой по тому же индексу
+    keyset_orderings = ['-created_at', 'created_at', 'deadline', '-deadline', '-executed_at', 'executed_at']
 
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
@@ -42,13 +54,19 @@ class TodoListCreateView(generics.ListCreateAPIView):
             openapi.Parameter(
                 'order_by',
                 openapi.IN_QUERY,
-                description='Поле сортировки, например: -created_at, deadline',
+                description='Поле сортировки: -created_at (по умолчанию), created_at, deadline, -deadline, -executed_at, executed_at',
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description='Курсор следующей страницы (из поля next)',
                 type=openapi.TYPE_STRING
             ),
             openapi.Parameter(
-                'page',
+                'page_size',
                 openapi.IN_QUERY,
-                description='Номер страницы пагинации',
+                description='Размер страницы (до 100)',
                 type=openapi.TYPE_INTEGER
             )
         ]
@@ -61,13 +79,14 @@ class TodoListCreateView(generics.ListCreateAPIView):
 
     def _filter_queryset_by_params(self, queryset):
         completed = self.request.query_params.get('completed', 'false').lower() == 'true'
-        order_by = self.request.query_params.get('order_by', '-created_at')
         expired = self.request.query_params.get('expired', None)
         expired = expired == 'true' if expired else None
+        # __in вместо точного сравнения: SQLite превращает is_completed=False в
+        # NOT is_completed и не может использовать индексы todo_list_*
         queryset = queryset.filter(
             user=self.request.user, 
-            is_completed=completed,
-            is_dream_step=False
+            is_completed__in=[completed],
+            is_dream_step__in=[False]
         )
 
         if expired is not None:
@@ -77,7 +96,7 @@ class TodoListCreateView(generics.ListCreateAPIView):
             else:
                 queryset = queryset.filter(deadline__gte=now)
         
-        return queryset.order_by(order_by)
+        return queryset
 
 
 
@@ -108,28 +127,106 @@ class TodoRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
 
 
 class ExecuteThrottle(UserRateThrottle):
+    """Суточный лимит выполненных задач: запрос расходует лимит на каждую задачу."""
+    scope = 'todo_execute'
     rate = '30/day'
 
+    def get_cost(self, request) -> int:
+        return 1
+
+    def allow_request(self, request, view):
+        self.cost = self.get_cost(request)
+        return super().allow_request(request, view)
+
+    def throttle_success(self):
+        if len(self.history) + self.cost > self.num_requests:
+            return self.throttle_failure()
+        self.history[:0] = [self.now] * self.cost
+        self.cache.set(self.key, self.history, self.duration)
+        return True
+
+
+class BulkExecuteThrottle(ExecuteThrottle):
+    def get_cost(self, request) -> int:
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if not isinstance(ids, list):
+            return 1
+        # Пачку больше MAX_TODOS отклонит сериализатор (400), задачи не выполнятся
+        if len(ids) > TodoBatchService.MAX_TODOS:
+            return 0
+        try:
+            # Повторы id сервис отбрасывает, поэтому они не оплачиваются
+            return max(1, len(set(ids)))
+        except TypeError:
+            return 1
+
 class TodoExecuteView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     throttle_classes = [ExecuteThrottle]
 
     @swagger_auto_schema(manual_parameters=[AUTH_HEADER])
     def patch(self, request, pk):
-        todo = generics.get_object_or_404(Todo, pk=pk, user=request.user)
+        todo = generics.get_object_or_404(Todo.objects.select_related('user'), pk=pk, user=request.user)
         if todo.is_completed:
             return Response({"error": "Task is already completed"}, status=status.HTTP_400_BAD_REQUEST)
-        xp, coins = todo.execute_task()
+        try:
+            xp, coins = todo.execute_task()
+        except ValidationError as e:
+            # Задачу выполнил параллельный запрос после проверки выше
+            return Response({"error": e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
         return Response({"xp": xp, "coins": coins}, status=status.HTTP_200_OK)
 
+class TodoBulkExecuteView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [BulkExecuteThrottle]
+
+    @swagger_auto_schema(request_body=TodoBulkExecuteSerializer, manual_parameters=[AUTH_HEADER])
+    def post(self, request):
+        serializer = TodoBulkExecuteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            results = TodoBatchService(request.user).execute(serializer.validated_data['ids'])
+        except ValidationError as e:
+            return Response({"error": e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "results": results,
+            "xp": sum(result['xp'] for result in results),
+            "coins": sum(result['coins'] for result in results),
+        }, status=status.HTTP_200_OK)
+
 class HabitExecuteView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     @swagger_auto_schema(manual_parameters=[AUTH_HEADER])
     def patch(self, request, pk):
+        habit = generics.get_object_or_404(Habit.objects.select_related('user'), pk=pk, user=request.user)
+        try:
+            xp, coins = habit.execute_habit()
+        except ValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'xp': xp, 'coins': coins, 'streak': habit.streak}, status=status.HTTP_200_OK)
+
+
+class HabitHeatmapView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(manual_parameters=[
+        AUTH_HEADER,
+        openapi.Parameter('year', openapi.IN_QUERY, description='Год (по умолчанию текущий)', type=openapi.TYPE_INTEGER),
+    ])
+    def get(self, request, pk):
         habit = generics.get_object_or_404(Habit, pk=pk, user=request.user)
-        xp, coins = habit.execute_habit()
-        return Response({'xp': xp, 'coins': coins}, status=status.HTTP_200_OK)
+        today = timezone.localdate()
+        try:
+            year = int(request.query_params.get('year', today.year))
+        except ValueError:
+            return Response({'error': 'Invalid year'}, status=status.HTTP_400_BAD_REQUEST)
+        # Вне диапазона date() и PositiveSmallIntegerField запрос упал бы с 500
+        if not MINYEAR <= year <= MAXYEAR:
+            return Response({'error': 'Invalid year'}, status=status.HTTP_400_BAD_REQUEST)
+
+        log = HabitLog(habit)
+        return Response({**log.heatmap(year), 'streak': log.streak(today)}, status=status.HTTP_200_OK)
 
 
 class HabitListCreateView(generics.ListCreateAPIView):
@@ -139,7 +236,8 @@ class HabitListCreateView(generics.ListCreateAPIView):
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
             return Habit.objects.none()
-        return Habit.objects.filter(user=self.request.user)
+        done_today = HabitCheckIn.objects.filter(habit=OuterRef('pk'), date=timezone.localdate())
+        return Habit.objects.filter(user=self.request.user).annotate(done_today=Exists(done_today)).order_by('id')
 
     @swagger_auto_schema(manual_parameters=[AUTH_HEADER])
     def post(self, request, *args, **kwargs):
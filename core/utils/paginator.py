@@ -1,6 +1,126 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
 
 class CustomPageNumberPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = 'page_size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+
+
+class KeysetPagination(BasePagination):
+    """
+    Курсорная (keyset) пагинация по паре (поле сортировки, id).
+
+    Вместо COUNT(*) и OFFSET следующая страница выбирается условием
+    «после последней строки», поэтому глубокие страницы стоят столько же,
+    сколько первая, если под сортировку есть индекс. Допустимые сортировки
+    задаёт view в keyset_orderings, сортировка по умолчанию — первая из них.
+
+    NULL всегда идут в конце и выбираются отдельной фазой: сначала строки со
+    значением поля (диапазон по индексу поле, id), а когда они кончаются —
+    строки с NULL по id. Условие «после курсора OR поле IS NULL» в одном
+    запросе SQLite не может взять диапазоном и дочитывает индекс целиком.
+    """
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'order_by'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        orderings = view.keyset_orderings
+        ordering = request.query_params.get(self.ordering_query_param)
+        self.ordering = ordering if ordering in orderings else orderings[0]
+        self.field = self.ordering.lstrip('-')
+        self.descending = self.ordering.startswith('-')
+        self.nullable = queryset.model._meta.get_field(self.field).null
+
+        cursor = self.decode_cursor(request, queryset.model)
+        limit = self.page_size + 1
+        rows = []
+        if cursor is None or cursor[0] is not None:
+            values = queryset.order_by(*self._order_by())
+            if self.nullable:
+                values = values.filter(**{f'{self.field}__isnull': False})
+            if cursor is not None:
+                values = values.filter(self._after(*cursor))
+            rows = list(values[:limit])
+
+        if self.nullable and len(rows) < limit:
+            nulls = queryset.filter(**{f'{self.field}__isnull': True}).order_by('-id' if self.descending else 'id')
+            if cursor is not None and cursor[0] is None:
+                # Курсор уже в хвосте из NULL
+                nulls = nulls.filter(**{'id__lt' if self.descending else 'id__gt': cursor[1]})
+            rows += list(nulls[:limit - len(rows)])
+
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.ordering_query_param, self.ordering)
+        last = self.page[-1]
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(getattr(last, self.field), last.pk))
+
+    @staticmethod
+    def encode_cursor(value, pk) -> str:
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        return base64.urlsafe_b64encode(json.dumps([value, pk]).encode()).decode()
+
+    def decode_cursor(self, request, model) -> tuple | None:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if value is not None:
+                value = model._meta.get_field(self.field).to_python(value)
+            return value, int(pk)
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound('Invalid cursor')
+
+    def _order_by(self) -> list:
+        if self.descending:
+            return [f'-{self.field}', '-id']
+        return [self.field, 'id']
+
+    def _after(self, value, pk) -> Q:
+        # Первое условие — диапазон по индексу, второе отсекает уже показанные строки с тем же значением
+        direction = 'lt' if self.descending else 'gt'
+        return Q(**{f'{self.field}__{direction}e': value}) & (
+            Q(**{f'{self.field}__{direction}': value}) | Q(**{f'id__{direction}': pk})
+        )
@@ -13,3 +13,4 @@ python manage.py loaddata fixtures/icon_items.json
 python manage.py loaddata fixtures/background_items.json
 python manage.py loaddata fixtures/boost_items.json
 python manage.py loaddata fixtures/achievements.json
+python manage.py loaddata fixtures/roulette_rewards.json